@@ -3,11 +3,140 @@ YOLO 批量图像检测示例
 批量处理文件夹中的所有图像
 """
 
+import argparse
 import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
 
 from ultralytics import YOLO
 
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.batch_inference import BatchDetector, BatchLoader, list_images, stage_rates  # noqa: E402
+from service.detection_cache import DEFAULT_CACHE_PATH, DetectionCache  # noqa: E402
+from service.detection_parquet import (  # noqa: E402
+    DEFAULT_PARQUET_ROOT,
+    DetectionParquetWriter,
+    new_partition,
+    partition_path,
+)
+from service.detections import boxes_to_numpy  # noqa: E402
+
+DEFAULT_JSONL_PATH = "runs/detect/batch_results.jsonl"
+OUTPUT_FORMATS = ("jsonl", "parquet")
+BATCH_IOU = 0.7  # 批量引擎的 NMS IoU 阈值（ultralytics 默认值）
+
+
+def make_record(image: str, data: np.ndarray, names: Dict[int, str]) -> Dict:
+    """
+    把一张图像的检测数组转换为可序列化的字典
+
+    Args:
+        image: 图像路径
+        data: (N, 6) 或 (N, 7) 检测数组，列含义同 boxes_to_numpy
+        names: 类别名称
+    """
+    tracked = data.shape[1] == 7
+    objects = []
+    for row in data:
+        obj = {
+            'class': names[int(row[-1])],
+            'confidence': float(row[-2]),
+            'bbox': row[:4].tolist(),
+        }
+        if tracked:
+            obj['track_id'] = int(row[4])
+        objects.append(obj)
+    return {'image': image, 'num_objects': len(data), 'objects': objects}
+
+
+def unreadable_record(image: str) -> Dict:
+    """无法读取的图像的记录（所有模式一致，下游可以区分"没有目标"和"读取失败"）"""
+    return {'image': image, 'num_objects': 0, 'objects': [], 'error': '无法读取图像'}
+
+
+def detection_record(result, names: Dict[int, str], idx: int) -> Dict:
+    """
+    把一张图像的检测结果转换为可序列化的字典
+
+    Args:
+        result: ultralytics Results
+        names: 类别名称
+        idx: 图像序号（结果没有路径时用于命名）
+    """
+    # 整张图只做一次 tensor -> NumPy 传输
+    image = str(result.path) if getattr(result, 'path', None) else f'image_{idx}'
+    return make_record(image, boxes_to_numpy(result.boxes), names)
+
+
+class JsonLinesWriter:
+    """JSON Lines 输出：每张图像一行，写完即可丢弃，内存占用与图像数量无关"""
+
+    def __init__(self, path: str | Path, flush_every: int = 100):
+        """
+        Args:
+            path: 输出路径
+            flush_every: 每写入多少行刷新一次文件缓冲（进程中断时已处理的结果不丢失）
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.count = 0
+        self._file = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "JsonLinesWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_writer(output_format: str, output_path: str | Path, shard: Optional[int] = None,
+                partition: Optional[Tuple[str, str]] = None):
+    """
+    按输出格式创建结果写入器（JsonLinesWriter 或 DetectionParquetWriter）
+
+    Args:
+        output_format: jsonl 或 parquet
+        output_path: JSON Lines 文件路径或 Parquet 根目录
+        shard: 分片序号；JSON Lines 写入分片文件，Parquet 用作分片文件名前缀（直接写入同一分区，不需要合并）
+        partition: Parquet 的 (run, date) 分区，None 时使用当前时间
+    """
+    if output_format == "parquet":
+        run, date = partition or new_partition()
+        prefix = "part" if shard is None else f"part-{shard:05d}"
+        return DetectionParquetWriter(output_path, run=run, date=date, prefix=prefix)
+    if output_format != "jsonl":
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    return JsonLinesWriter(output_path if shard is None else shard_output_path(output_path, shard))
+
+
+def _print_saved(output_format: str, output: str | Path) -> None:
+    label = "Parquet" if output_format == "parquet" else "JSON Lines"
+    print(f"{label} 结果已保存到: {output}")
+
 
 def batch_detect(model_path: str = "yolo11n.pt",
                  source_dir: str = "datasets/images",
@@ -17,6 +146,8 @@ def batch_detect(model_path: str = "yolo11n.pt",
     """
     批量检测文件夹中的所有图像
 
+    所有结果保存在内存中，适合小规模文件夹；大量图像请使用 batch_detect_stream。
+
     Args:
         model_path: 模型路径
         source_dir: 图像文件夹路径
@@ -44,31 +175,11 @@ def batch_detect(model_path: str = "yolo11n.pt",
     total_objects = 0
 
     for idx, result in enumerate(results):
-        boxes = result.boxes
-        if boxes is not None:
-            num_objects = len(boxes)
-            total_objects += num_objects
-
-            # 收集检测结果
-            detections = {
-                'image': str(result.path) if hasattr(result, 'path') else f'image_{idx}',
-                'num_objects': num_objects,
-                'objects': []
-            }
-
-            for box in boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                xyxy = box.xyxy[0].tolist()
-
-                detections['objects'].append({
-                    'class': model.names[cls],
-                    'confidence': conf,
-                    'bbox': xyxy
-                })
-
+        if result.boxes is not None:
+            detections = detection_record(result, model.names, idx)
+            total_objects += detections['num_objects']
             all_detections.append(detections)
-            print(f"图像 {idx + 1}: 检测到 {num_objects} 个目标")
+            print(f"图像 {idx + 1}: 检测到 {detections['num_objects']} 个目标")
 
     # 导出JSON结果
     if export_json and all_detections:
@@ -85,13 +196,480 @@ def batch_detect(model_path: str = "yolo11n.pt",
     return results, all_detections
 
 
-if __name__ == "__main__":
-    print("=" * 50)
-    print("批量检测示例")
-    print("=" * 50)
+def batch_detect_stream(model_path: str = "yolo11n.pt",
+                        source_dir: str = "datasets/images",
+                        conf: float = 0.25,
+                        save: bool = False,
+                        output_path: Optional[str] = None,
+                        log_every: int = 100,
+                        batch_size: int = 1,
+                        decode_workers: int = 0,
+                        imgsz: int = 640,
+                        device: Optional[str] = None,
+                        workers: int = 1,
+                        threads_per_worker: Optional[int] = None,
+                        cache_path: Optional[str] = None,
+                        output_format: str = "jsonl") -> Dict:
+    """
+    流式批量检测：逐张消费检测结果并写入 JSON Lines，内存占用不随图像数量增长
+
+    model(stream=True) 返回生成器，每张图像的 Results（含原图）在写出后即被释放，
+    不保留结果列表，适合数十万张图像的归档文件夹。
+
+    batch_size > 1 或 decode_workers > 0 时使用批量引擎：解码线程池提前解码并 letterbox
+    到复用的批缓冲区，模型按整批推理，结束时报告各阶段吞吐（批量模式不保存结果图像）。
+
+    workers > 1 时把文件列表按顺序切分为 workers 个分片，每个工作进程加载一次模型、
+    用批量引擎处理自己的分片并写入分片文件，全部完成后按输入顺序合并。
+
+    指定 cache_path 时（使用批量引擎）按图像内容哈希 + 模型哈希 + 阈值缓存结果，
+    未变化的图像直接从缓存输出，中断的任务重新运行时从缓存恢复。
+
+    output_format="parquet" 时改为列式输出：每个检测目标一行，按固定行数的行组写入
+    output_path/run=<run>/date=<日期>/ 分区，适合用 polars 对大量检测结果做聚合分析。
+
+    Args:
+        model_path: 模型路径
+        source_dir: 图像文件夹路径
+        conf: 置信度阈值
+        save: 是否保存结果图像
+        output_path: JSON Lines 输出路径（每行一张图像）或 Parquet 根目录，None 时按格式使用默认路径
+        log_every: 每处理多少张图像输出一次进度
+        batch_size: 推理批大小
+        decode_workers: 解码线程数（批量引擎）
+        imgsz: 批量引擎的输入尺寸（32 的倍数）
+        device: 推理设备，None 时自动选择
+        workers: 工作进程数
+        threads_per_worker: 每个工作进程的 torch 线程数，None 时为 CPU 核数 / workers
+        cache_path: 检测结果缓存（SQLite）路径，None 时不使用缓存
+        output_format: 输出格式，jsonl 或 parquet
+
+    Returns:
+        统计信息：图像数、目标数、耗时和输出路径
+    """
+    if not Path(source_dir).exists():
+        raise FileNotFoundError(f"文件夹 {source_dir} 不存在")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    if output_path is None:
+        output_path = str(DEFAULT_PARQUET_ROOT) if output_format == "parquet" else DEFAULT_JSONL_PATH
+
+    batched = batch_size > 1 or decode_workers > 0 or workers > 1 or cache_path is not None
+    if batched and save:
+        print("警告: 批量引擎不保存结果图像")
+
+    config_hash = None
+    if cache_path is not None:
+        with DetectionCache(cache_path) as cache:
+            config_hash = cache.config_hash(model_path, conf=conf, iou=BATCH_IOU, imgsz=imgsz)
+        print(f"结果缓存: {cache_path}")
+
+    if workers > 1:
+        return _batch_detect_sharded(
+            model_path, source_dir, conf, output_path, log_every, batch_size, max(decode_workers, 1), imgsz,
+            device, workers, threads_per_worker, cache_path, config_hash, output_format)
+
+    print(f"加载模型: {model_path}")
+    model = YOLO(model_path)
+
+    print(f"流式批量检测: {source_dir} -> {output_path}")
+    if batched:
+        return _batch_detect_batched(
+            model, source_dir, conf, output_path, log_every, batch_size, max(decode_workers, 1), imgsz, device,
+            cache_path, config_hash, output_format)
+
+    # 与批量引擎使用相同的文件列表（绝对路径），输出的图像路径和顺序一致
+    paths = [str(path) for path in list_images(source_dir)]
+    positions = {path: index for index, path in enumerate(paths)}
+    totals = {'images': 0, 'objects': 0, 'failed': 0}
+    position = 0  # 下一张要写出的图像在 paths 中的位置
+    start = time.perf_counter()
+
+    with open_writer(output_format, output_path) as writer:
+        def write(record: Dict) -> None:
+            writer.write(record)
+            totals['images'] += 1
+            totals['objects'] += record['num_objects']
+            if 'error' in record:
+                totals['failed'] += 1
+            if totals['images'] % log_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"已处理 {totals['images']} 张图像 | 目标: {totals['objects']} | "
+                      f"{totals['images'] / elapsed:.1f} 张/秒")
+
+        results = model(paths, conf=conf, save=save, stream=True, verbose=False, device=device)
+        for idx, result in enumerate(results):
+            # ultralytics 会跳过无法读取的图像：按输入顺序为被跳过的图像补写错误记录，与批量引擎一致
+            index = positions.get(str(result.path))
+            if index is not None:
+                while position < index:
+                    write(unreadable_record(paths[position]))
+                    position += 1
+                position = index + 1
+            write(detection_record(result, model.names, idx))
+        while position < len(paths):
+            write(unreadable_record(paths[position]))
+            position += 1
 
-    # 批量检测
-    results, detections = batch_detect()
+    elapsed = time.perf_counter() - start
+    print(f"\n总计: 处理了 {totals['images']} 张图像, 检测到 {totals['objects']} 个目标, "
+          f"耗时 {elapsed:.1f}s ({totals['images'] / max(elapsed, 1e-6):.1f} 张/秒)")
+    if totals['failed']:
+        print(f"无法读取: {totals['failed']} 张图像")
+    output = writer.path
+    _print_saved(output_format, output)
+    return {
+        **totals,
+        'elapsed': elapsed,
+        'output': str(output),
+    }
+
+
+def detect_paths(model, paths: List[Path], writer, conf: float, batch_size: int,
+                 decode_workers: int, imgsz: int, device: Optional[str],
+                 on_batch: Optional[Callable[[int, int], None]] = None,
+                 cache: Optional[DetectionCache] = None, config_hash: Optional[str] = None) -> Dict:
+    """
+    批量引擎：并行解码 + 整批推理，按输入顺序写出每张图像的结果
+
+    启用缓存时先计算所有图像的内容哈希，只有缓存中没有结果的图像才会被解码和推理
+    （列出文件之后被删除的图像按无法读取的图像输出）；
+    每批的新结果在写出后立即提交到缓存，中断后重新运行会从缓存中恢复已完成的部分。
+
+    Args:
+        model: ultralytics YOLO
+        paths: 图像路径（输出顺序与之一致）
+        writer: 结果写入器（JsonLinesWriter 或 DetectionParquetWriter）
+        conf: 置信度阈值
+        batch_size: 推理批大小
+        decode_workers: 解码线程数
+        imgsz: 输入尺寸
+        device: 推理设备
+        on_batch: 每批写出后的回调 (本次写出的图像数, 目标数)
+        cache: 检测结果缓存，None 时不使用缓存
+        config_hash: 缓存的配置哈希（DetectionCache.config_hash）
+
+    Returns:
+        统计信息：图像数、目标数、无法读取的图像数、各阶段吞吐和缓存统计
+    """
+    if cache is not None:
+        hashes = cache.file_hashes(paths)
+        cached = cache.cached(hashes, config_hash)
+        is_cached = [content_hash in cached for content_hash in hashes]
+        if cached:
+            print(f"缓存命中: {sum(is_cached)}/{len(paths)} 张图像")
+    else:
+        hashes = [None] * len(paths)
+        is_cached = [False] * len(paths)
+
+    misses = [path for path, hit in zip(paths, is_cached) if not hit]
+    miss_hashes = {path: content_hash for path, content_hash, hit in zip(paths, hashes, is_cached) if not hit}
+    loader = BatchLoader(misses, imgsz=imgsz, batch_size=batch_size, workers=decode_workers)
+    detector = BatchDetector(model, imgsz=imgsz, batch_size=batch_size, device=device)
+
+    totals = {'images': 0, 'objects': 0, 'failed': 0}
+    write_seconds = 0.0
+    position = 0  # 下一张要写出的图像在 paths 中的位置
+
+    def drain(fresh: Dict[Path, Dict]) -> None:
+        """按输入顺序写出缓存命中的图像和本批的新结果，遇到属于后续批次的图像时停止"""
+        nonlocal position
+        images = objects = 0
+        while position < len(paths):
+            path = paths[position]
+            if is_cached[position]:
+                record = {'image': str(path), **cache.get(hashes[position], config_hash)}
+            elif path in fresh:
+                record = fresh[path]
+            else:
+                break
+            writer.write(record)
+            images += 1
+            objects += record['num_objects']
+            position += 1
+        totals['images'] += images
+        totals['objects'] += objects
+        if on_batch is not None and images:
+            on_batch(images, objects)
+
+    for batch in loader:
+        detections = dict(zip(batch.paths, detector.predict(batch, conf=conf, iou=BATCH_IOU)))
+
+        write_start = time.perf_counter()
+        fresh = {}
+        for path in batch.inputs:
+            data = detections.get(path)
+            if data is None:
+                fresh[path] = unreadable_record(str(path))
+                continue
+            record = make_record(str(path), data, model.names)
+            fresh[path] = record
+            if cache is not None and miss_hashes[path] is not None:
+                cache.put(miss_hashes[path], config_hash, {k: v for k, v in record.items() if k != 'image'})
+        if cache is not None:
+            cache.commit()
+        drain(fresh)
+        write_seconds += time.perf_counter() - write_start
+        totals['failed'] += len(batch.failed)
+
+    drain({})  # 最后一批之后剩余的缓存命中
+
+    stats = {
+        **totals,
+        'stage_rates': stage_rates(len(misses) - totals['failed'], loader, detector, write_seconds),
+    }
+    if cache is not None:
+        stats['cache'] = cache.stats()
+    return stats
+
+
+def _print_stage_rates(rates: Dict[str, float], decode_workers: int, prefix: str = "各阶段吞吐") -> None:
+    print(f"{prefix}: 解码 {rates['decode']:.1f} 张/秒 ({decode_workers} 线程) | "
+          f"推理 {rates['inference']:.1f} 张/秒 | 写入 {rates['write']:.1f} 张/秒 | "
+          f"等待解码 {rates['decode_wait_seconds']:.1f}s")
+
+
+def _print_cache_stats(stats: Dict[str, int]) -> None:
+    lookups = stats['hits'] + stats['misses']
+    print(f"缓存统计: 命中 {stats['hits']} | 未命中 {stats['misses']} | "
+          f"命中率 {stats['hits'] / lookups if lookups else 0:.0%} | "
+          f"重新哈希 {stats['hashed']} 个文件 | 未变化 {stats['unchanged']} 个文件")
+
+
+def _batch_detect_batched(model, source_dir: str, conf: float, output_path: str, log_every: int,
+                          batch_size: int, decode_workers: int, imgsz: int, device: Optional[str],
+                          cache_path: Optional[str] = None, config_hash: Optional[str] = None,
+                          output_format: str = "jsonl") -> Dict:
+    """单进程批量引擎"""
+    paths = list_images(source_dir)
+    print(f"批量引擎: {len(paths)} 张图像 | 批大小 {batch_size} | 解码线程 {decode_workers} | 输入 {imgsz}")
+
+    progress = {'images': 0, 'objects': 0, 'next_log': log_every}
+    start = time.perf_counter()
+
+    def on_batch(images: int, objects: int) -> None:
+        progress['images'] += images
+        progress['objects'] += objects
+        if progress['images'] >= progress['next_log']:
+            progress['next_log'] += log_every
+            elapsed = time.perf_counter() - start
+            print(f"已处理 {progress['images']}/{len(paths)} 张图像 | 目标: {progress['objects']} | "
+                  f"{progress['images'] / elapsed:.1f} 张/秒")
+
+    cache = DetectionCache(cache_path) if cache_path is not None else None
+    try:
+        with open_writer(output_format, output_path) as writer:
+            stats = detect_paths(model, paths, writer, conf, batch_size, decode_workers, imgsz, device, on_batch,
+                                 cache, config_hash)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n总计: 处理了 {stats['images']} 张图像, 检测到 {stats['objects']} 个目标, "
+          f"耗时 {elapsed:.1f}s ({stats['images'] / max(elapsed, 1e-6):.1f} 张/秒)")
+    if stats['failed']:
+        print(f"无法读取: {stats['failed']} 张图像")
+    _print_stage_rates(stats['stage_rates'], decode_workers)
+    if 'cache' in stats:
+        _print_cache_stats(stats['cache'])
+    _print_saved(output_format, writer.path)
+    return {**stats, 'elapsed': elapsed, 'output': str(writer.path)}
+
+
+def shard_paths(paths: List[Path], num_shards: int) -> List[List[Path]]:
+    """按顺序把文件列表切分为 num_shards 个连续分片（分片大小相差不超过 1）"""
+    size, remainder = divmod(len(paths), num_shards)
+    shards = []
+    start = 0
+    for index in range(num_shards):
+        end = start + size + (1 if index < remainder else 0)
+        shards.append(paths[start:end])
+        start = end
+    return shards
+
+
+def shard_output_path(output_path: str | Path, index: int) -> Path:
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.shard-{index:05d}{output_path.suffix}")
+
+
+_progress_counter = None  # 工作进程中的全局进度计数（共享内存）
+
+
+def _init_shard_worker(counter, threads: int) -> None:
+    """工作进程初始化：限制 torch/OpenCV 线程数，避免多个进程争抢 CPU"""
+    global _progress_counter
+    _progress_counter = counter
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)
+
+
+def _run_shard(index: int, paths: List[Path], output_path: str, model_path: str, conf: float, batch_size: int,
+               decode_workers: int, imgsz: int, device: Optional[str], cache_path: Optional[str],
+               config_hash: Optional[str], output_format: str, partition: Optional[Tuple[str, str]]) -> Dict:
+    """工作进程：加载一次模型，处理一个分片并写入分片文件（各进程使用独立的缓存连接）"""
+    model = YOLO(model_path)
+
+    def on_batch(images: int, objects: int) -> None:
+        with _progress_counter.get_lock():
+            _progress_counter.value += images
+
+    cache = DetectionCache(cache_path) if cache_path is not None else None
+    try:
+        with open_writer(output_format, output_path, shard=index, partition=partition) as writer:
+            stats = detect_paths(model, paths, writer, conf, batch_size, decode_workers, imgsz, device, on_batch,
+                                 cache, config_hash)
+    finally:
+        if cache is not None:
+            cache.close()
+    return {**stats, 'shard': index}
+
+
+def merge_shards(output_path: str | Path, num_shards: int) -> None:
+    """按分片顺序（即输入顺序）合并分片文件，合并后删除分片"""
+    with open(output_path, 'wb') as out:
+        for index in range(num_shards):
+            shard_path = shard_output_path(output_path, index)
+            with open(shard_path, 'rb') as shard:
+                shutil.copyfileobj(shard, out, length=1024 * 1024)
+    for index in range(num_shards):
+        shard_output_path(output_path, index).unlink()
+
+
+def _batch_detect_sharded(model_path: str, source_dir: str, conf: float, output_path: str, log_every: int,
+                          batch_size: int, decode_workers: int, imgsz: int, device: Optional[str], workers: int,
+                          threads_per_worker: Optional[int], cache_path: Optional[str] = None,
+                          config_hash: Optional[str] = None, output_format: str = "jsonl") -> Dict:
+    """
+    多进程分片批量检测：每个进程处理一个连续分片，最后按输入顺序合并
+
+    Parquet 输出时各进程直接写入同一分区，分片文件名按分片序号排序即为输入顺序，不需要合并。
+    """
+    paths = list_images(source_dir)
+    workers = max(1, min(workers, len(paths)))
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    shards = shard_paths(paths, workers)
+    # 分区由主进程统一确定，所有工作进程写入同一个 run
+    partition = new_partition() if output_format == "parquet" else None
+    if partition is None:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    print(f"分片批量检测: {len(paths)} 张图像 | {workers} 个工作进程 × {threads} 线程 | "
+          f"批大小 {batch_size} | 解码线程 {decode_workers}/进程")
+
+    # spawn 避免 fork 复制主进程中的 torch 线程池状态
+    context = multiprocessing.get_context("spawn")
+    counter = context.Value('q', 0)
+    start = time.perf_counter()
+    shard_stats = []
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_shard_worker,
+                             initargs=(counter, threads)) as executor:
+        futures = [
+            executor.submit(_run_shard, index, shard, output_path, model_path, conf, batch_size,
+                            decode_workers, imgsz, device, cache_path, config_hash, output_format, partition)
+            for index, shard in enumerate(shards)
+        ]
+
+        next_log = log_every
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1.0)
+            for future in done:
+                shard_stats.append(future.result())  # 工作进程的异常在这里抛出
+            processed = counter.value
+            if processed >= next_log or not pending:
+                next_log = (processed // log_every + 1) * log_every
+                elapsed = time.perf_counter() - start
+                print(f"已处理 {processed}/{len(paths)} 张图像 | {processed / max(elapsed, 1e-6):.1f} 张/秒 | "
+                      f"完成分片 {len(futures) - len(pending)}/{len(futures)}")
+
+    if partition is None:
+        merge_shards(output_path, len(shards))
+        output = Path(output_path)
+    else:
+        output = partition_path(output_path, *partition)
+    elapsed = time.perf_counter() - start
+
+    shard_stats.sort(key=lambda item: item['shard'])
+    total_images = sum(item['images'] for item in shard_stats)
+    total_objects = sum(item['objects'] for item in shard_stats)
+    failed = sum(item['failed'] for item in shard_stats)
+    print(f"\n总计: 处理了 {total_images} 张图像, 检测到 {total_objects} 个目标, "
+          f"耗时 {elapsed:.1f}s ({total_images / max(elapsed, 1e-6):.1f} 张/秒)")
+    if failed:
+        print(f"无法读取: {failed} 张图像")
+    for item in shard_stats:
+        _print_stage_rates(item['stage_rates'], decode_workers, prefix=f"  分片 {item['shard']}")
+    result = {
+        'images': total_images,
+        'objects': total_objects,
+        'failed': failed,
+        'elapsed': elapsed,
+        'shards': shard_stats,
+        'output': str(output),
+    }
+    if cache_path is not None:
+        result['cache'] = {
+            key: sum(item['cache'][key] for item in shard_stats) for key in ('hits', 'misses', 'hashed', 'unchanged')
+        }
+        _print_cache_stats(result['cache'])
+    _print_saved(output_format, output)
+    return result
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(
+        description="YOLO 批量图像检测",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--model", type=str, default="yolo11n.pt", help="模型路径")
+    parser.add_argument("--source", type=str, default="datasets/images", help="图像文件夹路径")
+    parser.add_argument("--conf", type=float, default=0.25, help="置信度阈值")
+    parser.add_argument("--save", action=argparse.BooleanOptionalAction, default=None,
+                        help="是否保存结果图像（默认: 普通模式保存，流式处理不保存）")
+    parser.add_argument("--stream", action="store_true", help="流式处理，逐张写入 JSON Lines（内存占用不随图像数量增长）")
+    parser.add_argument("--output", type=str, default=None,
+                        help=f"流式处理的输出路径（默认 jsonl: {DEFAULT_JSONL_PATH}，parquet: {DEFAULT_PARQUET_ROOT}）")
+    parser.add_argument("--format", type=str, choices=OUTPUT_FORMATS, default="jsonl",
+                        help="流式处理的输出格式：jsonl 每行一张图像，parquet 每个检测目标一行（按 run/日期分区）")
+    parser.add_argument("--batch-size", type=int, default=1, help="推理批大小（大于 1 时使用批量引擎，需要 --stream）")
+    parser.add_argument("--decode-workers", type=int, default=0, help="批量引擎的解码线程数（需要 --stream）")
+    parser.add_argument("--imgsz", type=int, default=640, help="批量引擎的输入尺寸")
+    parser.add_argument("--device", type=str, default=None, help="推理设备（cpu、0、mps 等）")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数，大于 1 时按分片多进程处理（需要 --stream）")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="每个工作进程的 torch 线程数（默认 CPU 核数 / 工作进程数）")
+    parser.add_argument("--cache", type=str, nargs="?", const=str(DEFAULT_CACHE_PATH), default=None,
+                        help=f"启用结果缓存（SQLite），可指定路径，默认 {DEFAULT_CACHE_PATH}（需要 --stream）")
+
+    args = parser.parse_args(argv)
+    save = args.save if args.save is not None else not args.stream
+
+    if args.stream:
+        batch_detect_stream(
+            model_path=args.model,
+            source_dir=args.source,
+            conf=args.conf,
+            save=save,
+            output_path=args.output,
+            batch_size=args.batch_size,
+            decode_workers=args.decode_workers,
+            imgsz=args.imgsz,
+            device=args.device,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            cache_path=args.cache,
+            output_format=args.format,
+        )
+        return
+
+    results, detections = batch_detect(
+        model_path=args.model,
+        source_dir=args.source,
+        conf=args.conf,
+        save=save,
+    )
 
     # 打印详细结果
     print("\n详细结果:")
@@ -99,3 +677,10 @@ if __name__ == "__main__":
         print(f"\n图像: {detection['image']}")
         for obj in detection['objects']:
             print(f"  - {obj['class']}: {obj['confidence']:.2f}")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("批量检测示例")
+    print("=" * 50)
+    main()
@@ -0,0 +1,264 @@
+"""
+H.264 编码器基准测试工具
+用合成帧以推流配置的分辨率和帧率测试本机所有可用的编码器，
+记录单帧编码耗时、CPU 耗时和码率误差，生成推流器启动时读取的编码器排名
+"""
+
+import argparse
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.encoder_profile import (  # noqa: E402
+    DEFAULT_PROFILE_PATH,
+    FFMPEG_BACKEND,
+    FFMPEG_ENCODERS,
+    GSTREAMER_BACKEND,
+    EncoderProfile,
+    build_encoder_args,
+    frame_budget_ms,
+)
+from service.gst_pipeline_cache import GstPipelineCache  # noqa: E402
+from service.offline_capture import synthetic_frames  # noqa: E402
+
+
+def available_ffmpeg_encoders() -> List[str]:
+    """本机 FFmpeg 编译了哪些候选编码器"""
+    try:
+        output = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    names = {line.split()[1] for line in output.splitlines() if len(line.split()) > 1}
+    return [encoder for encoder in FFMPEG_ENCODERS if encoder in names]
+
+
+def summarize(encoder: str, frames: int, wall_s: float, cpu_s: float, output_bytes: int, fps: int,
+              bitrate: int) -> Dict:
+    """把一次测试的原始数据换算为单帧耗时和码率误差"""
+    actual_kbps = output_bytes * 8 / (frames / fps) / 1000
+    return {
+        "encoder": encoder,
+        "encode_ms": wall_s / frames * 1000,
+        "cpu_ms": cpu_s / frames * 1000,
+        "bitrate_kbps": actual_kbps,
+        "bitrate_error": abs(actual_kbps - bitrate) / bitrate,
+        "error": None,
+    }
+
+
+def benchmark_ffmpeg(encoder: str, frames: List[np.ndarray], repeat: int, fps: int, bitrate: int) -> Dict:
+    """
+    以最快速度向 FFmpeg 写入合成帧，测量编码吞吐
+
+    单帧编码耗时 = 总耗时 / 帧数；CPU 耗时来自 FFmpeg 子进程的 rusage（用户态 + 内核态）。
+    """
+    height, width = frames[0].shape[:2]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "out.h264"
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}',
+            '-r', str(fps),
+            '-i', '-',
+        ] + build_encoder_args(encoder, bitrate) + ['-f', 'h264', '-y', str(output_path)]
+
+        usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for _ in range(repeat):
+                for frame in frames:
+                    process.stdin.write(frame.tobytes())
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read().decode('utf-8', errors='ignore')
+        returncode = process.wait()
+        wall_s = time.perf_counter() - start
+        usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        if returncode != 0 or not output_path.exists():
+            return {"encoder": encoder, "error": stderr.strip()[-300:] or f"返回码 {returncode}"}
+
+        cpu_s = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        return summarize(encoder, len(frames) * repeat, wall_s, cpu_s, output_path.stat().st_size, fps, bitrate)
+
+
+def benchmark_gstreamer(name: str, pipeline: str, frames: List[np.ndarray], repeat: int, fps: int,
+                        bitrate: int) -> Dict:
+    """
+    用 PushStreamer 的候选管道编码合成帧（rtph264pay/udpsink 替换为 filesink）
+
+    GStreamer 在本进程内运行，CPU 耗时取本进程的 process_time。
+    """
+    height, width = frames[0].shape[:2]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / "out.h264"
+        file_pipeline = pipeline.rsplit("rtph264pay", 1)[0] + f"filesink location={output_path}"
+
+        writer = cv2.VideoWriter(file_pipeline, cv2.CAP_GSTREAMER, 0, float(fps), (width, height), True)
+        if not writer.isOpened():
+            return {"encoder": name, "error": "管道无法打开"}
+
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for frame in frames:
+                writer.write(frame)
+        writer.release()  # 发送 EOS 并等待编码完成
+        wall_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+
+        if not output_path.exists() or output_path.stat().st_size == 0:
+            return {"encoder": name, "error": "没有输出码流"}
+        return summarize(name, len(frames) * repeat, wall_s, cpu_s, output_path.stat().st_size, fps, bitrate)
+
+
+def print_results(title: str, results: List[Dict], ranked: List[str], budget_ms: float) -> None:
+    print(f"\n{title}（延迟预算: {budget_ms:.1f}ms/帧）")
+    print(f"   {'排名':4s} {'编码器':20s}{'编码(ms)':>10s}{'CPU(ms)':>10s}{'码率(kbps)':>12s}{'码率误差':>10s}")
+    by_name = {r["encoder"]: r for r in results}
+    for rank, name in enumerate(ranked, 1):
+        r = by_name[name]
+        print(f"   {rank:<4d} {name:20s}{r['encode_ms']:>10.2f}{r['cpu_ms']:>10.2f}"
+              f"{r['bitrate_kbps']:>12.0f}{r['bitrate_error']:>10.0%}")
+    for r in results:
+        if r["error"] is not None:
+            print(f"   {'-':4s} {r['encoder']:20s} 不可用: {r['error']}")
+
+
+def benchmark_encoders(
+    width: int = 640,
+    height: int = 480,
+    fps: int = 15,
+    bitrate: int = 400,
+    seconds: int = 10,
+    backends: List[str] = (FFMPEG_BACKEND, GSTREAMER_BACKEND),
+    output: str = str(DEFAULT_PROFILE_PATH),
+) -> EncoderProfile:
+    """
+    测试所有可用编码器并写入编码器排名
+
+    Args:
+        width: 视频宽度
+        height: 视频高度
+        fps: 帧率
+        bitrate: 目标码率 (kbps)
+        seconds: 每个编码器编码的视频时长（秒），帧数 = seconds × fps
+        backends: 要测试的后端（ffmpeg: FFmpegPushStreamer，gstreamer: PushStreamer）
+        output: 编码器排名输出路径
+
+    Returns:
+        EncoderProfile
+    """
+    frames = synthetic_frames(width, height, count=min(fps * seconds, 60))
+    repeat = max(1, fps * seconds // len(frames))
+    budget_ms = frame_budget_ms(fps)
+    print(f"📹 测试配置: {width}x{height}@{fps}fps | {bitrate}kbps | {len(frames) * repeat} 帧/编码器")
+
+    data = {
+        "host": socket.gethostname(),
+        "created": datetime.now().isoformat(),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "bitrate": bitrate,
+        FFMPEG_BACKEND: [],
+        GSTREAMER_BACKEND: [],
+    }
+
+    if FFMPEG_BACKEND in backends:
+        encoders = available_ffmpeg_encoders()
+        if not encoders:
+            print("\n⚠️  未找到 FFmpeg 或没有可用的 H.264 编码器")
+        for encoder in encoders:
+            print(f"   测试 FFmpeg 编码器: {encoder} ...")
+            data[FFMPEG_BACKEND].append(benchmark_ffmpeg(encoder, frames, repeat, fps, bitrate))
+
+    if GSTREAMER_BACKEND in backends:
+        if 'GStreamer' not in cv2.getBuildInformation():
+            print("\n⚠️  OpenCV 未编译 GStreamer 支持，跳过 GStreamer 编码器")
+        else:
+            from service.push_streamer import PushStreamer
+
+            streamer = PushStreamer(
+                video_width=width,
+                video_height=height,
+                fps=fps,
+                bitrate=bitrate,
+                headless=True,
+                gst_cache_path=None,
+                encoder_profile_path=None,
+            )
+            for pipeline, name in streamer.gst_pipelines:
+                print(f"   测试 GStreamer 编码器: {name} ...")
+                data[GSTREAMER_BACKEND].append(benchmark_gstreamer(name, pipeline, frames, repeat, fps, bitrate))
+
+    profile = EncoderProfile(data)
+    profile.save(output)
+
+    # 探测顺序已改变，让 PushStreamer 下次启动按新的排名重新探测
+    GstPipelineCache().invalidate()
+
+    for backend, title in ((FFMPEG_BACKEND, "FFmpeg 编码器"), (GSTREAMER_BACKEND, "GStreamer 编码器")):
+        if data[backend]:
+            print_results(title, data[backend], profile.rank(backend, budget_ms), budget_ms)
+
+    print(f"\n✅ 编码器排名已保存: {output}")
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="H.264 编码器基准测试（benchmark-encoders）",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--width", type=int, default=640, help="视频宽度")
+    parser.add_argument("--height", type=int, default=480, help="视频高度")
+    parser.add_argument("--fps", type=int, default=15, help="帧率")
+    parser.add_argument("--bitrate", type=int, default=400, help="目标码率 (kbps)")
+    parser.add_argument("--seconds", type=int, default=10, help="每个编码器编码的视频时长（秒）")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=[FFMPEG_BACKEND, GSTREAMER_BACKEND],
+        default=[FFMPEG_BACKEND, GSTREAMER_BACKEND],
+        help="要测试的推流后端"
+    )
+    parser.add_argument("--output", type=str, default=str(DEFAULT_PROFILE_PATH), help="编码器排名输出路径")
+
+    args = parser.parse_args()
+
+    benchmark_encoders(
+        width=args.width,
+        height=args.height,
+        fps=args.fps,
+        bitrate=args.bitrate,
+        seconds=args.seconds,
+        backends=args.backends,
+        output=args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+推流离线基准测试工具
+用合成帧或录制视频代替摄像头驱动 PushStreamer / FFmpegPushStreamer，输出到空输出、本地文件
+或本机回环 UDP 接收端，不需要摄像头和远程服务器。
+对分辨率 × 模型 × 跟踪开关的组合测量持续帧率、各阶段延迟分位数和单帧 CPU 耗时，
+结果保存为 JSON，并可与保存的基线对比发现性能回退
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import psutil
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.offline_capture import FrameLoopCapture, load_video_frames, synthetic_frames  # noqa: E402
+from service.onnx_engine import ONNX_ENGINE, TORCH_ENGINE  # noqa: E402
+from service.push_streamer import PushStreamer  # noqa: E402
+from service.push_streamer_ffmpeg import FFmpegPushStreamer  # noqa: E402
+
+GSTREAMER_STREAMER = "gstreamer"
+FFMPEG_STREAMER = "ffmpeg"
+STREAMERS = (GSTREAMER_STREAMER, FFMPEG_STREAMER)
+
+SINK_NULL = "null"  # 不编码，丢弃输出帧（只测采集、推理、绘制）
+SINK_FILE = "file"  # 推流器自己的编码器，输出到本地文件
+SINK_UDP = "udp"  # 推流器完整的 RTP 输出，发送到本机回环接收端
+SINKS = (SINK_NULL, SINK_FILE, SINK_UDP)
+
+LOOPBACK_HOST = "127.0.0.1"
+DEFAULT_MODEL = "runs/train/person_detection/weights/best.pt"
+DEFAULT_OUTPUT = "runs/benchmark/streaming.json"
+DEFAULT_TOLERANCE = 0.1
+MIN_LATENCY_DELTA_MS = 1.0  # 低于该值的延迟变化视为测量噪声
+SOURCE_FRAMES = 60  # 帧源循环的帧数（1080p 约 370MB 内存）
+
+
+class NullSink:
+    """空输出：接受并丢弃帧，接口与 cv2.VideoWriter 兼容"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def isOpened(self) -> bool:
+        return True
+
+    def write(self, frame) -> bool:
+        self.frames += 1
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+class LoopbackReceiver:
+    """本机回环 UDP 接收端：统计收到的 RTP 包数和字节数"""
+
+    def __init__(self, host: str = LOOPBACK_HOST):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))  # 由系统分配空闲端口
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.packets = 0
+        self.bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loopback-receiver", daemon=True)
+
+    def start(self) -> "LoopbackReceiver":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.packets += 1
+            self.bytes += len(data)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self.sock.close()
+
+
+class BenchPushStreamer(PushStreamer):
+    """PushStreamer 的测试版本：帧来自离线帧源，输出到指定的测试输出"""
+
+    def __init__(self, source: FrameLoopCapture, sink: str, output_path: Path, **kwargs):
+        self.source = source
+        self.sink = sink
+        super().__init__(**kwargs)
+        if sink == SINK_FILE:
+            # 与编码器基准测试相同：保留编码部分，rtph264pay/udpsink 替换为 filesink
+            self.gst_pipelines = [
+                (pipeline.rsplit("rtph264pay", 1)[0] + f"filesink location={output_path}", name)
+                for pipeline, name in self.gst_pipelines
+            ]
+
+    def _init_camera(self, camera_id: int = 0) -> bool:
+        self.cap = self.source
+        return True
+
+    def _init_video_writer(self) -> bool:
+        if self.sink == SINK_NULL:
+            self.out = NullSink()
+            self.use_gstreamer = True
+            return True
+        return super()._init_video_writer()
+
+
+class BenchFFmpegStreamer(FFmpegPushStreamer):
+    """FFmpegPushStreamer 的测试版本：帧来自离线帧源，输出到指定的测试输出"""
+
+    def __init__(self, source: FrameLoopCapture, sink: str, output_path: Path, **kwargs):
+        self.source = source
+        self.sink = sink
+        self.output_path = output_path
+        super().__init__(**kwargs)
+
+    def _init_camera(self) -> bool:
+        self.cap = self.source
+        return True
+
+    def _init_ffmpeg(self) -> bool:
+        if self.sink == SINK_NULL:
+            return True
+        return super()._init_ffmpeg()
+
+    def _build_ffmpeg_cmd(self, bitrate: int, output_size=None) -> List[str]:
+        cmd = super()._build_ffmpeg_cmd(bitrate, output_size)
+        if self.sink == SINK_FILE:
+            # 保留编码参数，RTP 输出替换为 H.264 裸流文件
+            cmd = cmd[:cmd.index('rtp') - 1] + ['-f', 'h264', '-y', str(self.output_path)]
+        return cmd
+
+    def _write_to_ffmpeg(self, frame) -> bool:
+        if self.sink == SINK_NULL:
+            return True
+        return super()._write_to_ffmpeg(frame)
+
+
+def process_cpu_seconds() -> float:
+    """本进程及所有子进程（FFmpeg）的 CPU 耗时（用户态 + 内核态）"""
+    process = psutil.Process()
+    total = sum(process.cpu_times()[:2])
+    for child in process.children(recursive=True):
+        try:
+            total += sum(child.cpu_times()[:2])
+        except psutil.Error:
+            pass
+    return total
+
+
+def case_key(streamer: str, resolution: str, model_path: str, tracking: bool, sink: str) -> str:
+    return f"{streamer}|{resolution}|{Path(model_path).name}|track={'on' if tracking else 'off'}|{sink}"
+
+
+def run_case(
+    streamer_type: str,
+    frames: List,
+    model_path: str,
+    tracking: bool,
+    sink: str,
+    num_frames: int,
+    warmup: int,
+    fps: int,
+    bitrate: int,
+    device: str,
+    output_dir: Path,
+) -> Dict:
+    """
+    用一组参数运行一次推流并收集结果
+
+    计时窗口从预热结束后的第一帧开始，到帧源输出完毕为止；各阶段延迟直方图在窗口开始时清空。
+    """
+    height, width = frames[0].shape[:2]
+    resolution = f"{width}x{height}"
+    key = case_key(streamer_type, resolution, model_path, tracking, sink)
+    result = {
+        "key": key,
+        "streamer": streamer_type,
+        "resolution": resolution,
+        "model": Path(model_path).name,
+        "tracking": tracking,
+        "sink": sink,
+        "frames": num_frames,
+        "error": None,
+    }
+
+    receiver = LoopbackReceiver().start() if sink == SINK_UDP else None
+    window = {}
+    streamer = None
+
+    def on_window_start():
+        streamer.metrics.reset()
+        window["cpu_start"] = process_cpu_seconds()
+        window["bytes_start"] = receiver.bytes if receiver is not None else 0
+
+    def on_window_end():
+        window["cpu_end"] = process_cpu_seconds()
+        window["bytes_end"] = receiver.bytes if receiver is not None else 0
+
+    source = FrameLoopCapture(frames, num_frames, warmup, on_window_start, on_window_end)
+    output_path = output_dir / f"{key.replace('|', '_').replace('=', '-')}.h264"
+    common = dict(
+        model_path=model_path,
+        host=LOOPBACK_HOST,
+        port=receiver.port if receiver is not None else 5004,
+        video_width=width,
+        video_height=height,
+        fps=fps,
+        bitrate=bitrate,
+        headless=True,
+        engine=ONNX_ENGINE if model_path.endswith(".onnx") else TORCH_ENGINE,
+    )
+
+    try:
+        if streamer_type == GSTREAMER_STREAMER:
+            streamer = BenchPushStreamer(source, sink, output_path, gst_cache_path=None, **common)
+            streamer.start_streaming(device=device, show_preview=False, enable_tracking=tracking)
+            encoded = sink != SINK_NULL and streamer.use_gstreamer
+        else:
+            streamer = BenchFFmpegStreamer(source, sink, output_path, enable_tracking=tracking, **common)
+            streamer.start_streaming()
+            encoded = sink != SINK_NULL
+    finally:
+        if receiver is not None:
+            receiver.stop()
+
+    elapsed = source.elapsed
+    if elapsed is None:
+        result["error"] = f"推流在计时窗口结束前停止（{source.read_count}/{warmup + num_frames} 帧）"
+        return result
+    if sink != SINK_NULL and not encoded:
+        result["error"] = "GStreamer 不可用，输出帧未编码"
+        return result
+
+    result.update({
+        "sustained_fps": num_frames / elapsed,
+        "cpu_ms_per_frame": (window["cpu_end"] - window["cpu_start"]) / num_frames * 1000,
+        "stages": streamer.metrics.summary(),
+    })
+    if receiver is not None:
+        result["received_kbps"] = (window["bytes_end"] - window["bytes_start"]) * 8 / elapsed / 1000
+    if sink == SINK_FILE and output_path.exists():
+        result["output_bytes"] = output_path.stat().st_size
+    return result
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """
+    与基线对比，返回性能回退的描述
+
+    持续帧率下降、单帧 CPU 耗时或任一阶段 p95 延迟上升超过 tolerance 比例时视为回退；
+    基线中不存在的组合不参与对比。
+    """
+    base_results = {r["key"]: r for r in baseline.get("results", []) if r.get("error") is None}
+    regressions = []
+    for r in results:
+        base = base_results.get(r["key"])
+        if base is None or r["error"] is not None:
+            continue
+
+        if r["sustained_fps"] < base["sustained_fps"] * (1 - tolerance):
+            regressions.append(f"{r['key']}: 持续帧率 {base['sustained_fps']:.1f} -> {r['sustained_fps']:.1f}")
+        if r["cpu_ms_per_frame"] > base["cpu_ms_per_frame"] * (1 + tolerance):
+            regressions.append(
+                f"{r['key']}: 单帧 CPU {base['cpu_ms_per_frame']:.1f}ms -> {r['cpu_ms_per_frame']:.1f}ms")
+        for stage, stats in r["stages"].items():
+            base_stats = base.get("stages", {}).get(stage)
+            if base_stats is None:
+                continue
+            delta = stats["p95_ms"] - base_stats["p95_ms"]
+            if delta > MIN_LATENCY_DELTA_MS and stats["p95_ms"] > base_stats["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{r['key']}: {stage} p95 {base_stats['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+    return regressions
+
+
+def print_results(results: List[Dict]) -> None:
+    print("\n" + "=" * 100)
+    print(f"{'组合':52s}{'FPS':>8s}{'CPU/帧(ms)':>12s}{'推理p95':>10s}{'编码p95':>10s}")
+    print("-" * 100)
+    for r in results:
+        if r["error"] is not None:
+            print(f"{r['key']:52s} 失败: {r['error']}")
+            continue
+        stages = r["stages"]
+        inference = stages.get("inference", {}).get("p95_ms")
+        encode = stages.get("encode", {}).get("p95_ms")
+        print(
+            f"{r['key']:52s}{r['sustained_fps']:>8.1f}{r['cpu_ms_per_frame']:>12.1f}"
+            f"{inference if inference is not None else float('nan'):>10.1f}"
+            f"{encode if encode is not None else float('nan'):>10.1f}")
+    print("=" * 100)
+
+
+def benchmark_streaming(
+    streamers: List[str] = STREAMERS,
+    resolutions: List[str] = ("640x480",),
+    models: List[str] = (DEFAULT_MODEL,),
+    tracking: List[bool] = (False, True),
+    sinks: List[str] = (SINK_NULL,),
+    video: Optional[str] = None,
+    num_frames: int = 300,
+    warmup: int = 30,
+    fps: int = 30,
+    bitrate: int = 2000,
+    device: str = "cpu",
+    output: str = DEFAULT_OUTPUT,
+    keep_output: Optional[str] = None,
+) -> Dict:
+    """
+    运行测试矩阵并保存结果
+
+    Args:
+        streamers: 要测试的推流器（gstreamer: PushStreamer，ffmpeg: FFmpegPushStreamer）
+        resolutions: 分辨率列表，如 640x480
+        models: 模型路径列表（.onnx 使用 ONNX Runtime 后端）
+        tracking: 跟踪开关的取值
+        sinks: 输出方式（null / file / udp）
+        video: 录制视频路径，None 时使用合成帧
+        num_frames: 每个组合计时的帧数
+        warmup: 每个组合计时前的预热帧数
+        fps: 推流帧率（编码器参数）
+        bitrate: 码率 (kbps)
+        device: PushStreamer 的推理设备（FFmpegPushStreamer 固定使用 CPU）
+        output: 结果 JSON 路径
+        keep_output: file 输出的保存目录，None 时写入临时目录并在测试后删除
+
+    Returns:
+        测试结果
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(keep_output or tmp_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for resolution in resolutions:
+            width, height = (int(v) for v in resolution.lower().split("x"))
+            if video is not None:
+                frames = load_video_frames(video, width, height, limit=SOURCE_FRAMES)
+            else:
+                frames = synthetic_frames(width, height, count=min(num_frames + warmup, SOURCE_FRAMES))
+
+            for streamer_type, model_path, track, sink in itertools.product(streamers, models, tracking, sinks):
+                key = case_key(streamer_type, resolution, model_path, track, sink)
+                print(f"\n▶ {key}")
+                results.append(run_case(
+                    streamer_type, frames, model_path, track, sink, num_frames, warmup, fps, bitrate, device,
+                    output_dir))
+
+    report = {
+        "host": socket.gethostname(),
+        "created": datetime.now().isoformat(),
+        "config": {
+            "source": video or "synthetic",
+            "frames": num_frames,
+            "warmup": warmup,
+            "fps": fps,
+            "bitrate": bitrate,
+            "device": device,
+        },
+        "results": results,
+    }
+
+    output_path = Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_results(results)
+    print(f"\n✅ 结果已保存: {output_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="推流离线基准测试（合成帧/录制视频 + 空输出/文件/本机 UDP）",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--streamers", nargs="+", choices=STREAMERS, default=list(STREAMERS), help="要测试的推流器")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480"], help="分辨率列表，如 640x480 1280x720")
+    parser.add_argument("--models", nargs="+", default=[DEFAULT_MODEL], help="模型路径列表（.pt 或 .onnx）")
+    parser.add_argument("--tracking", nargs="+", choices=["off", "on"], default=["off", "on"], help="跟踪开关")
+    parser.add_argument("--sinks", nargs="+", choices=SINKS, default=[SINK_NULL],
+                        help="输出方式: null 不编码, file 编码到本地文件, udp 推流到本机回环接收端")
+    parser.add_argument("--video", type=str, default=None, help="录制视频路径（不指定时使用合成帧）")
+    parser.add_argument("--frames", type=int, default=300, help="每个组合计时的帧数")
+    parser.add_argument("--warmup", type=int, default=30, help="每个组合计时前的预热帧数")
+    parser.add_argument("--fps", type=int, default=30, help="推流帧率")
+    parser.add_argument("--bitrate", type=int, default=2000, help="码率 (kbps)")
+    parser.add_argument("--device", type=str, default="cpu", help="PushStreamer 的推理设备")
+    parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    parser.add_argument("--keep-output", type=str, default=None, help="保存 file 输出的目录")
+    parser.add_argument("--baseline", type=str, default=None, help="基线结果 JSON，对比后有回退时返回非零退出码")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的性能波动比例")
+
+    args = parser.parse_args()
+
+    report = benchmark_streaming(
+        streamers=args.streamers,
+        resolutions=args.resolutions,
+        models=args.models,
+        tracking=[value == "on" for value in args.tracking],
+        sinks=args.sinks,
+        video=args.video,
+        num_frames=args.frames,
+        warmup=args.warmup,
+        fps=args.fps,
+        bitrate=args.bitrate,
+        device=args.device,
+        output=args.output,
+        keep_output=args.keep_output,
+    )
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(report["results"], baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ 与基线相比发现 {len(regressions)} 项性能回退（容差 {args.tolerance:.0%}）:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+
+    print(f"\n✅ 与基线相比没有性能回退（容差 {args.tolerance:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
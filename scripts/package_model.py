@@ -5,7 +5,9 @@ YOLO 模型跨平台迁移工具
 
 import argparse
 import json
+import os
 import shutil
+import subprocess
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -13,20 +15,57 @@ from pathlib import Path
 import torch
 from ultralytics import YOLO
 
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.model_artifact import load_model_metadata, metadata_path, save_inference_artifact  # noqa: E402
+
+# 在独立进程中测量冷启动：导入 ultralytics、加载模型、第一次推理
+COLD_START_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import numpy as np
+from ultralytics import YOLO
+imported = time.perf_counter()
+model = YOLO(sys.argv[1])
+loaded = time.perf_counter()
+model.predict(np.zeros((480, 640, 3), dtype=np.uint8), device='cpu', verbose=False)
+first = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "load_s": loaded - imported, "first_predict_s": first - loaded}))
+"""
+
 
 def get_model_info(model_path: str):
-    """获取模型详细信息"""
+    """获取模型详细信息（只加载一次检查点；推理模型直接读取元数据）"""
     try:
-        model = YOLO(model_path)
-        checkpoint = torch.load(model_path, map_location='cpu')
+        metadata = load_model_metadata(model_path)
+        if metadata is not None:
+            return {
+                "model_path": str(model_path),
+                "model_name": Path(model_path).name,
+                "model_size_mb": Path(model_path).stat().st_size / (1024 * 1024),
+                "model_type": "YOLO11 (inference)",
+                "classes": metadata["names"],
+                "num_classes": metadata["nc"],
+                "imgsz": metadata["imgsz"],
+                "precision": metadata["precision"],
+                "pytorch_version": metadata["versions"]["torch"],
+                "ultralytics_version": metadata["versions"]["ultralytics"],
+                "epochs_trained": metadata["epoch"],
+            }
+
+        checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+        model = checkpoint.get('ema') or checkpoint['model']
+        names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+        train_args = checkpoint.get('train_args') or {}
 
         info = {
             "model_path": str(model_path),
             "model_name": Path(model_path).name,
             "model_size_mb": Path(model_path).stat().st_size / (1024 * 1024),
-            "model_type": model.model_name if hasattr(model, 'model_name') else "YOLO11",
-            "classes": model.names,
-            "num_classes": len(model.names),
+            "model_type": Path(train_args['model']).stem if train_args.get('model') else "YOLO11",
+            "classes": names,
+            "num_classes": len(names),
             "pytorch_version": checkpoint.get('pytorch_version', 'unknown'),
             "ultralytics_version": checkpoint.get('version', 'unknown'),
             "training_date": checkpoint.get('date', 'unknown'),
@@ -53,11 +92,71 @@ def validate_model(model_path: str):
         return False
 
 
+def measure_cold_start(model_path: str):
+    """在新的 Python 进程中测量模型冷启动耗时（秒）"""
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_START_SNIPPET, str(model_path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except Exception as e:
+        print(f"❌ 冷启动测量失败: {e}")
+        return None
+
+
+def export_inference_model(model_path: str, output_path: str = None, half: bool = True):
+    """
+    生成推理模型（预融合、去掉训练状态）和元数据文件，并对比冷启动耗时
+
+    Args:
+        model_path: 训练检查点 (best.pt)
+        output_path: 输出路径，默认为 <stem>.infer.pt
+        half: 是否以 FP16 存储权重
+
+    Returns:
+        推理模型路径，失败时返回 None
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        print(f"❌ 模型文件不存在: {model_path}")
+        return None
+
+    print(f"生成推理模型: {model_path}")
+    try:
+        artifact_path = save_inference_artifact(model_path, output_path, half=half)
+    except Exception as e:
+        print(f"❌ 推理模型生成失败: {e}")
+        return None
+
+    source_mb = model_path.stat().st_size / (1024 * 1024)
+    artifact_mb = artifact_path.stat().st_size / (1024 * 1024)
+    print(f"   ✅ {artifact_path} ({artifact_mb:.2f} MB，原检查点 {source_mb:.2f} MB)")
+    print(f"   ✅ {metadata_path(artifact_path)}")
+
+    print("\n⏱  冷启动对比（新进程: 导入 + 加载 + 首次推理）...")
+    before = measure_cold_start(str(model_path))
+    after = measure_cold_start(str(artifact_path))
+    if before and after:
+        print(f"   {'':16s}{'导入(s)':>10s}{'加载(s)':>10s}{'首次推理(s)':>14s}")
+        for name, timing in ((model_path.name, before), (artifact_path.name, after)):
+            print(f"   {name:16s}{timing['import_s']:>10.2f}{timing['load_s']:>10.2f}"
+                  f"{timing['first_predict_s']:>14.2f}")
+        saved = (before['load_s'] + before['first_predict_s']) - (after['load_s'] + after['first_predict_s'])
+        print(f"   加载 + 首次推理节省: {saved:.2f}s")
+
+    return artifact_path
+
+
 def package_model(
     model_path: str,
     output_dir: str = None,
     include_training_results: bool = True,
-    include_dataset_config: bool = True
+    include_dataset_config: bool = True,
+    include_inference_model: bool = False,
+    half: bool = True
 ):
     """
     打包模型及相关文件
@@ -67,6 +166,8 @@ def package_model(
         output_dir: 输出目录
         include_training_results: 是否包含训练结果图表
         include_dataset_config: 是否包含数据集配置
+        include_inference_model: 是否同时生成推理模型（预融合、去掉训练状态）
+        half: 推理模型是否以 FP16 存储权重
     """
     model_path = Path(model_path)
 
@@ -95,6 +196,11 @@ def package_model(
     shutil.copy2(model_path, model_dest)
     print(f"   ✅ {model_path.name}")
 
+    if include_inference_model:
+        artifact_path = save_inference_artifact(
+            model_path, output_path / (model_path.stem + ".infer.pt"), half=half)
+        print(f"   ✅ {artifact_path.name} + {metadata_path(artifact_path).name}（推理模型）")
+
     # 2. 获取并保存模型信息
     print("\n2️⃣  保存模型信息...")
     model_info = get_model_info(str(model_path))
@@ -330,10 +436,30 @@ def main():
         action="store_true",
         help="仅验证模型，不打包"
     )
+    parser.add_argument(
+        "--inference-model",
+        action="store_true",
+        help="生成推理模型（预融合 Conv+BN、去掉优化器等训练状态，附带元数据 JSON）"
+    )
+    parser.add_argument(
+        "--inference-only",
+        action="store_true",
+        help="仅生成推理模型并对比冷启动耗时，不打包"
+    )
+    parser.add_argument(
+        "--fp32",
+        action="store_true",
+        help="推理模型以 FP32 存储权重（默认 FP16）"
+    )
 
     args = parser.parse_args()
 
-    if args.validate_only:
+    if args.inference_only:
+        if export_inference_model(args.model, half=not args.fp32):
+            sys.exit(0)
+        else:
+            sys.exit(1)
+    elif args.validate_only:
         # 仅验证
         if validate_model(args.model):
             info = get_model_info(args.model)
@@ -350,7 +476,9 @@ def main():
             model_path=args.model,
             output_dir=args.output,
             include_training_results=not args.no_training_results,
-            include_dataset_config=not args.no_dataset_config
+            include_dataset_config=not args.no_dataset_config,
+            include_inference_model=args.inference_model,
+            half=not args.fp32
         )
 
         if result:
@@ -0,0 +1,408 @@
+"""
+YOLO 模型 INT8 训练后量化工具
+导出 FP32 ONNX，使用数据集验证集的样本做静态 INT8 量化校准，
+并在同一验证子集上对比 FP32 / INT8 的 mAP 和 CPU 推理延迟
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.onnx_engine import OnnxDetector  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def load_val_images(data_yaml: str) -> List[Path]:
+    """
+    读取数据集配置中 val 指向的图片列表（txt 列表或图片目录）
+
+    Returns:
+        图片的绝对路径列表
+    """
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+
+    root = Path(data.get("path", Path(data_yaml).parent))
+    val_entries = data["val"] if isinstance(data["val"], list) else [data["val"]]
+
+    images = []
+    for entry in val_entries:
+        val_path = Path(entry) if Path(entry).is_absolute() else root / entry
+        if val_path.is_dir():
+            images += sorted(p for p in val_path.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+            continue
+
+        for line in val_path.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("./"):
+                image = val_path.parent / line[2:]  # 与 ultralytics 一致：相对于列表文件所在目录
+            elif Path(line).is_absolute():
+                image = Path(line)
+            else:
+                image = root / line
+            images.append(image.resolve())
+
+    return images
+
+
+def write_subset_yaml(data_yaml: str, images: List[Path], output_dir: Path) -> Path:
+    """生成只包含验证子集的数据集配置，FP32 和 INT8 在同一子集上评估"""
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+
+    subset_list = output_dir / "val_subset.txt"
+    subset_list.write_text("\n".join(str(p) for p in images) + "\n", encoding='utf-8')
+
+    data["val"] = str(subset_list.resolve())
+    data["train"] = data["val"]  # ultralytics 校验配置时要求 train 存在
+    data.pop("test", None)
+
+    subset_yaml = output_dir / "val_subset.yaml"
+    with open(subset_yaml, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return subset_yaml
+
+
+class YoloCalibrationReader:
+    """为 onnxruntime 静态量化提供校准数据
+
+    预处理与推流时使用的 OnnxDetector 完全一致（letterbox + RGB + 归一化），
+    保证校准得到的激活值范围与实际推理时一致。
+    """
+
+    def __init__(self, detector: OnnxDetector, images: List[Path]):
+        self.detector = detector
+        self.images = images
+        self._index = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        while self._index < len(self.images):
+            image = cv2.imread(str(self.images[self._index]))
+            self._index += 1
+            if image is None:
+                continue
+            blob, _, _ = self.detector.preprocess(image, self.detector.imgsz)
+            return {self.detector.input_name: blob}
+        return None
+
+    def rewind(self) -> None:
+        self._index = 0
+
+
+def head_nodes_to_exclude(onnx_path: Path, head_index: int) -> List[str]:
+    """
+    检测头中除卷积以外的节点（DFL、解码、拼接等）保持 FP32
+
+    这些节点直接输出框坐标和类别分数，量化误差会直接体现在 mAP 上，
+    而它们的计算量在整个网络中占比很小。
+    """
+    import onnx
+
+    prefix = f"/model.{head_index}/"
+    model = onnx.load(str(onnx_path), load_external_data=False)
+    return [node.name for node in model.graph.node if node.name.startswith(prefix) and node.op_type != "Conv"]
+
+
+def quantize_onnx(
+    fp32_path: Path,
+    int8_path: Path,
+    calibration_images: List[Path],
+    head_index: Optional[int],
+    per_channel: bool = True,
+) -> None:
+    """
+    静态 INT8 量化（QDQ 格式，权重按通道 INT8，激活 UINT8）
+
+    Args:
+        fp32_path: FP32 ONNX 模型
+        int8_path: 输出的 INT8 ONNX 模型
+        calibration_images: 校准图片
+        head_index: 检测头在模型中的层号，不为 None 时检测头的后处理节点不量化
+        per_channel: 是否按通道量化权重
+    """
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # 量化前先做形状推断和图优化，校准更稳定
+    prep_path = fp32_path.with_name(f"{fp32_path.stem}.prep.onnx")
+    quant_pre_process(str(fp32_path), str(prep_path))
+
+    nodes_to_exclude = head_nodes_to_exclude(prep_path, head_index) if head_index is not None else []
+    reader = YoloCalibrationReader(OnnxDetector(str(fp32_path)), calibration_images)
+
+    quantize_static(
+        str(prep_path),
+        str(int8_path),
+        calibration_data_reader=reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=per_channel,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=nodes_to_exclude,
+    )
+    prep_path.unlink(missing_ok=True)
+
+    # 保留导出时写入的元数据（names、imgsz、stride），OnnxDetector 和 ultralytics 都依赖它们
+    fp32_model = onnx.load(str(fp32_path), load_external_data=False)
+    int8_model = onnx.load(str(int8_path))
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, str(int8_path))
+
+
+def evaluate_map(model_path: Path, subset_yaml: Path, imgsz: int) -> Dict[str, float]:
+    """在验证子集上计算 mAP（CPU）"""
+    results = YOLO(str(model_path), task="detect").val(
+        data=str(subset_yaml),
+        imgsz=imgsz,
+        batch=1,
+        device="cpu",
+        plots=False,
+        verbose=False,
+    )
+    return {"map50": float(results.box.map50), "map50_95": float(results.box.map)}
+
+
+def measure_latency(model_path: Path, images: List[Path], warmup: int = 10, threads: Optional[int] = None) -> Dict:
+    """
+    测量端到端 CPU 推理延迟（预处理 + 推理 + NMS），与推流时的 ONNX 后端一致
+
+    Returns:
+        每张图片延迟的中位数和 P90（毫秒）
+    """
+    detector = OnnxDetector(str(model_path), num_threads=threads)
+    frames = [frame for frame in (cv2.imread(str(p)) for p in images) if frame is not None]
+    if not frames:
+        raise ValueError("没有可用于测速的图片")
+
+    for frame in frames[:warmup]:
+        detector.predict(frame)
+
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        detector.predict(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "median_ms": float(np.median(latencies)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "images": len(frames),
+    }
+
+
+def quantize_model(
+    model_path: str,
+    data_yaml: str = "configs/dataset.yaml",
+    output_dir: Optional[str] = None,
+    imgsz: int = 640,
+    calib_size: int = 300,
+    eval_size: int = 500,
+    quantize_head: bool = False,
+    threads: Optional[int] = None,
+    seed: int = 0,
+):
+    """
+    导出 FP32 ONNX、静态量化为 INT8，并对比两者的 mAP 和 CPU 延迟
+
+    Args:
+        model_path: 训练好的模型 (best.pt)
+        data_yaml: 数据集配置，从其 val 列表中抽样
+        output_dir: 输出目录，默认与模型同目录
+        imgsz: 导出和评估的输入尺寸
+        calib_size: 校准图片数量
+        eval_size: 评估图片数量（与校准图片不重叠）
+        quantize_head: 是否连检测头的后处理节点一起量化
+        threads: ONNX Runtime 测速时的线程数
+        seed: 抽样随机种子
+
+    Returns:
+        对比报告（dict），失败时返回 None
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        print(f"❌ 模型文件不存在: {model_path}")
+        return None
+    if not Path(data_yaml).exists():
+        print(f"❌ 数据集配置不存在: {data_yaml}")
+        return None
+
+    output_path = Path(output_dir) if output_dir else model_path.parent
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # 1. 从验证集抽样：校准集和评估集互不重叠
+    print("\n1️⃣  抽样验证集...")
+    images = load_val_images(data_yaml)
+    if not images:
+        print(f"❌ 验证集为空: {data_yaml}")
+        return None
+    if len(images) < 2:
+        print(f"❌ 验证集只有 {len(images)} 张图片，无法划分互不重叠的校准集和评估集")
+        return None
+    if len(images) <= calib_size:
+        # 校准集占满验证集时没有剩余图片用于评估，缩小校准集，保证评估与校准互不重叠
+        reduced = len(images) // 2
+        print(f"⚠️  验证集只有 {len(images)} 张图片（校准需要 {calib_size} 张），"
+              f"校准集缩小为 {reduced} 张，其余用于评估")
+        calib_size = reduced
+    random.Random(seed).shuffle(images)
+    calibration_images = images[:calib_size]
+    eval_images = images[calib_size:calib_size + eval_size]
+    subset_yaml = write_subset_yaml(data_yaml, eval_images, output_path)
+    print(f"   ✅ 校准: {len(calibration_images)} 张 | 评估: {len(eval_images)} 张")
+
+    # 2. 导出 FP32 ONNX（静态输入尺寸，量化和推理都更快）
+    print("\n2️⃣  导出 FP32 ONNX...")
+    model = YOLO(str(model_path))
+    head_index = len(model.model.model) - 1
+    exported = Path(model.export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True))
+    fp32_path = output_path / f"{model_path.stem}.fp32.onnx"
+    exported.replace(fp32_path)
+    print(f"   ✅ {fp32_path}")
+
+    # 3. 静态 INT8 量化
+    print("\n3️⃣  INT8 静态量化校准...")
+    int8_path = output_path / f"{model_path.stem}.int8.onnx"
+    quantize_onnx(fp32_path, int8_path, calibration_images, None if quantize_head else head_index)
+    print(f"   ✅ {int8_path}")
+
+    # 4. 在同一验证子集上对比精度和延迟
+    print("\n4️⃣  评估 mAP...")
+    fp32_map = evaluate_map(fp32_path, subset_yaml, imgsz)
+    int8_map = evaluate_map(int8_path, subset_yaml, imgsz)
+
+    print("\n5️⃣  测量 CPU 延迟...")
+    fp32_latency = measure_latency(fp32_path, eval_images, threads=threads)
+    int8_latency = measure_latency(int8_path, eval_images, threads=threads)
+
+    report = {
+        "model": str(model_path),
+        "imgsz": imgsz,
+        "calibration_images": len(calibration_images),
+        "eval_images": len(eval_images),
+        "fp32": {"path": str(fp32_path), **fp32_map, **fp32_latency,
+                 "size_mb": fp32_path.stat().st_size / (1024 * 1024)},
+        "int8": {"path": str(int8_path), **int8_map, **int8_latency,
+                 "size_mb": int8_path.stat().st_size / (1024 * 1024)},
+        "delta": {
+            "map50": int8_map["map50"] - fp32_map["map50"],
+            "map50_95": int8_map["map50_95"] - fp32_map["map50_95"],
+            "median_ms": int8_latency["median_ms"] - fp32_latency["median_ms"],
+            "speedup": fp32_latency["median_ms"] / max(int8_latency["median_ms"], 1e-6),
+        },
+    }
+
+    report_path = output_path / "quantization_report.json"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 60)
+    print("✅ 量化完成!")
+    print("=" * 60)
+    print(f"{'':10s}{'mAP50':>10s}{'mAP50-95':>12s}{'延迟(ms)':>12s}{'大小(MB)':>12s}")
+    for name in ("fp32", "int8"):
+        row = report[name]
+        print(f"{name:10s}{row['map50']:>10.4f}{row['map50_95']:>12.4f}"
+              f"{row['median_ms']:>12.1f}{row['size_mb']:>12.2f}")
+    delta = report["delta"]
+    print(f"{'差值':10s}{delta['map50']:>+10.4f}{delta['map50_95']:>+12.4f}{delta['median_ms']:>+12.1f}")
+    print(f"\n⚡ 加速比: {delta['speedup']:.2f}x")
+    print(f"📄 报告: {report_path}")
+    print(f"\n💡 推流使用: FFmpegPushStreamer(model_path=\"{int8_path}\", engine=\"onnx\")")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="YOLO 模型 INT8 训练后量化工具"
+    )
+    parser.add_argument(
+        "model",
+        type=str,
+        help="模型文件路径 (例如: runs/train/person_detection/weights/best.pt)"
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="configs/dataset.yaml",
+        help="数据集配置，从 val 列表中抽取校准和评估图片 (默认: configs/dataset.yaml)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="输出目录 (默认: 模型所在目录)"
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=640,
+        help="输入尺寸 (默认: 640)"
+    )
+    parser.add_argument(
+        "--calib-size",
+        type=int,
+        default=300,
+        help="校准图片数量 (默认: 300)"
+    )
+    parser.add_argument(
+        "--eval-size",
+        type=int,
+        default=500,
+        help="评估图片数量，与校准图片不重叠 (默认: 500)"
+    )
+    parser.add_argument(
+        "--quantize-head",
+        action="store_true",
+        help="检测头的后处理节点也量化（默认保持 FP32，精度损失更小）"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="测速时 ONNX Runtime 的线程数 (默认: 自动)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="抽样随机种子 (默认: 0)"
+    )
+
+    args = parser.parse_args()
+
+    report = quantize_model(
+        model_path=args.model,
+        data_yaml=args.data,
+        output_dir=args.output,
+        imgsz=args.imgsz,
+        calib_size=args.calib_size,
+        eval_size=args.eval_size,
+        quantize_head=args.quantize_head,
+        threads=args.threads,
+        seed=args.seed,
+    )
+    sys.exit(0 if report else 1)
+
+
+if __name__ == "__main__":
+    main()
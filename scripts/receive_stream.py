@@ -3,9 +3,177 @@ GStreamer 接收端脚本
 用于接收来自 PushStreamer 的视频流
 """
 
+import json
+import socket
+import struct
 import subprocess
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Optional, Set
+
+
+class RtpFeedbackRelay:
+    """RTP 网络质量统计与反馈中继
+
+    监听推流端口，统计 RTP 丢包率和到达抖动（RFC 3550），
+    将数据包原样转发到本地播放端口，并定期把统计报告以 JSON 通过 UDP
+    回传给推流端（FFmpegPushStreamer 的 adaptive_bitrate 模式）。
+    码率切换时只转发最新编码器（SSRC）的数据包，已被取代的旧编码器的数据包直接丢弃。
+
+    推流端 -> [listen_port] 中继 -> [forward_port] 播放器
+                              └─> 反馈报告 -> 推流端:feedback_port
+    """
+
+    RTP_CLOCK_RATE = 90000  # H.264 RTP 时钟频率
+
+    def __init__(
+        self,
+        listen_port: int = 5004,
+        forward_port: int = 5014,
+        feedback_port: int = 5006,
+        report_interval: float = 1.0,
+        sender_host: Optional[str] = None,
+    ):
+        """
+        Args:
+            listen_port: 接收 RTP 的端口
+            forward_port: 转发给本地播放器的端口
+            feedback_port: 推流端接收反馈报告的端口
+            report_interval: 报告间隔（秒）
+            sender_host: 推流端地址，默认使用 RTP 数据包的来源地址
+        """
+        self.listen_port = listen_port
+        self.forward_port = forward_port
+        self.feedback_port = feedback_port
+        self.report_interval = report_interval
+        self.sender_host = sender_host
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retired_ssrcs: Set[int] = set()  # 已被更新的 SSRC 取代的旧编码器
+        self._reset_stats(ssrc=None)
+
+    def _reset_stats(self, ssrc: Optional[int]) -> None:
+        self._ssrc = ssrc
+        self._base_seq: Optional[int] = None
+        self._max_ext_seq = 0
+        self._cycles = 0
+        self._jitter = 0.0  # RTP 时钟单位
+        self._last_transit: Optional[float] = None
+        self._interval_received = 0
+        self._interval_bytes = 0
+        self._interval_start_ext_seq: Optional[int] = None
+
+    def start(self) -> "RtpFeedbackRelay":
+        self._thread = threading.Thread(target=self._relay_loop, name="rtp-feedback-relay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _update_sequence(self, seq: int) -> int:
+        """处理 16 位序号回绕，返回扩展序号"""
+        if self._base_seq is None:
+            self._base_seq = seq
+            self._max_ext_seq = seq
+            return seq
+
+        max_seq = self._max_ext_seq & 0xFFFF
+        delta = (seq - max_seq) & 0xFFFF
+        if delta < 0x8000:  # 正常前进（含回绕）
+            if seq < max_seq:
+                self._cycles += 0x10000
+            ext_seq = self._cycles + seq
+            self._max_ext_seq = max(self._max_ext_seq, ext_seq)
+        else:  # 乱序到达的旧包
+            ext_seq = self._cycles + seq - (0x10000 if seq > max_seq else 0)
+        return ext_seq
+
+    def _record_packet(self, seq: int, rtp_ts: int, size: int) -> None:
+        """把当前 SSRC 的一个数据包计入本周期的统计"""
+        ext_seq = self._update_sequence(seq)
+        if self._interval_start_ext_seq is None:
+            self._interval_start_ext_seq = ext_seq
+        self._interval_received += 1
+        self._interval_bytes += size
+
+        # 到达抖动（RFC 3550 6.4.1）
+        transit = time.monotonic() * self.RTP_CLOCK_RATE - rtp_ts
+        if self._last_transit is not None:
+            d = abs(transit - self._last_transit)
+            self._jitter += (d - self._jitter) / 16
+        self._last_transit = transit
+
+    def _relay_loop(self) -> None:
+        recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        recv_sock.bind(("0.0.0.0", self.listen_port))
+        recv_sock.settimeout(0.5)
+        send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        sender_host = self.sender_host
+        next_report = time.monotonic() + self.report_interval
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    packet, addr = recv_sock.recvfrom(65536)
+                except socket.timeout:
+                    packet = None
+
+                if packet is not None and len(packet) >= 12:
+                    sender_host = sender_host or addr[0]
+
+                    seq, rtp_ts, ssrc = struct.unpack("!HII", packet[2:12])
+                    if ssrc != self._ssrc and ssrc not in self._retired_ssrcs:
+                        # 推流端重启编码器（码率切换）后 SSRC 会变化，旧 SSRC 作废并重新统计；
+                        # 新编码器从关键帧开始编码，播放器可以直接从新流开始解码
+                        if self._ssrc is not None:
+                            self._retired_ssrcs.add(self._ssrc)
+                        self._reset_stats(ssrc)
+
+                    # 码率切换期间新旧编码器同时发送，旧编码器的剩余包直接丢弃：
+                    # 两路序号和时间戳互不相关，交错转发会让播放器的 rtph264depay 解码出错
+                    if ssrc == self._ssrc:
+                        send_sock.sendto(packet, ("127.0.0.1", self.forward_port))
+                        self._record_packet(seq, rtp_ts, len(packet))
+
+                now = time.monotonic()
+                if now >= next_report:
+                    if sender_host is not None and self._interval_start_ext_seq is not None:
+                        report = self._build_report(now - next_report + self.report_interval)
+                        send_sock.sendto(json.dumps(report).encode("utf-8"), (sender_host, self.feedback_port))
+                        print(
+                            f"📶 丢包: {report['loss'] * 100:.1f}% | 抖动: {report['jitter_ms']:.1f}ms | "
+                            f"接收码率: {report['bitrate_kbps']:.0f}kbps"
+                        )
+                    next_report = now + self.report_interval
+        finally:
+            recv_sock.close()
+            send_sock.close()
+
+    def _build_report(self, elapsed: float) -> dict:
+        """生成一个统计周期的报告并开始下一个周期"""
+        expected = self._max_ext_seq - self._interval_start_ext_seq + 1
+        received = self._interval_received
+        loss = max(0.0, 1.0 - received / expected) if expected > 0 else 0.0
+
+        report = {
+            "ssrc": self._ssrc,
+            "loss": loss,
+            "jitter_ms": self._jitter / self.RTP_CLOCK_RATE * 1000,
+            "received": received,
+            "expected": expected,
+            "bitrate_kbps": self._interval_bytes * 8 / 1000 / max(elapsed, 1e-6),
+        }
+
+        self._interval_received = 0
+        self._interval_bytes = 0
+        self._interval_start_ext_seq = self._max_ext_seq + 1
+        return report
 
 
 class StreamReceiver:
@@ -22,15 +190,20 @@ class StreamReceiver:
         self.port = port
         self.host = host
 
-    def receive_and_display(self) -> None:
-        """接收并显示视频流"""
-        print(f"正在监听 UDP 端口 {self.port}...")
+    def receive_and_display(self, port: Optional[int] = None) -> None:
+        """接收并显示视频流
+
+        Args:
+            port: 监听端口，默认使用初始化时的端口
+        """
+        port = port or self.port
+        print(f"正在监听 UDP 端口 {port}...")
         print("按 Ctrl+C 退出")
         print("-" * 60)
 
         pipeline = [
             "gst-launch-1.0",
-            "udpsrc", f"port={self.port}",
+            "udpsrc", f"port={port}",
             "!",
             "application/x-rtp,encoding-name=H264,payload=96",
             "!",
@@ -81,6 +254,26 @@ class StreamReceiver:
         except KeyboardInterrupt:
             print(f"\n✅ 视频已保存到: {output_file}")
 
+    def receive_with_feedback(self, feedback_port: int = 5006, forward_port: Optional[int] = None) -> None:
+        """接收并显示视频流，同时向推流端回传网络质量反馈（自适应码率）
+
+        Args:
+            feedback_port: 推流端接收反馈的端口（FFmpegPushStreamer 的 feedback_port）
+            forward_port: 转发给本地播放器的端口，默认监听端口 + 10
+        """
+        forward_port = forward_port or self.port + 10
+        relay = RtpFeedbackRelay(
+            listen_port=self.port,
+            forward_port=forward_port,
+            feedback_port=feedback_port
+        ).start()
+        print(f"反馈中继已启动: {self.port} -> 本地 {forward_port}，报告发送到推流端 :{feedback_port}")
+
+        try:
+            self.receive_and_display(port=forward_port)
+        finally:
+            relay.stop()
+
     def receive_with_vlc(self) -> None:
         """使用 VLC 接收视频流"""
         url = f"udp://@:{self.port}"
@@ -173,10 +366,11 @@ def main():
         print("2. 使用 GStreamer 接收并保存到文件")
         print("3. 使用 VLC 播放器接收")
         print("4. 使用 FFplay 接收")
+        print("5. 使用 GStreamer 接收并回传网络质量反馈（自适应码率）")
         print("0. 退出")
         print("=" * 60)
 
-        choice = input("\n请选择 (0-4): ").strip()
+        choice = input("\n请选择 (0-5): ").strip()
 
         if choice == "1":
             receiver.receive_and_display()
@@ -189,6 +383,9 @@ def main():
             receiver.receive_with_vlc()
         elif choice == "4":
             receiver.receive_with_ffplay()
+        elif choice == "5":
+            feedback_port = input("推流端反馈端口 (默认: 5006): ").strip()
+            receiver.receive_with_feedback(int(feedback_port) if feedback_port else 5006)
         elif choice == "0":
             print("退出程序")
             break
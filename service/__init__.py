@@ -1,5 +1,6 @@
 
 from .push_streamer import PushStreamer
 from .push_streamer_ffmpeg import FFmpegPushStreamer
+from .multi_streamer import MultiCameraStreamer
 
-__all__ = ["PushStreamer", "FFmpegPushStreamer"]
+__all__ = ["PushStreamer", "FFmpegPushStreamer", "MultiCameraStreamer"]
@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from service.detections import boxes_to_numpy
+from service.onnx_engine import letterbox
+
+IMAGE_SUFFIXES = {".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp"}
+
+
+def list_images(source_dir: str | Path) -> List[Path]:
+    """文件夹中的图像文件（绝对路径，不递归，按文件名排序，与 ultralytics 目录输入一致）"""
+    return sorted(
+        path for path in Path(source_dir).absolute().iterdir()
+        if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file()
+    )
+
+
+class ImageBatch:
+    """一批已解码并 letterbox 的图像
+
+    images 是加载器预分配缓冲区的视图 (N, H, W, 3) RGB uint8，只在下一次迭代之前有效。
+    """
+
+    def __init__(
+        self,
+        inputs: List[Path],
+        paths: List[Path],
+        images: np.ndarray,
+        shapes: List[Tuple[int, int]],
+        gains: List[float],
+        pads: List[Tuple[int, int]],
+        failed: List[Path],
+    ):
+        self.inputs = inputs  # 本批的全部输入（输入顺序，含无法解码的图像）
+        self.paths = paths
+        self.images = images
+        self.shapes = shapes  # 原图尺寸 (height, width)
+        self.gains = gains
+        self.pads = pads
+        self.failed = failed  # 无法解码的图像（不在 paths 中）
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
+class BatchLoader:
+    """多线程图像解码 + letterbox，按批输出
+
+    解码线程直接把 letterbox 结果写入预分配的批缓冲区（OpenCV 解码和缩放期间释放 GIL），
+    同时有 prefetch 批在后台解码，与推理重叠执行。缓冲区轮流复用，不随图像数量分配内存。
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[Path],
+        imgsz: int = 640,
+        batch_size: int = 16,
+        workers: int = 8,
+        prefetch: int = 2,
+    ):
+        """
+        Args:
+            paths: 图像路径
+            imgsz: letterbox 目标尺寸（正方形）
+            batch_size: 每批图像数
+            workers: 解码线程数
+            prefetch: 提前解码的批数
+        """
+        if batch_size < 1 or workers < 1 or prefetch < 1:
+            raise ValueError("batch_size、workers 和 prefetch 必须大于 0")
+
+        self.paths = list(paths)
+        self.imgsz = imgsz
+        self.batch_size = batch_size
+        self.workers = workers
+        self.prefetch = prefetch
+
+        # 正在使用的批 + 后台解码中的批，各占一个缓冲区
+        self._buffers = [
+            np.empty((batch_size, imgsz, imgsz, 3), dtype=np.uint8) for _ in range(prefetch + 1)
+        ]
+        self._lock = threading.Lock()
+        self.decode_seconds = 0.0  # 所有解码线程累计耗时
+        self.wait_seconds = 0.0  # 消费方等待解码完成的时间（解码是瓶颈时增大）
+        self.decoded = 0
+
+    def _load(self, path: Path, out: np.ndarray) -> Optional[Tuple[Tuple[int, int], float, Tuple[int, int]]]:
+        """解码一张图像并 letterbox 到 out（RGB），无法解码时返回 None"""
+        start = time.perf_counter()
+        image = cv2.imread(str(path))
+        if image is None:
+            return None
+        _, gain, pad = letterbox(image, (self.imgsz, self.imgsz), out=out)
+        cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.decode_seconds += elapsed
+            self.decoded += 1
+        return image.shape[:2], gain, pad
+
+    def _collect(self, paths: List[Path], futures: List[Future], buffer: np.ndarray) -> ImageBatch:
+        start = time.perf_counter()
+        loaded = [future.result() for future in futures]
+        self.wait_seconds += time.perf_counter() - start
+
+        ok = [index for index, item in enumerate(loaded) if item is not None]
+        if len(ok) < len(loaded):
+            # 把解码成功的图像移到缓冲区前部，保持批内连续
+            for target, source in enumerate(ok):
+                if target != source:
+                    buffer[target] = buffer[source]
+
+        return ImageBatch(
+            inputs=paths,
+            paths=[paths[i] for i in ok],
+            images=buffer[:len(ok)],
+            shapes=[loaded[i][0] for i in ok],
+            gains=[loaded[i][1] for i in ok],
+            pads=[loaded[i][2] for i in ok],
+            failed=[paths[i] for i, item in enumerate(loaded) if item is None],
+        )
+
+    def __iter__(self) -> Iterator[ImageBatch]:
+        starts = range(0, len(self.paths), self.batch_size)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decode") as executor:
+            def submit(batch_index: int) -> None:
+                start = starts[batch_index]
+                paths = self.paths[start:start + self.batch_size]
+                buffer = self._buffers[batch_index % len(self._buffers)]
+                futures = [executor.submit(self._load, path, buffer[i]) for i, path in enumerate(paths)]
+                pending.append((paths, futures, buffer))
+
+            next_batch = 0
+            while next_batch < min(self.prefetch, len(starts)):
+                submit(next_batch)
+                next_batch += 1
+
+            while pending:
+                paths, futures, buffer = pending.popleft()
+                batch = self._collect(paths, futures, buffer)
+                yield batch
+                # 消费方已处理完上一批，它的缓冲区可以交给下一批解码
+                if next_batch < len(starts):
+                    submit(next_batch)
+                    next_batch += 1
+
+
+class BatchDetector:
+    """整批推理：加载器输出的批直接复制到复用的输入张量，一次 model.predict 完成整批检测
+
+    检测框在 letterbox 坐标系中输出，再按每张图像的缩放比例和填充还原到原图坐标。
+    """
+
+    def __init__(self, model, imgsz: int = 640, batch_size: int = 16, device: Optional[str] = None):
+        """
+        Args:
+            model: ultralytics YOLO
+            imgsz: 输入尺寸（与 BatchLoader 一致）
+            batch_size: 最大批大小
+            device: 推理设备，None 时由 ultralytics 自动选择
+        """
+        if imgsz % 32 != 0:
+            raise ValueError(f"输入尺寸必须是 32 的倍数: {imgsz}")
+
+        self.model = model
+        self.imgsz = imgsz
+        self.device = device
+        self._tensor = torch.empty((batch_size, 3, imgsz, imgsz), dtype=torch.float32)
+        self.inference_seconds = 0.0
+
+    def predict(self, batch: ImageBatch, conf: float = 0.25, iou: float = 0.7, max_det: int = 300) -> List[np.ndarray]:
+        """
+        检测一批图像
+
+        Returns:
+            每张图像的 (N, 6) [x1, y1, x2, y2, conf, cls]，原图坐标
+        """
+        if len(batch) == 0:
+            return []
+
+        tensor = self._tensor[:len(batch)]
+        tensor.copy_(torch.from_numpy(batch.images).permute(0, 3, 1, 2))  # NHWC uint8 -> NCHW float32
+        tensor.mul_(1 / 255.0)
+
+        start = time.perf_counter()
+        results = self.model.predict(
+            tensor, conf=conf, iou=iou, imgsz=self.imgsz, max_det=max_det, device=self.device, verbose=False)
+        self.inference_seconds += time.perf_counter() - start
+
+        detections = []
+        for result, shape, gain, (pad_x, pad_y) in zip(results, batch.shapes, batch.gains, batch.pads):
+            data = boxes_to_numpy(result.boxes)[:, [0, 1, 2, 3, -2, -1]]
+            data[:, [0, 2]] = ((data[:, [0, 2]] - pad_x) / gain).clip(0, shape[1])
+            data[:, [1, 3]] = ((data[:, [1, 3]] - pad_y) / gain).clip(0, shape[0])
+            detections.append(data)
+        return detections
+
+
+def stage_rates(images: int, loader: BatchLoader, detector: BatchDetector, write_seconds: float) -> Dict[str, float]:
+    """
+    各阶段吞吐（张/秒）
+
+    decode 为所有解码线程合计的吞吐（单线程吞吐 × 线程数），inference 为纯推理吞吐，
+    write 为结果序列化和写入的吞吐。
+    """
+    def rate(seconds: float) -> float:
+        return images / seconds if seconds > 0 else 0.0
+
+    return {
+        "decode": rate(loader.decode_seconds / loader.workers),
+        "inference": rate(detector.inference_seconds),
+        "write": rate(write_seconds),
+        "decode_wait_seconds": loader.wait_seconds,
+    }
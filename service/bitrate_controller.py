@@ -0,0 +1,196 @@
+import json
+import socket
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="码率控制")
+
+
+class FeedbackListener:
+    """接收端网络质量反馈监听器
+
+    在 UDP 端口上接收 scripts/receive_stream.py 回传的 JSON 报告：
+    {"loss": 0.02, "jitter_ms": 12.5, "received": 480, "expected": 490, "bitrate_kbps": 395.0}
+    """
+
+    def __init__(self, port: int = 5006, host: str = "0.0.0.0"):
+        """
+        Args:
+            port: 监听端口
+            host: 监听地址
+        """
+        self.port = port
+        self.host = host
+        self.report_count = 0
+
+        self._report: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FeedbackListener":
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((self.host, self.port))
+        self._sock.settimeout(0.5)
+        self._thread = threading.Thread(target=self._listen_loop, name="bitrate-feedback", daemon=True)
+        self._thread.start()
+        logger.info(f"网络质量反馈监听: udp://{self.host}:{self.port}")
+        return self
+
+    def _listen_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                payload, addr = self._sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            try:
+                report = json.loads(payload.decode("utf-8"))
+                report["loss"] = float(report["loss"])
+                report["jitter_ms"] = float(report.get("jitter_ms", 0.0))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.debug(f"忽略无效的反馈报告 (来自 {addr[0]}): {e}")
+                continue
+
+            with self._lock:
+                self._report = report
+                self.report_count += 1
+
+    def pop_report(self) -> Optional[Dict]:
+        """取出最新的报告（自上次调用以来没有新报告时返回 None）"""
+        with self._lock:
+            report, self._report = self._report, None
+        return report
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._sock is not None:
+            self._sock.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+class BitrateController:
+    """自适应码率控制器（AIMD）
+
+    - 丢包率或抖动超过上限：码率乘性下降
+    - 连续若干个报告网络良好：码率加性上升
+    - 码率占最大码率的比例低于阈值时，按档位降低编码输出分辨率
+    - 只有变化足够大且距上次调整超过最小间隔时才返回新配置，避免频繁重启编码器
+    """
+
+    def __init__(
+        self,
+        initial_bitrate: int,
+        min_bitrate: int,
+        max_bitrate: int,
+        width: int,
+        height: int,
+        loss_high: float = 0.05,
+        loss_low: float = 0.01,
+        jitter_high_ms: float = 60.0,
+        decrease_factor: float = 0.7,
+        increase_step: Optional[int] = None,
+        good_reports_to_increase: int = 3,
+        min_change_ratio: float = 0.15,
+        min_interval: float = 5.0,
+        scale_levels: Sequence[Tuple[float, float]] = ((0.5, 1.0), (0.25, 0.75), (0.0, 0.5)),
+    ):
+        """
+        Args:
+            initial_bitrate: 初始码率 (kbps)
+            min_bitrate: 最低码率 (kbps)
+            max_bitrate: 最高码率 (kbps)
+            width: 原始视频宽度
+            height: 原始视频高度
+            loss_high: 丢包率超过该值时降码率
+            loss_low: 丢包率低于该值视为网络良好
+            jitter_high_ms: 抖动超过该值时降码率
+            decrease_factor: 乘性下降系数
+            increase_step: 加性上升步长 (kbps)，默认最高码率的 10%
+            good_reports_to_increase: 连续多少个良好报告后上升一次
+            min_change_ratio: 码率变化小于该比例时不重启编码器
+            min_interval: 两次调整之间的最小间隔（秒）
+            scale_levels: [(码率占最大码率比例下限, 分辨率缩放系数), ...]，从高到低
+        """
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self.width = width
+        self.height = height
+        self.loss_high = loss_high
+        self.loss_low = loss_low
+        self.jitter_high_ms = jitter_high_ms
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step or max(1, max_bitrate // 10)
+        self.good_reports_to_increase = good_reports_to_increase
+        self.min_change_ratio = min_change_ratio
+        self.min_interval = min_interval
+        self.scale_levels = scale_levels
+
+        self.target_bitrate = float(min(max(initial_bitrate, min_bitrate), max_bitrate))
+        self.current_bitrate = int(self.target_bitrate)
+        self.current_scale = self._scale_for(self.current_bitrate)
+
+        self._good_reports = 0
+        self._last_change = time.monotonic()
+
+    def _scale_for(self, bitrate: float) -> float:
+        ratio = bitrate / self.max_bitrate
+        for min_ratio, scale in self.scale_levels:
+            if ratio >= min_ratio:
+                return scale
+        return self.scale_levels[-1][1]
+
+    def output_size(self, scale: Optional[float] = None) -> Tuple[int, int]:
+        """按缩放系数计算编码输出尺寸（保持偶数）"""
+        scale = self.current_scale if scale is None else scale
+        width = max(2, int(self.width * scale) // 2 * 2)
+        height = max(2, int(self.height * scale) // 2 * 2)
+        return width, height
+
+    def on_report(self, report: Dict) -> Optional[Tuple[int, int, int]]:
+        """
+        处理一个接收端报告
+
+        Returns:
+            需要调整时返回 (码率kbps, 输出宽度, 输出高度)，否则返回 None
+        """
+        loss = report["loss"]
+        jitter_ms = report.get("jitter_ms", 0.0)
+
+        if loss > self.loss_high or jitter_ms > self.jitter_high_ms:
+            self.target_bitrate = max(self.min_bitrate, self.target_bitrate * self.decrease_factor)
+            self._good_reports = 0
+        elif loss < self.loss_low:
+            self._good_reports += 1
+            if self._good_reports >= self.good_reports_to_increase:
+                self.target_bitrate = min(self.max_bitrate, self.target_bitrate + self.increase_step)
+                self._good_reports = 0
+        else:
+            self._good_reports = 0
+
+        target = int(self.target_bitrate)
+        scale = self._scale_for(target)
+        change_ratio = abs(target - self.current_bitrate) / max(self.current_bitrate, 1)
+
+        if scale == self.current_scale and change_ratio < self.min_change_ratio:
+            return None
+        if time.monotonic() - self._last_change < self.min_interval:
+            return None
+
+        logger.info(
+            f"码率调整: {self.current_bitrate}kbps -> {target}kbps, "
+            f"分辨率 {'x'.join(map(str, self.output_size()))} -> {'x'.join(map(str, self.output_size(scale)))} "
+            f"(丢包: {loss * 100:.1f}%, 抖动: {jitter_ms:.1f}ms)"
+        )
+        self.current_bitrate = target
+        self.current_scale = scale
+        self._last_change = time.monotonic()
+        width, height = self.output_size()
+        return target, width, height
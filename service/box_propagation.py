@@ -0,0 +1,157 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from ultralytics.engine.results import Boxes
+
+from service.detections import numpy_to_boxes
+
+
+class DetectionScheduler:
+    """检测调度器：决定哪些帧运行检测器
+
+    - 固定间隔：每 interval 帧检测一次
+    - 自适应间隔：根据实测检测耗时计算间隔，使输出帧率维持在目标帧率，
+      interval ≈ 检测耗时 × 目标帧率
+    """
+
+    def __init__(
+        self,
+        interval: int = 1,
+        adaptive: bool = False,
+        target_fps: float = 30.0,
+        max_interval: int = 10,
+        smoothing: float = 0.2,
+    ):
+        """
+        Args:
+            interval: 固定检测间隔（帧），自适应模式下作为初始值
+            adaptive: 是否根据检测耗时自动调整间隔
+            target_fps: 自适应模式的目标输出帧率
+            max_interval: 自适应模式允许的最大间隔
+            smoothing: 检测耗时指数滑动平均系数
+        """
+        if interval < 1:
+            raise ValueError(f"检测间隔必须大于 0: {interval}")
+
+        self.interval = interval
+        self.adaptive = adaptive
+        self.target_fps = target_fps
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+
+        self.latency_ema: Optional[float] = None
+        self.detect_count = 0
+        self._last_detect_index: Optional[int] = None
+
+    def should_detect(self, frame_index: int) -> bool:
+        """当前帧是否需要运行检测器"""
+        if self._last_detect_index is None:
+            return True
+        return frame_index - self._last_detect_index >= self.interval
+
+    def record_detection(self, frame_index: int, latency: float) -> None:
+        """
+        记录一次检测
+
+        Args:
+            frame_index: 运行检测的帧序号
+            latency: 检测耗时（秒）
+        """
+        self._last_detect_index = frame_index
+        self.detect_count += 1
+
+        if self.latency_ema is None:
+            self.latency_ema = latency
+        else:
+            self.latency_ema = self.smoothing * latency + (1 - self.smoothing) * self.latency_ema
+
+        if self.adaptive:
+            interval = math.ceil(self.latency_ema * self.target_fps)
+            self.interval = max(1, min(self.max_interval, interval))
+
+    def skip(self, frame_index: int) -> None:
+        """
+        记录被其它条件（如运动门控）取消的检测帧：间隔从该帧重新计算，不计入检测次数和耗时
+
+        Args:
+            frame_index: 取消检测的帧序号
+        """
+        self._last_detect_index = frame_index
+
+
+class BoxPropagator:
+    """基于跟踪ID的恒速运动模型
+
+    检测帧上用 update() 记录每个跟踪目标的位置，并根据相邻两次检测的位移估计速度；
+    非检测帧上用 predict() 按速度外推检测框。没有跟踪ID的检测结果保持静止。
+    """
+
+    def __init__(self, velocity_smoothing: float = 0.5, max_extrapolation: int = 30):
+        """
+        Args:
+            velocity_smoothing: 速度估计的指数滑动平均系数（越大越相信最新测量）
+            max_extrapolation: 最多外推的帧数，超过后检测框保持在该位置
+        """
+        self.velocity_smoothing = velocity_smoothing
+        self.max_extrapolation = max_extrapolation
+
+        self._data: Optional[np.ndarray] = None  # 上一次检测结果 (N, 6|7)
+        self._velocity: Optional[np.ndarray] = None  # 每个目标的速度 (N, 4)，像素/帧
+        self._frame_index = 0
+
+    def reset(self) -> None:
+        self._data = None
+        self._velocity = None
+
+    def update(self, data: np.ndarray, frame_index: int) -> None:
+        """
+        记录检测帧的结果
+
+        Args:
+            data: boxes_to_numpy() 的输出
+            frame_index: 检测帧序号
+        """
+        data = np.asarray(data, dtype=np.float32)
+        velocity = np.zeros((len(data), 4), dtype=np.float32)
+
+        has_ids = data.ndim == 2 and data.shape[1] == 7
+        if has_ids and self._data is not None and self._data.shape[1] == 7 and len(self._data) > 0:
+            prev_rows = {int(track_id): row for row, track_id in enumerate(self._data[:, 4])}
+            dt = max(frame_index - self._frame_index, 1)
+            alpha = self.velocity_smoothing
+
+            for row, track_id in enumerate(data[:, 4]):
+                prev_row = prev_rows.get(int(track_id))
+                if prev_row is None:
+                    continue
+                measured = (data[row, :4] - self._data[prev_row, :4]) / dt
+                velocity[row] = alpha * measured + (1 - alpha) * self._velocity[prev_row]
+
+        self._data = data
+        self._velocity = velocity
+        self._frame_index = frame_index
+
+    def predict(self, frame_index: int, frame_shape: Tuple[int, ...]) -> Boxes:
+        """
+        外推指定帧的检测框
+
+        Args:
+            frame_index: 目标帧序号
+            frame_shape: 帧尺寸 (height, width, ...)
+
+        Returns:
+            与模型输出格式一致的 Boxes
+        """
+        orig_shape = frame_shape[:2]
+        if self._data is None or len(self._data) == 0:
+            return numpy_to_boxes(np.zeros((0, 6), dtype=np.float32), orig_shape)
+
+        dt = min(frame_index - self._frame_index, self.max_extrapolation)
+        data = self._data.copy()
+        data[:, :4] += self._velocity * dt
+
+        height, width = orig_shape
+        data[:, [0, 2]] = np.clip(data[:, [0, 2]], 0, width - 1)
+        data[:, [1, 3]] = np.clip(data[:, [1, 3]], 0, height - 1)
+        return numpy_to_boxes(data, orig_shape)
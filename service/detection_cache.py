@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+DEFAULT_CACHE_PATH = Path(".cache") / "detections.sqlite"
+HASH_CHUNK_SIZE = 1 << 20
+QUERY_CHUNK_SIZE = 500  # SQLite 单条语句的参数数量有限，分批查询
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (content_hash, config_hash)
+);
+"""
+
+
+def sha256_file(path: str | Path) -> str:
+    """文件内容的 SHA-256（分块读取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(path: str | Path) -> Optional[os.stat_result]:
+    """文件状态，文件已被删除时返回 None"""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _hash_or_none(path: str | Path) -> Optional[str]:
+    """文件内容哈希，文件已被删除时返回 None"""
+    try:
+        return sha256_file(path)
+    except FileNotFoundError:
+        return None
+
+
+def _chunks(items: Sequence, size: int = QUERY_CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class DetectionCache:
+    """检测结果的持久化缓存（SQLite）
+
+    结果按 (图像内容哈希, 配置哈希) 存储：图像被移动或重命名后仍能命中，
+    模型或阈值变化后自动失效。文件哈希按 (绝对路径, 大小, 修改时间) 缓存，
+    未变化的文件只需要一次 stat，不会被重新读取和哈希（与当前目录和 --source 的写法无关）。
+
+    使用 WAL 模式，多进程分片检测时每个进程各自打开连接并发写入。
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_CACHE_PATH, hash_workers: int = 4):
+        """
+        Args:
+            path: 缓存数据库路径
+            hash_workers: 计算文件哈希的线程数
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hash_workers = hash_workers
+
+        self._conn = sqlite3.connect(str(self.path), timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.hashed = 0  # 重新计算哈希的文件数
+        self.unchanged = 0  # 大小和修改时间未变、直接复用哈希的文件数
+
+    def config_hash(self, model_path: str | Path, **params) -> str:
+        """
+        模型文件内容 + 推理参数的哈希
+
+        Args:
+            model_path: 模型路径
+            **params: 影响检测结果的参数（conf、iou、imgsz 等）
+        """
+        model_hash = self.file_hashes([Path(model_path)])[0]
+        if model_hash is None:
+            raise FileNotFoundError(f"模型文件不存在: {model_path}")
+        payload = json.dumps({"model": model_hash, **params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def file_hashes(self, paths: Sequence[Path]) -> List[Optional[str]]:
+        """
+        文件内容哈希（与 paths 顺序一致），列出文件之后被删除的文件为 None
+
+        大小和修改时间与缓存记录一致时直接复用，否则并行重新计算并更新记录。
+        """
+        hashes: List[Optional[str]] = []
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            for chunk in _chunks(list(paths)):
+                stats = [_stat(path) for path in chunk]
+                present = [index for index, stat in enumerate(stats) if stat is not None]
+                chunk_hashes: List[Optional[str]] = [None] * len(chunk)
+                chunk = [chunk[index] for index in present]
+                stats = [stats[index] for index in present]
+                keys = [str(Path(path).resolve()) for path in chunk]
+                placeholders = ",".join("?" * len(keys))
+                known = {
+                    row[0]: row[1:]
+                    for row in self._conn.execute(
+                        f"SELECT path, size, mtime_ns, content_hash FROM files WHERE path IN ({placeholders})", keys)
+                }
+
+                stale = []
+                for index, (key, stat) in enumerate(zip(keys, stats)):
+                    record = known.get(key)
+                    if record is not None and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+                        chunk_hashes[present[index]] = record[2]
+                    else:
+                        stale.append(index)
+
+                if stale:
+                    computed = executor.map(_hash_or_none, [chunk[index] for index in stale])
+                    rows = []
+                    for index, content_hash in zip(stale, computed):
+                        chunk_hashes[present[index]] = content_hash
+                        if content_hash is not None:
+                            rows.append((keys[index], stats[index].st_size, stats[index].st_mtime_ns, content_hash))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)", rows)
+                    self._conn.commit()
+
+                self.hashed += len(stale)
+                self.unchanged += len(chunk) - len(stale)
+                hashes.extend(chunk_hashes)
+        return hashes
+
+    def cached(self, content_hashes: Iterable[Optional[str]], config_hash: str) -> Set[str]:
+        """已有结果的内容哈希（同时统计命中和未命中数，忽略 None）"""
+        unique = list(set(content_hashes) - {None})
+        found: Set[str] = set()
+        for chunk in _chunks(unique):
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                row[0] for row in self._conn.execute(
+                    f"SELECT content_hash FROM results WHERE config_hash = ? AND content_hash IN ({placeholders})",
+                    [config_hash, *chunk]))
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def get(self, content_hash: str, config_hash: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT record FROM results WHERE content_hash = ? AND config_hash = ?",
+            (content_hash, config_hash)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, content_hash: str, config_hash: str, record: Dict) -> None:
+        """写入一条结果（调用 commit 后持久化）"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (content_hash, config_hash, record) VALUES (?, ?, ?)",
+            (content_hash, config_hash, json.dumps(record, ensure_ascii=False)))
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中的图像数，以及重新哈希/复用哈希的文件数"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hashed": self.hashed,
+            "unchanged": self.unchanged,
+        }
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "DetectionCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,159 @@
+import datetime
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import polars as pl
+
+DEFAULT_PARQUET_ROOT = Path("runs") / "detect" / "parquet"
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+# 每个检测目标一行；frame 和 track_id 只在视频/跟踪结果中有值。
+# 没有检测目标或无法读取的图像也输出一行，检测列为 null，error 记录失败原因
+DETECTION_SCHEMA = {
+    "image": pl.String,
+    "frame": pl.Int64,
+    "class": pl.String,
+    "conf": pl.Float32,
+    "x1": pl.Float32,
+    "y1": pl.Float32,
+    "x2": pl.Float32,
+    "y2": pl.Float32,
+    "track_id": pl.Int64,
+    "error": pl.String,
+}
+_DETECTION_COLUMNS = ("class", "conf", "x1", "y1", "x2", "y2", "track_id")
+
+
+def new_partition() -> Tuple[str, str]:
+    """新的 (run, date) 分区：run 为当前时间加随机后缀（同一秒启动的运行互不覆盖），date 为当天"""
+    run = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    return run, datetime.date.today().isoformat()
+
+
+def partition_path(root: str | Path, run: str, date: str) -> Path:
+    return Path(root) / f"run={run}" / f"date={date}"
+
+
+class DetectionParquetWriter:
+    """列式 Parquet 输出：每个检测目标一行，按 run 和日期分区
+
+    目标按列缓冲在内存中，累积到 row_group_size 行时写出一个分片文件
+    root/run=<run>/date=<YYYY-MM-DD>/<prefix>-<序号>.parquet（Hive 分区目录），
+    内存占用与图像数量无关。分片先写入临时文件再重命名，进程中断时不会留下不完整的文件。
+
+    接口与 JsonLinesWriter 一致，write() 接收 make_record 生成的每张图像的记录。
+    没有检测目标的图像输出一行检测列为 null 的记录，无法读取的图像同时在 error 列记录原因，
+    下游可以区分"已处理但没有目标"和"未处理或失败"；统计检测目标时按 class 非 null 过滤。
+    """
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_PARQUET_ROOT,
+        run: Optional[str] = None,
+        date: Optional[str] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        prefix: str = "part",
+        compression: str = "zstd",
+    ):
+        """
+        Args:
+            root: 输出根目录
+            run: 运行标识，None 时使用当前时间（多进程分片时由主进程统一指定）
+            date: 分区日期（YYYY-MM-DD），None 时使用当天
+            row_group_size: 每个行组（分片文件）的行数
+            prefix: 分片文件名前缀（多个写入者共用同一分区时用于区分）
+            compression: Parquet 压缩算法
+        """
+        if row_group_size < 1:
+            raise ValueError("row_group_size 必须大于 0")
+
+        default_run, default_date = new_partition()
+        self.run = run or default_run
+        self.date = date or default_date
+        self.path = partition_path(root, self.run, self.date)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.prefix = prefix
+        self.compression = compression
+
+        self.count = 0  # 写入的图像数
+        self.rows = 0  # 写入的行数（含缓冲中的）
+        self.parts = 0
+        self._columns: Dict[str, list] = {name: [] for name in DETECTION_SCHEMA}
+        self._buffered = 0
+        self._closed = False
+
+    def write(self, record: Dict) -> None:
+        columns = self._columns
+        image = record['image']
+        frame = record.get('frame')
+        error = record.get('error')
+        objects = record['objects']
+        for obj in objects:
+            x1, y1, x2, y2 = obj['bbox']
+            columns['image'].append(image)
+            columns['frame'].append(frame)
+            columns['class'].append(obj['class'])
+            columns['conf'].append(obj['confidence'])
+            columns['x1'].append(x1)
+            columns['y1'].append(y1)
+            columns['x2'].append(x2)
+            columns['y2'].append(y2)
+            columns['track_id'].append(obj.get('track_id'))
+            columns['error'].append(error)
+
+        rows = len(objects)
+        if rows == 0:
+            # 图像本身也记录一行，否则下游无法区分"没有目标"和"未处理/失败"
+            columns['image'].append(image)
+            columns['frame'].append(frame)
+            for name in _DETECTION_COLUMNS:
+                columns[name].append(None)
+            columns['error'].append(error)
+            rows = 1
+
+        self._buffered += rows
+        self.rows += rows
+        self.count += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓冲的行写成一个分片文件"""
+        if self._buffered == 0:
+            return
+
+        frame = pl.DataFrame(self._columns, schema=DETECTION_SCHEMA)
+        target = self.path / f"{self.prefix}-{self.parts:05d}.parquet"
+        temp = target.with_name(target.name + ".tmp")
+        frame.write_parquet(temp, compression=self.compression, row_group_size=self.row_group_size, statistics=True)
+        os.replace(temp, target)
+
+        self.parts += 1
+        self._columns = {name: [] for name in DETECTION_SCHEMA}
+        self._buffered = 0
+
+    def close(self) -> None:
+        if not self._closed:
+            self.flush()
+            self._closed = True
+
+    def __enter__(self) -> "DetectionParquetWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def scan_detections(root: str | Path = DEFAULT_PARQUET_ROOT) -> pl.LazyFrame:
+    """
+    延迟读取 root 下所有运行的检测结果，run 和 date 分区目录解析为列
+
+    聚合查询只读取用到的列，并按分区和行组统计信息跳过无关数据；class 为 null 的行是
+    没有检测目标或无法读取的图像，统计目标时需要过滤，例如：
+        scan_detections().filter(pl.col("run") == run, pl.col("class").is_not_null()).group_by("class").len()
+    """
+    return pl.scan_parquet(Path(root) / "**" / "*.parquet", hive_partitioning=True)
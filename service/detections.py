@@ -0,0 +1,83 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from ultralytics.engine.results import Boxes
+
+MAX_WH = 7680  # 按类别 NMS 时各类别检测框的坐标偏移
+
+
+def boxes_to_numpy(boxes) -> np.ndarray:
+    """
+    将检测结果一次性转换为 NumPy 数组
+
+    Args:
+        boxes: ultralytics Boxes（torch 或 numpy 数据）或 None
+
+    Returns:
+        形状为 (N, 6) [x1, y1, x2, y2, conf, cls]
+        或 (N, 7) [x1, y1, x2, y2, track_id, conf, cls] 的 float32 数组
+    """
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    data = boxes.data
+    if not isinstance(data, np.ndarray):
+        data = data.cpu().numpy()  # 整帧只做一次设备到主机的传输
+    return np.asarray(data, dtype=np.float32).reshape(-1, data.shape[-1])
+
+
+def numpy_to_boxes(data: np.ndarray, orig_shape: Tuple[int, int]) -> Boxes:
+    """
+    将 NumPy 检测数组包装为 ultralytics Boxes，供 _draw_detections 等直接使用
+
+    Args:
+        data: (N, 6) 或 (N, 7) 检测数组，列含义同 boxes_to_numpy
+        orig_shape: 原始图像尺寸 (height, width)
+    """
+    data = np.asarray(data, dtype=np.float32)
+    if data.size == 0:
+        data = np.zeros((0, 6), dtype=np.float32)
+    return Boxes(data, orig_shape)
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float,
+    max_det: int = 300,
+    class_ids: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    贪心非极大值抑制（NumPy 实现）
+
+    Args:
+        boxes: (N, 4) [x1, y1, x2, y2]
+        scores: (N,) 置信度
+        iou_threshold: IoU 阈值
+        max_det: 最多保留的检测框数量
+        class_ids: (N,) 类别，不为 None 时只在同类别之间抑制
+
+    Returns:
+        保留的检测框索引（按置信度从高到低）
+    """
+    if class_ids is not None:
+        # 按类别偏移坐标，一次 NMS 完成分类别抑制
+        boxes = boxes + class_ids[:, None].astype(boxes.dtype) * MAX_WH
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0 and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        inter_w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        inter_h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = inter_w * inter_h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,143 @@
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "encoder_profile.json"
+
+FFMPEG_BACKEND = "ffmpeg"
+GSTREAMER_BACKEND = "gstreamer"
+
+# 编码一帧的耗时不超过帧间隔的该比例时，认为编码器满足延迟预算（其余时间留给采集和推理）
+DEFAULT_BUDGET_RATIO = 0.5
+# 实际码率与目标码率的相对误差超过该值时，优先级排在码率准确的编码器之后
+MAX_BITRATE_ERROR = 0.5
+
+DEFAULT_FFMPEG_ENCODER = "libx264"
+
+# FFmpeg H.264 编码器及其低延迟参数；码率、GOP 等公共参数由 build_encoder_args 添加
+FFMPEG_ENCODERS: Dict[str, Dict] = {
+    "libx264": {
+        "args": [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',     # speed-preset=ultrafast
+            '-tune', 'zerolatency',     # tune=zerolatency
+            '-profile:v', 'baseline',   # profile=baseline
+            '-refs', '1',               # ref=1
+            '-bf', '0',                 # bframes=0
+            '-threads', '2',            # threads=2
+        ],
+        "pix_fmt": "yuv420p",           # 强制使用 YUV420P（baseline 兼容）
+    },
+    "libopenh264": {
+        "args": ['-c:v', 'libopenh264', '-profile:v', 'constrained_baseline'],
+        "pix_fmt": "yuv420p",
+    },
+    "h264_v4l2m2m": {  # 树莓派等 V4L2 硬件编码
+        "args": ['-c:v', 'h264_v4l2m2m'],
+        "pix_fmt": "yuv420p",
+    },
+    "h264_nvenc": {  # NVIDIA 硬件编码
+        "args": ['-c:v', 'h264_nvenc', '-preset', 'p1', '-tune', 'ull', '-profile:v', 'baseline', '-bf', '0'],
+        "pix_fmt": "yuv420p",
+    },
+    "h264_qsv": {  # Intel Quick Sync
+        "args": ['-c:v', 'h264_qsv', '-preset', 'veryfast', '-profile:v', 'baseline', '-bf', '0'],
+        "pix_fmt": "nv12",
+    },
+}
+
+
+def build_encoder_args(encoder: str, bitrate: int) -> List[str]:
+    """
+    FFmpeg H.264 编码参数
+
+    Args:
+        encoder: FFMPEG_ENCODERS 中的编码器名称
+        bitrate: 码率 (kbps)
+    """
+    if encoder not in FFMPEG_ENCODERS:
+        raise ValueError(f"不支持的编码器: {encoder}，可选: {', '.join(FFMPEG_ENCODERS)}")
+
+    spec = FFMPEG_ENCODERS[encoder]
+    return spec["args"] + [
+        '-pix_fmt', spec["pix_fmt"],
+        '-b:v', f'{bitrate}k',          # bitrate
+        '-maxrate', f'{bitrate}k',
+        '-bufsize', f'{bitrate * 2}k',
+        '-g', '15',                     # key-int-max=15 (GOP size)
+    ]
+
+
+class EncoderProfile:
+    """编码器基准测试结果（scripts/benchmark_encoders.py 生成）
+
+    记录每个编码器在指定分辨率和帧率下的单帧编码耗时、CPU 耗时和码率误差，
+    推流器启动时按延迟预算选择 CPU 开销最小的编码器：
+    1. 满足延迟预算且码率准确的编码器，按 CPU 耗时从低到高
+    2. 满足延迟预算但码率偏差较大的编码器，按 CPU 耗时从低到高
+    3. 不满足延迟预算的编码器，按编码耗时从低到高
+    测试失败（不可用）的编码器不参与排序。
+    """
+
+    def __init__(self, data: Dict):
+        """
+        Args:
+            data: 基准测试结果，包含 width/height/fps/bitrate 以及每个后端的测试结果列表
+        """
+        self.data = data
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_PROFILE_PATH) -> Optional["EncoderProfile"]:
+        """读取基准测试结果，文件不存在或格式错误时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path: str | Path = DEFAULT_PROFILE_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def matches(self, width: int, height: int, fps: int) -> bool:
+        """测试条件是否与当前推流配置一致（同一主机、分辨率和帧率）"""
+        return (
+            self.data.get("host") == socket.gethostname()
+            and self.data.get("width") == width
+            and self.data.get("height") == height
+            and self.data.get("fps") == fps
+        )
+
+    def rank(self, backend: str, latency_budget_ms: float, max_bitrate_error: float = MAX_BITRATE_ERROR) -> List[str]:
+        """
+        按延迟预算对可用编码器排序
+
+        Args:
+            backend: FFMPEG_BACKEND 或 GSTREAMER_BACKEND
+            latency_budget_ms: 单帧编码耗时预算（毫秒）
+            max_bitrate_error: 码率相对误差上限
+
+        Returns:
+            编码器名称列表，最优的在前
+        """
+        results = [r for r in self.data.get(backend, []) if r.get("error") is None]
+
+        def sort_key(result: Dict):
+            if result["encode_ms"] > latency_budget_ms:
+                return 2, result["encode_ms"]
+            if result["bitrate_error"] > max_bitrate_error:
+                return 1, result["cpu_ms"]
+            return 0, result["cpu_ms"]
+
+        return [r["encoder"] for r in sorted(results, key=sort_key)]
+
+
+def frame_budget_ms(fps: float, ratio: float = DEFAULT_BUDGET_RATIO) -> float:
+    """单帧编码耗时预算（毫秒）"""
+    return 1000.0 / fps * ratio
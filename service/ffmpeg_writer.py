@@ -0,0 +1,98 @@
+import queue
+import subprocess
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from service.pipeline import DROP_OLDEST, BoundedFrameQueue
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="FFmpeg写入")
+
+
+class FFmpegFrameWriter:
+    """FFmpeg 异步零拷贝写入器
+
+    - 帧数据通过 memoryview 直接写入管道，不调用 tobytes()，不产生整帧拷贝
+    - 写入在独立线程中进行，FFmpeg 编码变慢时不会阻塞检测线程
+    - 队列满时丢弃最旧的帧并计数
+
+    注意：write() 放入队列的帧在写入完成前不能被修改，调用方每帧应使用新的数组
+    （或轮转使用足够多的预分配缓冲区）。
+    """
+
+    def __init__(self, process: subprocess.Popen, queue_size: int = 2):
+        """
+        Args:
+            process: 已启动的 FFmpeg 进程（stdin=PIPE，建议 bufsize=0 以避免 Python 层缓冲拷贝）
+            queue_size: 待写入帧队列的容量
+        """
+        self.process = process
+        self.queue = BoundedFrameQueue(queue_size, DROP_OLDEST)
+        self.written_count = 0
+        self.error: Optional[BaseException] = None
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dropped_count(self) -> int:
+        """FFmpeg 跟不上时被丢弃的帧数"""
+        return self.queue.dropped
+
+    def start(self) -> "FFmpegFrameWriter":
+        """启动写入线程"""
+        self._thread = threading.Thread(target=self._write_loop, name="ffmpeg-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def write(self, frame: np.ndarray) -> bool:
+        """
+        提交一帧（非阻塞）
+
+        Returns:
+            bool: 写入线程是否仍在运行
+        """
+        if not self.is_alive():
+            return False
+        self.queue.put(frame)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written_count, "dropped": self.dropped_count}
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """停止写入线程（未写入的帧将被丢弃）"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info(f"写入统计: 已写入 {self.written_count} 帧 | 丢帧 {self.dropped_count} 帧")
+
+    def _write_loop(self) -> None:
+        stdin = self.process.stdin
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    frame = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                # 连续内存的 ndarray 直接暴露底层缓冲区，按字节视图写入
+                view = memoryview(np.ascontiguousarray(frame)).cast("B")
+                while view:
+                    written = stdin.write(view)
+                    if written is None:  # 非阻塞管道暂不可写
+                        continue
+                    view = view[written:]
+
+                self.written_count += 1
+        except BrokenPipeError as e:
+            logger.error("FFmpeg 管道已断开")
+            self.error = e
+        except Exception as e:
+            logger.error(f"写入 FFmpeg 失败: {e}")
+            self.error = e
@@ -0,0 +1,121 @@
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+
+class I420Converter:
+    """BGR -> I420 (YUV420P) 转换器
+
+    使用预分配的缓冲区（cv2.cvtColor 的 dst 参数），转换过程不产生新的内存分配。
+    I420 每像素 1.5 字节，相比 BGR24 的 3 字节可以减半 FFmpeg 管道带宽，
+    同时省去 FFmpeg 内部的像素格式转换。
+    """
+
+    def __init__(self, width: int, height: int, num_buffers: int = 1):
+        """
+        Args:
+            width: 帧宽度（必须为偶数）
+            height: 帧高度（必须为偶数）
+            num_buffers: 轮转使用的缓冲区数量；
+                转换结果在被异步消费时，需保证缓冲区不会在消费前被覆盖
+        """
+        if width % 2 != 0 or height % 2 != 0:
+            raise ValueError(f"I420 要求宽高为偶数: {width}x{height}")
+        if num_buffers < 1:
+            raise ValueError(f"缓冲区数量必须大于 0: {num_buffers}")
+
+        self.width = width
+        self.height = height
+        self._buffers = [np.empty((height * 3 // 2, width), dtype=np.uint8) for _ in range(num_buffers)]
+        self._index = 0
+
+    @property
+    def frame_size(self) -> int:
+        """每帧字节数"""
+        return self.width * self.height * 3 // 2
+
+    def convert(self, frame: np.ndarray) -> np.ndarray:
+        """
+        将 BGR 帧转换为 I420
+
+        Args:
+            frame: BGR 帧，尺寸必须与初始化时一致
+
+        Returns:
+            I420 数据（形状为 (height * 3 / 2, width) 的预分配缓冲区）
+        """
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=buffer)
+        return buffer
+
+
+class FrameResizer:
+    """预分配输出缓冲区的缩放器
+
+    使用 cv2.resize 的 dst 参数写入预分配的缓冲区，缩放过程不产生新的内存分配；
+    输入尺寸已经正确时直接返回原帧。
+    """
+
+    def __init__(self, width: int, height: int, num_buffers: int = 1):
+        """
+        Args:
+            width: 输出宽度
+            height: 输出高度
+            num_buffers: 轮转使用的缓冲区数量；
+                输出帧在被异步消费时，需保证缓冲区不会在消费前被覆盖
+        """
+        if num_buffers < 1:
+            raise ValueError(f"缓冲区数量必须大于 0: {num_buffers}")
+
+        self.width = width
+        self.height = height
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(num_buffers)]
+        self._index = 0
+
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        """
+        将 BGR 帧缩放到输出尺寸
+
+        Returns:
+            原帧（尺寸已正确时）或预分配的缓冲区
+        """
+        if frame.shape[1] == self.width and frame.shape[0] == self.height:
+            return frame
+
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        cv2.resize(frame, (self.width, self.height), dst=buffer)
+        return buffer
+
+
+def darken_region(
+    frame: np.ndarray,
+    top_left: Tuple[int, int],
+    bottom_right: Tuple[int, int],
+    alpha: float = 0.5
+) -> np.ndarray:
+    """
+    原地将矩形区域与黑色按 alpha 混合（半透明背景）
+
+    只处理矩形 ROI 的视图，结果与“复制整帧 + 画黑色实心矩形 + cv2.addWeighted”一致，
+    但不需要任何整帧大小的临时数组。
+
+    Args:
+        frame: BGR 帧（原地修改）
+        top_left: 左上角 (x, y)
+        bottom_right: 右下角 (x, y)，包含在区域内（与 cv2.rectangle 一致）
+        alpha: 黑色的不透明度
+
+    Returns:
+        输入帧
+    """
+    x1, y1 = max(top_left[0], 0), max(top_left[1], 0)
+    x2, y2 = min(bottom_right[0] + 1, frame.shape[1]), min(bottom_right[1] + 1, frame.shape[0])
+    if x1 >= x2 or y1 >= y2:
+        return frame
+
+    roi = frame[y1:y2, x1:x2]
+    cv2.addWeighted(roi, 1.0 - alpha, roi, 0.0, 0.0, dst=roi)
+    return frame
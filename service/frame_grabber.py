@@ -0,0 +1,106 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="采集线程")
+
+
+class LatestFrameGrabber:
+    """只保留最新帧的摄像头读取器
+
+    后台线程持续从 cv2.VideoCapture 解码，只保留最新的一帧；
+    推理慢于摄像头帧率时，旧帧直接被丢弃，而不是堆积在驱动缓冲区中，
+    从而保证推流画面的端到端延迟不随模型速度变慢而增长。
+
+    对外提供与 cv2.VideoCapture 相同的 read/isOpened/set/get/release 接口，
+    可以直接替换 self.cap 使用。
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, read_timeout: float = 2.0):
+        """
+        Args:
+            cap: 已打开的 cv2.VideoCapture
+            read_timeout: read() 等待新帧的超时时间（秒）
+        """
+        self.cap = cap
+        self.read_timeout = read_timeout
+
+        self.grabbed_count = 0  # 后台线程解码的总帧数
+        self.dropped_count = 0  # 未被读取就被新帧覆盖的旧帧数
+
+        self._frame: Optional[np.ndarray] = None
+        self._frame_seq = 0  # 最新帧的序号
+        self._read_seq = 0  # 最近一次 read() 返回的帧序号
+        self._ended = False
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 驱动缓冲区只保留 1 帧（部分后端不支持，忽略返回值）
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def start(self) -> "LatestFrameGrabber":
+        """启动后台采集线程"""
+        self._thread = threading.Thread(target=self._grab_loop, name="latest-frame-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def _grab_loop(self) -> None:
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            with self._condition:
+                if not ret:
+                    self._ended = True
+                    self._condition.notify_all()
+                    break
+
+                if self._frame_seq > self._read_seq:
+                    self.dropped_count += 1  # 上一帧还没被读取就被覆盖
+                self._frame = frame
+                self._frame_seq += 1
+                self.grabbed_count += 1
+                self._condition.notify_all()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """返回最新的一帧（阻塞等待比上一次更新的帧）"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frame_seq > self._read_seq or self._ended,
+                timeout=self.read_timeout,
+            )
+            if self._frame_seq <= self._read_seq:
+                if not self._ended:
+                    logger.warning(f"等待新帧超时 ({self.read_timeout}s)")
+                return False, None
+
+            self._read_seq = self._frame_seq
+            return True, self._frame
+
+    def stats(self) -> Dict[str, int]:
+        """采集计数：解码帧数、丢弃的旧帧数"""
+        with self._condition:
+            return {"grabbed": self.grabbed_count, "dropped": self.dropped_count}
+
+    def isOpened(self) -> bool:  # noqa: N802 - 与 cv2.VideoCapture 保持一致
+        """摄像头已打开且后台线程仍在采集（读取结束后返回 False）"""
+        return self.cap.isOpened() and not self._ended
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return self.cap.set(prop_id, value)
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+    def release(self) -> None:
+        """停止后台线程并释放摄像头"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.cap.release()
+
+        stats = self.stats()
+        logger.info(f"采集统计: 解码 {stats['grabbed']} 帧 | 丢弃旧帧 {stats['dropped']} 帧")
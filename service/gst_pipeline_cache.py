@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Dict, Optional
+
+import cv2
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "gstreamer_pipelines.json"
+
+METHOD_GSTREAMER = "cap_gstreamer"  # cv2.CAP_GSTREAMER + fourcc=0
+METHOD_FOURCC = "fourcc"  # 传统 fourcc 方式
+
+
+class GstPipelineCache:
+    """GStreamer 推流管道探测结果缓存
+
+    按“主机名 + OpenCV 编译信息哈希”记录上一次成功打开的编码器和打开方式，
+    下次启动直接打开该管道，只有缓存的管道打不开时才重新逐个探测。
+    OpenCV 未编译 GStreamer 支持也会被缓存（同一编译不会改变）。
+
+    缓存文件为 JSON，多个主机/OpenCV 编译共用一个文件，写入时先写临时文件再替换。
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_CACHE_PATH):
+        """
+        Args:
+            path: 缓存文件路径
+        """
+        self.path = Path(path)
+        self.key = f"{socket.gethostname()}:{self.build_hash()}"
+
+    @staticmethod
+    def build_hash() -> str:
+        """当前 OpenCV 编译信息的哈希（OpenCV 升级或重新编译后缓存自动失效）"""
+        return hashlib.sha1(cv2.getBuildInformation().encode("utf-8")).hexdigest()[:16]
+
+    def _read_all(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_all(self, entries: Dict[str, Dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> Optional[Dict]:
+        """
+        读取当前主机和 OpenCV 编译的缓存
+
+        Returns:
+            {"has_gstreamer": bool, "encoder": str, "method": str}，没有缓存时返回 None
+        """
+        return self._read_all().get(self.key)
+
+    def save(self, has_gstreamer: bool, encoder: Optional[str] = None, method: Optional[str] = None) -> None:
+        """
+        记录探测结果
+
+        Args:
+            has_gstreamer: OpenCV 是否编译了 GStreamer 支持
+            encoder: 成功打开的编码器名称（与 PushStreamer.gst_pipelines 中的名称一致）
+            method: 打开方式，METHOD_GSTREAMER 或 METHOD_FOURCC
+        """
+        entries = self._read_all()
+        entries[self.key] = {"has_gstreamer": has_gstreamer, "encoder": encoder, "method": method}
+        self._write_all(entries)
+
+    def invalidate(self) -> None:
+        """删除当前主机和 OpenCV 编译的缓存"""
+        entries = self._read_all()
+        if entries.pop(self.key, None) is not None:
+            self._write_all(entries)
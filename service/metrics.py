@@ -0,0 +1,257 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import psutil
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="指标")
+
+# 延迟直方图的桶上界（秒），覆盖 0.5ms 的管道写入到秒级的推理
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075,
+    0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """固定桶延迟直方图（线程安全）
+
+    每次记录只做一次二分查找和计数，分位数由桶计数线性插值估算，
+    与 Prometheus histogram_quantile() 的算法一致。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: 递增的桶上界（秒），最后自动追加 +Inf 桶
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def snapshot(self) -> Dict:
+        """当前的桶计数、总数和总和（拷贝）"""
+        with self._lock:
+            return {"counts": list(self.counts), "count": self.count, "sum": self.sum}
+
+    def quantile(self, q: float, snapshot: Optional[Dict] = None) -> float:
+        """
+        估算分位数（秒），没有样本时返回 0
+
+        Args:
+            q: 分位数 (0, 1)
+            snapshot: snapshot() 的结果，None 时使用当前数据
+        """
+        snapshot = snapshot or self.snapshot()
+        if snapshot["count"] == 0:
+            return 0.0
+
+        rank = q * snapshot["count"]
+        cumulative = 0
+        for index, bucket_count in enumerate(snapshot["counts"]):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # +Inf 桶只能返回最大的有限上界
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class StreamMetrics:
+    """推流各阶段的延迟直方图 + 进程 CPU/内存采样
+
+    用法：
+        with metrics.time("inference"):
+            boxes = detect(frame)
+    计时使用 time.perf_counter（单调时钟），不受系统时间调整影响。
+    """
+
+    def __init__(self, stream: str = "default", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            stream: 推流名称（Prometheus 标签，区分同一设备上的多路推流）
+            buckets: 延迟直方图的桶上界（秒）
+        """
+        self.stream = stream
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)  # 第一次调用只建立基准
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, LatencyHistogram(self.buckets))
+        return histogram
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(stage).observe(time.perf_counter() - start)
+
+    def reset(self) -> None:
+        """清空所有阶段的直方图和帧计数（如丢弃预热阶段的数据）"""
+        with self._lock:
+            self.stages = {}
+            self.frames = 0
+
+    def frame_done(self) -> None:
+        """记录一帧处理完成（输出帧计数）"""
+        with self._lock:
+            self.frames += 1
+
+    def sample_process(self) -> Dict[str, float]:
+        """进程 CPU 占用（自上次采样以来，多核可超过 100%）和常驻内存"""
+        with self._process.oneshot():
+            return {
+                "cpu_percent": self._process.cpu_percent(None),
+                "rss_bytes": float(self._process.memory_info().rss),
+            }
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """每个阶段的样本数、平均值和 p50/p95/p99（毫秒）"""
+        result = {}
+        for stage, histogram in list(self.stages.items()):
+            snapshot = histogram.snapshot()
+            if snapshot["count"] == 0:
+                continue
+            stats = {"count": snapshot["count"], "mean_ms": snapshot["sum"] / snapshot["count"] * 1000}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}_ms"] = histogram.quantile(q, snapshot) * 1000
+            result[stage] = stats
+        return result
+
+    def log_summary(self) -> None:
+        """把每个阶段的延迟分位数写入日志"""
+        for stage, stats in self.summary().items():
+            logger.info(
+                f"[{self.stream}] {stage:10s} 平均 {stats['mean_ms']:.1f}ms | "
+                f"p50 {stats['p50_ms']:.1f}ms | p95 {stats['p95_ms']:.1f}ms | p99 {stats['p99_ms']:.1f}ms"
+            )
+
+
+def render_prometheus(registries: Sequence[StreamMetrics]) -> str:
+    """
+    以 Prometheus 文本格式 (0.0.4) 输出指标
+
+    - yolo_stage_latency_seconds: 各阶段延迟直方图
+    - yolo_stage_latency_quantile_seconds: 直方图估算的 p50/p95/p99
+    - yolo_frames_total: 已输出的帧数
+    - process_cpu_percent / process_resident_memory_bytes: 进程 CPU 和内存
+    """
+    lines: List[str] = [
+        "# HELP yolo_stage_latency_seconds Per-stage processing latency.",
+        "# TYPE yolo_stage_latency_seconds histogram",
+    ]
+    quantile_lines: List[str] = [
+        "# HELP yolo_stage_latency_quantile_seconds Latency quantiles estimated from the histogram.",
+        "# TYPE yolo_stage_latency_quantile_seconds gauge",
+    ]
+    frame_lines: List[str] = [
+        "# HELP yolo_frames_total Frames processed.",
+        "# TYPE yolo_frames_total counter",
+    ]
+
+    for metrics in registries:
+        stream = metrics.stream.replace('\\', '\\\\').replace('"', '\\"')
+        for stage, histogram in sorted(metrics.stages.items()):
+            snapshot = histogram.snapshot()
+            labels = f'stream="{stream}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, snapshot["counts"]):
+                cumulative += bucket_count
+                lines.append(f'yolo_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'yolo_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {snapshot["count"]}')
+            lines.append(f"yolo_stage_latency_seconds_sum{{{labels}}} {snapshot['sum']:.6f}")
+            lines.append(f"yolo_stage_latency_seconds_count{{{labels}}} {snapshot['count']}")
+            for q in QUANTILES:
+                quantile_lines.append(
+                    f'yolo_stage_latency_quantile_seconds{{{labels},quantile="{q}"}} '
+                    f"{histogram.quantile(q, snapshot):.6f}"
+                )
+        frame_lines.append(f'yolo_frames_total{{stream="{stream}"}} {metrics.frames}')
+
+    process = registries[0].sample_process() if registries else {"cpu_percent": 0.0, "rss_bytes": 0.0}
+    process_lines = [
+        "# HELP process_cpu_percent Process CPU usage since the previous scrape (100 = one core).",
+        "# TYPE process_cpu_percent gauge",
+        f"process_cpu_percent {process['cpu_percent']:.1f}",
+        "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {process['rss_bytes']:.0f}",
+    ]
+    return "\n".join(lines + quantile_lines + frame_lines + process_lines) + "\n"
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics 端点（Prometheus 文本格式）"""
+
+    def __init__(self, registries: Sequence[StreamMetrics], port: int = 9108, host: str = "0.0.0.0"):
+        """
+        Args:
+            registries: 要输出的指标（多路推流时每路一个）
+            port: HTTP 端口
+            host: 监听地址
+        """
+        self.registries = list(registries)
+        self.port = port
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsServer":
+        registries = self.registries
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus(registries).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 抓取请求不写日志
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"📈 指标端点: http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
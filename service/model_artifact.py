@@ -0,0 +1,108 @@
+import json
+import platform
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import torch
+import ultralytics
+
+ARTIFACT_SUFFIX = ".infer.pt"
+
+
+def metadata_path(model_path: str | Path) -> Path:
+    """模型的元数据文件路径（同名 .json，例如 best.infer.pt -> best.infer.json）"""
+    return Path(model_path).with_suffix(".json")
+
+
+def load_model_metadata(model_path: str | Path) -> Optional[Dict]:
+    """
+    读取模型的元数据（类别、输入尺寸、版本等），不反序列化权重
+
+    Args:
+        model_path: 模型路径
+
+    Returns:
+        元数据 dict，模型没有元数据文件时返回 None
+    """
+    path = metadata_path(model_path)
+    if not path.exists():
+        return None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    # JSON 的键只能是字符串，类别ID还原为 int
+    metadata["names"] = {int(k): v for k, v in metadata.get("names", {}).items()}
+    return metadata
+
+
+def save_inference_artifact(
+    model_path: str | Path,
+    output_path: Optional[str | Path] = None,
+    half: bool = True,
+) -> Path:
+    """
+    从训练检查点生成只用于推理的模型文件和元数据
+
+    训练检查点包含优化器状态、EMA、训练参数和指标，每次加载都要全部反序列化，
+    推理时还要再融合 Conv+BN。推理模型只保留（EMA）权重：
+    - 预先融合 Conv+BN，加载后无需再融合
+    - 去掉优化器、训练参数和指标
+    - 默认以 FP16 存储（加载时 ultralytics 会转换为 FP32），文件大小减半
+
+    生成的 .pt 仍可直接用 YOLO() 加载；元数据写入同名 .json，可在不加载权重的情况下读取。
+
+    Args:
+        model_path: 训练检查点 (best.pt)
+        output_path: 输出路径，默认为 <stem>.infer.pt
+        half: 是否以 FP16 存储权重
+
+    Returns:
+        推理模型路径
+    """
+    model_path = Path(model_path)
+    output_path = Path(output_path) if output_path else model_path.with_name(model_path.stem + ARTIFACT_SUFFIX)
+
+    checkpoint = torch.load(model_path, map_location="cpu", weights_only=False)
+    model = (checkpoint.get("ema") or checkpoint["model"]).float()
+    model.fuse(verbose=False)
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad = False
+    if half:
+        model.half()
+
+    train_args = checkpoint.get("train_args") or {}
+    kept_args = {k: train_args[k] for k in ("task", "imgsz") if k in train_args}
+    torch.save(
+        {
+            "model": model,
+            "train_args": kept_args,
+            "date": datetime.now().isoformat(),
+            "version": ultralytics.__version__,
+        },
+        output_path,
+    )
+
+    names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+    metadata = {
+        "names": names,
+        "nc": len(names),
+        "imgsz": train_args.get("imgsz", 640),
+        "stride": int(model.stride.max()),
+        "task": train_args.get("task", "detect"),
+        "precision": "fp16" if half else "fp32",
+        "fused": True,
+        "source": str(model_path),
+        "epoch": checkpoint.get("epoch"),
+        "created": datetime.now().isoformat(),
+        "versions": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "ultralytics": ultralytics.__version__,
+        },
+    }
+    with open(metadata_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    return output_path
@@ -0,0 +1,108 @@
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """运动门控：画面没有变化时跳过检测器，沿用上一次的检测结果
+
+    将帧缩小为低分辨率灰度图，与上一次运行检测时的参考帧做差分，
+    变化像素占比超过 threshold 时才运行检测器。与参考帧（而不是上一帧）比较，
+    缓慢移动的目标也会逐渐累积差异并触发检测。
+    即使画面静止，每隔 recheck_interval 帧也会强制检测一次。
+
+    所有中间结果写入预分配的缓冲区，每帧的开销只有一次缩放和几次小图运算。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.005,
+        pixel_threshold: int = 25,
+        recheck_interval: int = 30,
+        width: int = 160,
+        blur_size: int = 5,
+    ):
+        """
+        Args:
+            threshold: 变化像素占比阈值，超过时认为有运动
+            pixel_threshold: 灰度差超过该值的像素计为变化像素（过滤传感器噪声）
+            recheck_interval: 画面静止时强制检测的间隔（帧）
+            width: 差分图宽度，高度按帧的宽高比计算
+            blur_size: 差分前高斯模糊的核大小（奇数）
+        """
+        if recheck_interval < 1:
+            raise ValueError(f"强制检测间隔必须大于 0: {recheck_interval}")
+
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.recheck_interval = recheck_interval
+        self.width = width
+        self.blur_size = blur_size
+
+        self.gated = 0  # 跳过检测的帧数
+        self.ungated = 0  # 运行检测的帧数
+        self.motion_ratio = 0.0  # 最近一次计算的变化像素占比
+
+        self._small: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._reference: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+        self._last_detect_index: Optional[int] = None
+
+    def _allocate(self, frame_shape) -> None:
+        height = max(1, round(self.width * frame_shape[0] / frame_shape[1]))
+        self._small = np.empty((height, self.width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, self.width), dtype=np.uint8)
+        self._reference = np.empty_like(self._gray)
+        self._diff = np.empty_like(self._gray)
+        self._last_detect_index = None
+
+    def _aspect_changed(self, frame: np.ndarray) -> bool:
+        if self._small is None:
+            return True
+        expected = max(1, round(self.width * frame.shape[0] / frame.shape[1]))
+        return expected != self._small.shape[0]
+
+    def should_detect(self, frame: np.ndarray, frame_index: int) -> bool:
+        """
+        当前帧是否需要运行检测器；返回 True 时当前帧成为新的参考帧
+
+        Args:
+            frame: BGR 帧
+            frame_index: 帧序号
+        """
+        if self._aspect_changed(frame):
+            self._allocate(frame.shape)
+
+        cv2.resize(frame, (self._small.shape[1], self._small.shape[0]), dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (self.blur_size, self.blur_size), 0, dst=self._gray)
+
+        if self._last_detect_index is None:
+            detect = True
+        elif frame_index - self._last_detect_index >= self.recheck_interval:
+            detect = True
+        else:
+            cv2.absdiff(self._gray, self._reference, dst=self._diff)
+            cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+            self.motion_ratio = cv2.countNonZero(self._diff) / self._diff.size
+            detect = self.motion_ratio > self.threshold
+
+        if not detect:
+            self.gated += 1
+            return False
+
+        self._gray, self._reference = self._reference, self._gray
+        self._last_detect_index = frame_index
+        self.ungated += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """门控统计：跳过/运行检测的帧数和跳过比例"""
+        total = self.gated + self.ungated
+        return {
+            "gated": self.gated,
+            "ungated": self.ungated,
+            "gated_ratio": self.gated / total if total else 0.0,
+        }
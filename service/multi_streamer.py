@@ -0,0 +1,270 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from ultralytics import YOLO
+
+from service.pipeline import DROP_OLDEST, BoundedFrameQueue, FramePipeline, PipelineStopped
+from service.push_streamer_ffmpeg import FFmpegPushStreamer
+from service.tracking import StreamTracker
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="多路推流")
+
+
+class MultiCameraStreamer:
+    """多路摄像头推流：共享一个模型，批量推理
+
+    - 每路视频一个 FFmpegPushStreamer（后台采集最新帧 + 独立的 FFmpeg 编码进程）
+    - 推理线程收集每路的最新帧，合并为一次 model.predict(list) 批量推理
+    - 每路视频使用独立的跟踪器，跟踪ID互不干扰
+    - 推理结果分发到每路独立的绘制/写入流水线，某一路编码变慢只会丢弃该路的旧帧
+    """
+
+    def __init__(
+        self,
+        streams: Sequence[Dict],
+        model_path: str = "runs/train/person_detection/weights/best.pt",
+        video_width: int = 640,
+        video_height: int = 480,
+        fps: int = 15,
+        bitrate: int = 400,  # kbps
+        conf: float = 0.5,
+        iou: float = 0.45,
+        device: str = "cpu",
+        imgsz: Optional[int] = None,
+        enable_tracking: bool = True,
+        tracker_config: str = "bytetrack.yaml",
+        queue_size: int = 2,
+        max_read_failures: int = 100,
+    ):
+        """
+        初始化多路推流器
+
+        Args:
+            streams: 每路视频的配置，例如
+                [{"camera_device": 0, "port": 5004}, {"camera_device": "/dev/video4", "port": 5008}]；
+                支持 FFmpegPushStreamer 的所有参数，未指定的参数使用下面的公共配置
+            model_path: YOLO模型路径（所有视频共享）
+            video_width: 视频宽度
+            video_height: 视频高度
+            fps: 帧率
+            bitrate: 比特率(kbps)
+            conf: 置信度阈值
+            iou: NMS IoU 阈值
+            device: 推理设备
+            imgsz: 推理分辨率，默认使用模型训练时的分辨率
+            enable_tracking: 是否启用跟踪（每路视频独立）
+            tracker_config: 跟踪器配置文件
+            queue_size: 每路绘制/写入流水线的队列容量（满时丢弃最旧帧）
+            max_read_failures: 某一路连续读帧失败多少次后停止该路（单次失败只跳过该路的本批）
+        """
+        if not streams:
+            raise ValueError("至少需要配置一路视频")
+
+        self.model_path = model_path
+        self.conf = conf
+        self.iou = iou
+        self.device = device
+        self.imgsz = imgsz
+        self.enable_tracking = enable_tracking
+        self.queue_size = queue_size
+        self.max_read_failures = max_read_failures
+
+        self.model: Optional[YOLO] = None
+        self.streamers: List[FFmpegPushStreamer] = []
+        for stream in streams:
+            kwargs = dict(
+                model_path=model_path,
+                video_width=video_width,
+                video_height=video_height,
+                fps=fps,
+                bitrate=bitrate,
+                headless=True,
+                latest_frame_only=True,  # 批量推理只取每路的最新帧
+            )
+            kwargs.update(stream)
+            self.streamers.append(FFmpegPushStreamer(**kwargs))
+
+        self.trackers: List[Optional[StreamTracker]] = [
+            StreamTracker(tracker_config) if enable_tracking else None for _ in self.streamers
+        ]
+        self.inboxes: List[BoundedFrameQueue] = []
+        self.pipelines: List[FramePipeline] = []
+        self.batch_count = 0
+
+        self._stop_event = threading.Event()
+
+        logger.info(f"📹 多路推流配置: {len(self.streamers)} 路 | {video_width}x{video_height}@{fps}fps")
+
+    def _load_model(self) -> bool:
+        """加载 YOLO 模型（所有视频共享）"""
+        model_file = Path(self.model_path)
+        if not model_file.exists():
+            logger.error(f"模型文件不存在: {self.model_path}")
+            return False
+
+        try:
+            logger.info(f"正在加载模型: {self.model_path}")
+            self.model = YOLO(self.model_path)
+            self.model.to(self.device)
+            for streamer in self.streamers:
+                streamer.model = self.model
+
+            logger.success(f"模型加载成功! (使用 {self.device})")
+            logger.info(f"模型类别: {self.model.names}")
+            return True
+        except Exception as e:
+            logger.error(f"模型加载失败: {str(e)}")
+            return False
+
+    def _init_streams(self) -> bool:
+        """初始化每路视频的摄像头和 FFmpeg"""
+        for index, streamer in enumerate(self.streamers):
+            logger.info(f"[{index}] 初始化: {streamer.camera_device} -> {streamer.host}:{streamer.port}")
+            if not streamer._init_camera() or not streamer._init_ffmpeg():
+                logger.error(f"[{index}] 初始化失败")
+                return False
+        return True
+
+    def _build_output_pipeline(self, index: int) -> FramePipeline:
+        """第 index 路的绘制/写入流水线，输入为推理线程分发的 (帧序号, 帧, boxes)"""
+        streamer = self.streamers[index]
+        inbox = self.inboxes[index]
+
+        def receive():
+            while not self._stop_event.is_set():
+                try:
+                    return inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None
+
+        def annotate(item):
+            frame_index, frame, boxes = item
+            return streamer._annotate(frame, boxes, frame_index)
+
+        def write(frame):
+            if not streamer._write_frame(frame):
+                raise PipelineStopped()
+
+        return FramePipeline(
+            source=(f"receive-{index}", receive),
+            stages=[(f"annotate-{index}", annotate), (f"write-{index}", write)],
+            queue_size=self.queue_size,
+            policy=DROP_OLDEST,
+        )
+
+    def _stream_closed(self, index: int, read_failures: int) -> bool:
+        """该路是否已真正停止：流水线结束、采集已关闭，或连续读帧失败过多（例如视频文件读完）"""
+        cap = self.streamers[index].cap
+        return (
+            not self.pipelines[index].is_running()
+            or cap is None
+            or not cap.isOpened()
+            or read_failures >= self.max_read_failures
+        )
+
+    def _infer_batch(self, frames: List[np.ndarray]) -> List:
+        """一次前向推理处理所有视频的帧，返回每路的 boxes"""
+        kwargs = dict(conf=self.conf, iou=self.iou, device=self.device, verbose=False)
+        if self.imgsz is not None:
+            kwargs["imgsz"] = self.imgsz
+        results = self.model.predict(frames, **kwargs)
+        return [result.boxes for result in results]
+
+    def start_streaming(self):
+        """开始多路推流"""
+        logger.info("=" * 50)
+        logger.info("🚀 启动 YOLO 多路推流系统")
+        logger.info("=" * 50)
+
+        if not self._load_model() or not self._init_streams():
+            self.cleanup()
+            return
+
+        self.inboxes = [BoundedFrameQueue(self.queue_size, DROP_OLDEST) for _ in self.streamers]
+        self.pipelines = [self._build_output_pipeline(index) for index in range(len(self.streamers))]
+        for pipeline in self.pipelines:
+            pipeline.start()
+
+        logger.info(f"📡 开始推流: {len(self.streamers)} 路，批量推理 (batch={len(self.streamers)})")
+        logger.info("按 Ctrl+C 停止推流")
+
+        active = list(range(len(self.streamers)))
+        read_failures = [0] * len(self.streamers)  # 每路连续读帧失败次数
+        infer_total = 0.0
+        frame_total = 0
+        start_time = time.monotonic()
+        try:
+            while active:
+                # 收集每路的最新帧
+                batch_indices, frames = [], []
+                for index in list(active):
+                    if self._stream_closed(index, read_failures[index]):
+                        logger.warning(f"[{index}] 推流已停止")
+                        active.remove(index)
+                        continue
+                    frame = self.streamers[index]._read_frame()
+                    if frame is None:
+                        # 单次读取失败（读帧超时、摄像头瞬时故障）只跳过该路的本批
+                        read_failures[index] += 1
+                        continue
+                    read_failures[index] = 0
+                    batch_indices.append(index)
+                    frames.append(frame)
+                if not frames:
+                    if active:
+                        time.sleep(0.01)
+                    continue
+
+                # 一次批量推理，按视频分别跟踪
+                infer_start = time.perf_counter()
+                batch_boxes = self._infer_batch(frames)
+                if self.enable_tracking:
+                    batch_boxes = [
+                        self.trackers[index].update(boxes, frame)
+                        for index, frame, boxes in zip(batch_indices, frames, batch_boxes)
+                    ]
+                infer_total += time.perf_counter() - infer_start
+                self.batch_count += 1
+                frame_total += len(frames)
+
+                # 分发到每路的绘制/写入流水线
+                for index, frame, boxes in zip(batch_indices, frames, batch_boxes):
+                    self.inboxes[index].put((self.batch_count, frame, boxes))
+
+                if self.batch_count % 30 == 0:
+                    elapsed = max(time.monotonic() - start_time, 1e-6)
+                    dropped = [inbox.dropped for inbox in self.inboxes]
+                    logger.info(
+                        f"批次: {self.batch_count} | 路数: {len(frames)} | "
+                        f"批量推理: {infer_total / self.batch_count * 1000:.1f}ms | "
+                        f"吞吐: {frame_total / elapsed:.1f} 帧/秒 | 丢帧: {dropped}"
+                    )
+
+        except KeyboardInterrupt:
+            logger.info("\n⏹  用户停止推流")
+        except Exception as e:
+            logger.error(f"多路推流过程中发生错误: {str(e)}")
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        """停止所有流水线并清理每路视频的资源"""
+        self._stop_event.set()
+        for pipeline in self.pipelines:
+            pipeline.join(timeout=5)
+
+        for index, pipeline in enumerate(self.pipelines):
+            stats = pipeline.stats()
+            logger.info(
+                f"[{index}] 推流 {stats[f'write-{index}']['processed']} 帧 | "
+                f"丢帧: {self.inboxes[index].dropped + stats[f'annotate-{index}']['dropped']}"
+            )
+
+        for streamer in self.streamers:
+            streamer.cleanup()
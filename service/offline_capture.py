@@ -0,0 +1,132 @@
+import time
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+
+def synthetic_frames(width: int, height: int, count: int = 60, seed: int = 0) -> List[np.ndarray]:
+    """
+    生成合成测试帧：平滑渐变背景 + 运动的色块 + 轻微噪声
+
+    纯色或静止画面会让编码器几乎不产生码流，纯噪声又会让任何编码器都无法达到目标码率，
+    这里的内容接近真实摄像头画面的编码难度。
+    """
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    background = np.stack([
+        (xs * 255 // max(width - 1, 1)),
+        (ys * 255 // max(height - 1, 1)),
+        ((xs + ys) * 255 // max(width + height - 2, 1)),
+    ], axis=-1).astype(np.uint8)
+
+    frames = []
+    for index in range(count):
+        frame = np.roll(background, index * 4, axis=1)
+        for block in range(4):
+            x = (index * (6 + block * 3) + block * width // 4) % max(width - 80, 1)
+            y = (block * height // 4 + index * 2) % max(height - 80, 1)
+            cv2.rectangle(frame, (x, y), (x + 80, y + 80), (40 + 50 * block, 200 - 40 * block, 120), -1)
+        noise = rng.integers(0, 12, size=frame.shape, dtype=np.uint8)
+        frames.append(cv2.add(frame, noise))
+    return frames
+
+
+def load_video_frames(path: str, width: int, height: int, limit: int = 300) -> List[np.ndarray]:
+    """
+    读取录制视频的前 limit 帧并缩放到指定分辨率
+
+    帧预先解码到内存，每次测试的输入完全相同，解码耗时不计入测试结果。
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+
+    frames = []
+    try:
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames.append(frame)
+    finally:
+        cap.release()
+
+    if not frames:
+        raise ValueError(f"视频中没有可读取的帧: {path}")
+    return frames
+
+
+class FrameLoopCapture:
+    """离线帧源：循环输出内存中的帧，接口与 cv2.VideoCapture 兼容
+
+    代替摄像头驱动推流器，不需要摄像头也能重复测试。先输出 warmup 帧预热
+    （模型首次推理、编码器启动），之后的 num_frames 帧为计时窗口，输出完毕后
+    read() 返回 (False, None)，推流器的主循环随之结束。
+
+    每次 read() 返回帧的副本，与摄像头每次返回新数组一致（推流器会在帧上原地绘制）。
+    """
+
+    def __init__(
+        self,
+        frames: List[np.ndarray],
+        num_frames: int,
+        warmup: int = 0,
+        on_window_start: Optional[Callable[[], None]] = None,
+        on_window_end: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            frames: 循环输出的帧
+            num_frames: 计时窗口的帧数
+            warmup: 计时前的预热帧数
+            on_window_start: 计时窗口开始（输出第一帧计时帧之前）时的回调
+            on_window_end: 计时窗口结束（所有帧输出完毕后再次读取）时的回调
+        """
+        if not frames:
+            raise ValueError("帧源至少需要一帧")
+
+        self.frames = frames
+        self.num_frames = num_frames
+        self.warmup = warmup
+        self.on_window_start = on_window_start
+        self.on_window_end = on_window_end
+
+        self.read_count = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def isOpened(self) -> bool:
+        return True
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return False  # 分辨率和帧率由生成的帧决定
+
+    def read(self):
+        if self.read_count >= self.warmup + self.num_frames:
+            if self.finished_at is None:
+                self.finished_at = time.perf_counter()
+                if self.on_window_end is not None:
+                    self.on_window_end()
+            return False, None
+
+        if self.read_count == self.warmup:
+            if self.on_window_start is not None:
+                self.on_window_start()
+            self.started_at = time.perf_counter()
+
+        frame = self.frames[self.read_count % len(self.frames)].copy()
+        self.read_count += 1
+        return True, frame
+
+    def release(self) -> None:
+        pass
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """计时窗口的耗时（秒），窗口未结束时为 None"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
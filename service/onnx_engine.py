@@ -0,0 +1,241 @@
+import ast
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+from ultralytics.engine.results import Boxes
+
+from service.detections import nms, numpy_to_boxes
+from service.tracking import StreamTracker
+
+TORCH_ENGINE = "torch"
+ONNX_ENGINE = "onnx"
+ENGINES = (TORCH_ENGINE, ONNX_ENGINE)
+
+LETTERBOX_COLOR = 114  # 与 ultralytics LetterBox 的填充颜色一致
+
+
+def letterbox(
+    frame: np.ndarray,
+    new_shape: Tuple[int, int],
+    out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    等比缩放并居中填充到 new_shape（与 ultralytics LetterBox(auto=False) 一致）
+
+    Args:
+        frame: BGR 帧
+        new_shape: 目标尺寸 (height, width)
+        out: 预分配的输出缓冲区，形状为 (height, width, 3)，None 时新建
+
+    Returns:
+        (填充后的图像, 缩放比例, 左上角填充 (pad_x, pad_y))
+    """
+    height, width = frame.shape[:2]
+    gain = min(new_shape[0] / height, new_shape[1] / width)
+    resized_w, resized_h = int(round(width * gain)), int(round(height * gain))
+    pad_x = int(round((new_shape[1] - resized_w) / 2 - 0.1))
+    pad_y = int(round((new_shape[0] - resized_h) / 2 - 0.1))
+
+    if out is None:
+        out = np.empty((new_shape[0], new_shape[1], 3), dtype=np.uint8)
+    out.fill(LETTERBOX_COLOR)
+    cv2.resize(
+        frame,
+        (resized_w, resized_h),
+        dst=out[pad_y:pad_y + resized_h, pad_x:pad_x + resized_w],
+        interpolation=cv2.INTER_LINEAR
+    )
+    return out, gain, (pad_x, pad_y)
+
+
+class OnnxResult:
+    """单帧推理结果，与 ultralytics Results 一样通过 .boxes 访问检测框"""
+
+    def __init__(self, boxes: Boxes, orig_shape: Tuple[int, int]):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+
+class OnnxDetector:
+    """ONNX Runtime CPU 推理后端
+
+    加载 `yolo export format=onnx` 导出的模型，接口与 ultralytics YOLO 的
+    predict/track/names 保持一致，可直接替换推流器中的 self.model：
+    - letterbox 预处理和 NMS 在 NumPy 中完成，不依赖 PyTorch
+    - 输出为 ultralytics Boxes，_draw_detections 无需修改
+    - track() 使用独立的 ultralytics 跟踪器（StreamTracker）关联检测结果
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        imgsz: Optional[int] = None,
+        num_threads: Optional[int] = None,
+        tracker_config: str = "bytetrack.yaml",
+    ):
+        """
+        Args:
+            model_path: ONNX 模型路径
+            imgsz: 默认推理分辨率；None 时使用导出时的分辨率（模型元数据）
+            num_threads: ONNX Runtime 算子内线程数，None 时由 ONNX Runtime 决定
+            tracker_config: track() 使用的跟踪器配置
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX 推理需要 onnxruntime，请运行: pip install onnxruntime") from e
+
+        if Path(model_path).suffix != ".onnx":
+            raise ValueError(f"ONNX 后端需要 .onnx 模型: {model_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.tracker_config = tracker_config
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names: Dict[int, str] = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        self.stride = int(metadata.get("stride", 32))
+
+        # 静态输入尺寸的模型只能使用导出时的分辨率
+        input_shape = self.session.get_inputs()[0].shape
+        self.dynamic = not all(isinstance(dim, int) for dim in input_shape[2:])
+        if not self.dynamic:
+            self.imgsz: Tuple[int, int] = (input_shape[2], input_shape[3])
+        elif imgsz is not None:
+            self.imgsz = (imgsz, imgsz)
+        elif "imgsz" in metadata:
+            self.imgsz = tuple(ast.literal_eval(metadata["imgsz"]))
+        else:
+            self.imgsz = (640, 640)
+
+        self._tracker: Optional[StreamTracker] = None
+        self._canvas: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def _resolve_imgsz(self, imgsz: Optional[int]) -> Tuple[int, int]:
+        """确定本次推理的输入尺寸（动态输入时向上取整到 stride 的倍数）"""
+        if imgsz is None or not self.dynamic:
+            return self.imgsz
+        size = int(np.ceil(imgsz / self.stride) * self.stride)
+        return size, size
+
+    def preprocess(self, frame: np.ndarray, shape: Tuple[int, int]) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """letterbox + BGR->RGB + HWC->CHW + 归一化，返回 (1, 3, H, W) float32"""
+        canvas = self._canvas.get(shape)
+        if canvas is None:
+            canvas = self._canvas[shape] = np.empty((shape[0], shape[1], 3), dtype=np.uint8)
+        image, gain, pad = letterbox(frame, shape, out=canvas)
+        blob = image[..., ::-1].transpose(2, 0, 1)[None].astype(np.float32) * (1 / 255.0)
+        return np.ascontiguousarray(blob), gain, pad
+
+    def _postprocess(
+        self,
+        output: np.ndarray,
+        orig_shape: Tuple[int, int],
+        gain: float,
+        pad: Tuple[int, int],
+        conf: float,
+        iou: float,
+        classes: Optional[Sequence[int]],
+        max_det: int,
+    ) -> np.ndarray:
+        """
+        解码单张图像的模型输出
+
+        Args:
+            output: (4 + nc, N)，每列为 [cx, cy, w, h, 各类别置信度]
+
+        Returns:
+            (M, 6) [x1, y1, x2, y2, conf, cls]，坐标已还原到原始图像
+        """
+        predictions = output.T
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_scores)), class_ids]
+
+        mask = scores > conf
+        if classes is not None:
+            mask &= np.isin(class_ids, classes)
+        if not mask.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        xywh, scores, class_ids = predictions[mask, :4], scores[mask], class_ids[mask]
+        xyxy = np.empty_like(xywh)
+        xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+        keep = nms(xyxy, scores, iou, max_det, class_ids)
+        xyxy, scores, class_ids = xyxy[keep], scores[keep], class_ids[keep]
+
+        # 去除填充并还原到原始尺寸
+        xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad[0]) / gain).clip(0, orig_shape[1])
+        xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad[1]) / gain).clip(0, orig_shape[0])
+
+        return np.concatenate(
+            [xyxy, scores[:, None], class_ids[:, None]], axis=1
+        ).astype(np.float32)
+
+    def predict(
+        self,
+        source: Union[np.ndarray, List[np.ndarray]],
+        conf: float = 0.25,
+        iou: float = 0.7,
+        imgsz: Optional[int] = None,
+        classes: Optional[Sequence[int]] = None,
+        max_det: int = 300,
+        **kwargs,
+    ) -> List[OnnxResult]:
+        """
+        检测一帧或多帧
+
+        Args:
+            source: BGR 帧或帧列表
+            conf: 置信度阈值
+            iou: NMS IoU 阈值
+            imgsz: 推理分辨率（仅动态输入尺寸的模型生效）
+            classes: 只保留这些类别
+            max_det: 每帧最多保留的检测框数量
+            **kwargs: 兼容 YOLO.predict 的其它参数（device、verbose 等），ONNX 后端忽略
+
+        Returns:
+            每帧一个 OnnxResult
+        """
+        frames = source if isinstance(source, list) else [source]
+        shape = self._resolve_imgsz(imgsz)
+
+        results = []
+        for frame in frames:
+            blob, gain, pad = self.preprocess(frame, shape)
+            output = self.session.run(None, {self.input_name: blob})[0]
+            orig_shape = frame.shape[:2]
+            data = self._postprocess(output[0], orig_shape, gain, pad, conf, iou, classes, max_det)
+            results.append(OnnxResult(numpy_to_boxes(data, orig_shape), orig_shape))
+        return results
+
+    def track(
+        self,
+        source: np.ndarray,
+        persist: bool = False,
+        **kwargs,
+    ) -> List[OnnxResult]:
+        """
+        检测并跟踪一帧，输出与 YOLO.track 一致（带跟踪ID的 Boxes）
+
+        Args:
+            source: BGR 帧
+            persist: 是否沿用上一次调用的跟踪器
+            **kwargs: 传给 predict() 的参数
+        """
+        if self._tracker is None or not persist:
+            self._tracker = StreamTracker(self.tracker_config)
+
+        result = self.predict(source, **kwargs)[0]
+        result.boxes = self._tracker.update(result.boxes, source)
+        return [result]
@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="流水线")
+
+# 队列满时的处理策略
+DROP_OLDEST = "drop_oldest"  # 丢弃最旧的帧，保证低延迟
+BLOCK = "block"  # 阻塞上游，保证不丢帧
+QUEUE_POLICIES = (DROP_OLDEST, BLOCK)
+
+# 流结束标记，沿流水线逐级传递
+_END_OF_STREAM = object()
+
+
+class PipelineStopped(Exception):
+    """由阶段函数抛出，表示正常结束流水线（不视为错误）"""
+
+
+class BoundedFrameQueue:
+    """有界帧队列
+
+    在 queue.Queue 的基础上增加“满时丢弃最旧帧”的策略和丢帧计数，
+    用于连接流水线中相邻的两个阶段。
+    """
+
+    def __init__(self, maxsize: int = 2, policy: str = DROP_OLDEST):
+        """
+        Args:
+            maxsize: 队列容量（帧数）
+            policy: 队列满时的策略，drop_oldest 或 block
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}，可选: {', '.join(QUEUE_POLICIES)}")
+        if maxsize < 1:
+            raise ValueError(f"队列容量必须大于 0: {maxsize}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, item: Any, stop_event: Optional[threading.Event] = None, force_block: bool = False) -> bool:
+        """
+        放入一个元素
+
+        Args:
+            item: 要放入的元素
+            stop_event: 阻塞等待期间用于提前退出的停止事件
+            force_block: 忽略丢帧策略，强制阻塞放入（用于结束标记）
+
+        Returns:
+            bool: 是否成功放入（因停止事件而放弃时返回 False）
+        """
+        if self.policy == DROP_OLDEST and not force_block:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass  # 消费者刚好取走了元素，重试即可
+
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """取出一个元素，超时抛出 queue.Empty"""
+        return self._queue.get(timeout=timeout)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class FramePipeline:
+    """多线程帧处理流水线
+
+    source -> stage_1 -> stage_2 -> ... -> stage_n
+    每个阶段运行在独立的线程中，阶段之间通过有界队列连接，
+    整体吞吐量由最慢的阶段决定，而不是所有阶段耗时之和。
+
+    - source: 无参函数，返回下一个元素；返回 None 表示流结束
+    - stage: 单参函数，接收上一阶段的输出并返回本阶段的输出；
+      返回 None 表示丢弃该元素；最后一个阶段的返回值被忽略
+    - 任意函数抛出 PipelineStopped 时流水线正常结束，抛出其他异常时记录错误并结束
+    """
+
+    def __init__(
+        self,
+        source: Tuple[str, Callable[[], Any]],
+        stages: List[Tuple[str, Callable[[Any], Any]]],
+        queue_size: int = 2,
+        policy: str = DROP_OLDEST,
+    ):
+        """
+        Args:
+            source: (名称, 取帧函数)
+            stages: [(名称, 处理函数), ...]，按顺序执行
+            queue_size: 阶段之间队列的容量
+            policy: 队列满时的策略，drop_oldest 或 block
+        """
+        if not stages:
+            raise ValueError("流水线至少需要一个处理阶段")
+
+        self.source = source
+        self.stages = stages
+        self.queues = [BoundedFrameQueue(queue_size, policy) for _ in stages]
+        self.processed: Dict[str, int] = {name: 0 for name, _ in [source] + stages}
+        self.error: Optional[BaseException] = None
+
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """启动所有阶段线程"""
+        source_name, source_func = self.source
+        self._threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(source_name, source_func, self.queues[0]),
+                name=f"pipeline-{source_name}",
+                daemon=True,
+            )
+        ]
+
+        for idx, (name, func) in enumerate(self.stages):
+            output_queue = self.queues[idx + 1] if idx + 1 < len(self.queues) else None
+            self._threads.append(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(name, func, self.queues[idx], output_queue),
+                    name=f"pipeline-{name}",
+                    daemon=True,
+                )
+            )
+
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """通知所有阶段尽快退出"""
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待所有阶段线程结束"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def wait(self, poll_interval: float = 0.2) -> None:
+        """阻塞直到流水线结束（支持 Ctrl+C 中断）"""
+        while self.is_running():
+            time.sleep(poll_interval)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各阶段处理帧数及其输入队列的丢帧数"""
+        stats = {self.source[0]: {"processed": self.processed[self.source[0]], "dropped": 0}}
+        for (name, _), stage_queue in zip(self.stages, self.queues):
+            stats[name] = {"processed": self.processed[name], "dropped": stage_queue.dropped}
+        return stats
+
+    def _handle_exception(self, name: str, e: BaseException) -> None:
+        if not isinstance(e, PipelineStopped):
+            logger.error(f"流水线阶段 [{name}] 出错: {e}")
+            self.error = e
+        self.stop()
+
+    def _run_source(self, name: str, func: Callable[[], Any], output_queue: BoundedFrameQueue) -> None:
+        try:
+            while not self._stop_event.is_set():
+                item = func()
+                if item is None:
+                    break
+                self.processed[name] += 1
+                output_queue.put(item, self._stop_event)
+        except BaseException as e:
+            self._handle_exception(name, e)
+        finally:
+            output_queue.put(_END_OF_STREAM, self._stop_event, force_block=True)
+
+    def _run_stage(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        input_queue: BoundedFrameQueue,
+        output_queue: Optional[BoundedFrameQueue],
+    ) -> None:
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    item = input_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                if item is _END_OF_STREAM:
+                    break
+
+                result = func(item)
+                self.processed[name] += 1
+                if output_queue is not None and result is not None:
+                    output_queue.put(result, self._stop_event)
+        except BaseException as e:
+            self._handle_exception(name, e)
+        finally:
+            if output_queue is not None:
+                output_queue.put(_END_OF_STREAM, self._stop_event, force_block=True)
@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -5,6 +6,21 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 
+from service.box_propagation import BoxPropagator, DetectionScheduler
+from service.detections import boxes_to_numpy
+from service.encoder_profile import DEFAULT_PROFILE_PATH, GSTREAMER_BACKEND, EncoderProfile, frame_budget_ms
+from service.frame_buffers import FrameResizer, darken_region
+from service.frame_grabber import LatestFrameGrabber
+from service.gst_pipeline_cache import DEFAULT_CACHE_PATH, METHOD_FOURCC, METHOD_GSTREAMER, GstPipelineCache
+from service.metrics import MetricsServer, StreamMetrics
+from service.model_artifact import load_model_metadata
+from service.motion_gate import MotionGate
+from service.onnx_engine import ENGINES, ONNX_ENGINE, TORCH_ENGINE, OnnxDetector
+from service.rendering import draw_detections
+from service.resolution_controller import ImgszController
+from service.shared_frame_ring import SharedMemoryCapture
+from service.tiled_inference import TiledDetector
+from service.tracking import StreamTracker
 from utils.logger import setup_logger
 
 logger = setup_logger(prefix="推流模块")
@@ -32,6 +48,13 @@ class PushStreamer:
         fps: int = 30,
         bitrate: int = 2000,  # 提高默认比特率到 2Mbps
         headless: bool = False,  # 无头模式，适用于无显示器的设备
+        latest_frame_only: bool = False,  # 后台采集，只处理最新帧
+        capture_process: bool = False,  # 独立进程采集，通过共享内存传递帧
+        engine: str = TORCH_ENGINE,  # 推理后端: torch 或 onnx
+        gst_cache_path: Optional[str | Path] = DEFAULT_CACHE_PATH,  # 编码器探测结果缓存，None 时每次都探测
+        encoder_profile_path: Optional[str | Path] = DEFAULT_PROFILE_PATH,  # 编码器基准测试结果
+        metrics_port: Optional[int] = None,  # /metrics 端点端口，None 时不启动
+        metrics_host: str = "0.0.0.0",
     ):
         """
         初始化推流器 - 使用 GStreamer UDP RTP 推流
@@ -45,6 +68,18 @@ class PushStreamer:
             fps: 帧率
             bitrate: 比特率(kbps)，默认 2000
             headless: 是否启用无头模式（无显示器环境）
+            latest_frame_only: 是否启用后台采集线程，只处理最新帧（推理慢于摄像头时避免延迟累积）
+            capture_process: 是否在独立进程中采集摄像头，帧通过共享内存环形缓冲区传递，
+                解码不再与推理争抢 GIL（只处理最新帧）
+            engine: 推理后端；torch 使用 ultralytics YOLO (.pt)，
+                onnx 使用 ONNX Runtime CPU 推理导出的 .onnx 模型（忽略 device 参数）
+            gst_cache_path: GStreamer 管道探测结果的缓存文件（按主机和 OpenCV 编译区分），
+                下次启动直接打开上次成功的编码器；None 时每次启动都逐个探测
+            encoder_profile_path: 编码器基准测试结果（scripts/benchmark_encoders.py 生成），
+                存在时按延迟预算和 CPU 开销重新排列候选编码器的探测顺序
+            metrics_port: 指标端点端口；设置后以 Prometheus 文本格式在 /metrics 提供
+                各阶段延迟直方图和进程 CPU/内存，None 时只在结束时把延迟分位数写入日志
+            metrics_host: 指标端点监听地址
 
         推流方式:
             使用 GStreamer UDP RTP H.264 推流到远程服务器
@@ -58,12 +93,26 @@ class PushStreamer:
         self.fps = fps
         self.bitrate = bitrate
         self.headless = headless
+        self.latest_frame_only = latest_frame_only
+        self.capture_process = capture_process
+        self.engine = engine
 
-        self.model: Optional[YOLO] = None
-        self.cap: Optional[cv2.VideoCapture] = None
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的推理后端: {engine}，可选: {', '.join(ENGINES)}")
+
+        self.model: Optional[YOLO | OnnxDetector] = None
+        self.cap: Optional[cv2.VideoCapture | LatestFrameGrabber | SharedMemoryCapture] = None
         self.out: Optional[cv2.VideoWriter] = None
         self.gst_pipeline: Optional[str] = None
         self.use_gstreamer = True
+        self.pipeline_cache: Optional[GstPipelineCache] = GstPipelineCache(gst_cache_path) if gst_cache_path else None
+        self.encoder_profile_path = encoder_profile_path
+        self.tiled_detector: Optional[TiledDetector] = None
+        self.tile_tracker: Optional[StreamTracker] = None
+        self.metrics = StreamMetrics(stream=f"{host}:{port}")
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.metrics_server: Optional[MetricsServer] = None
 
         # 设置 GStreamer 推流
         self._setup_gstreamer()
@@ -130,6 +179,9 @@ class PushStreamer:
             ),
         ]
 
+        # 有基准测试结果时，满足延迟预算且 CPU 开销最小的编码器优先
+        self._apply_encoder_profile()
+
         # 默认使用第一个管道
         self.gst_pipeline = self.gst_pipelines[0][0]
         logger.info(f"GStreamer UDP RTP 推流配置完成")
@@ -155,8 +207,18 @@ class PushStreamer:
 
         try:
             logger.info(f"正在加载模型: {self.model_path}")
-            self.model = YOLO(self.model_path)
-            logger.success(f"模型加载成功! 设备: {device}")
+            if self.engine == ONNX_ENGINE:
+                self.model = OnnxDetector(self.model_path)
+                logger.success(f"模型加载成功! 设备: ONNX Runtime CPU, 输入尺寸: {self.model.imgsz}")
+            else:
+                # 推理模型（package_model.py --inference-model）自带元数据，无需加载权重即可读取
+                metadata = load_model_metadata(self.model_path)
+                if metadata is not None:
+                    logger.info(
+                        f"推理模型: {metadata['nc']} 类 | imgsz={metadata['imgsz']} | "
+                        f"{metadata['precision']} | 已预融合")
+                self.model = YOLO(self.model_path)
+                logger.success(f"模型加载成功! 设备: {device}")
             logger.info(f"模型类别: {self.model.names}")
             return True
         except Exception as e:
@@ -174,6 +236,12 @@ class PushStreamer:
             bool: 初始化是否成功
         """
         try:
+            if self.capture_process:
+                self.cap = SharedMemoryCapture(
+                    camera_id, self.video_width, self.video_height, self.fps).start()
+                logger.success(f"摄像头初始化成功 (ID: {camera_id}，独立采集进程)")
+                return True
+
             self.cap = cv2.VideoCapture(camera_id)
             if not self.cap.isOpened():
                 logger.error(f"无法打开摄像头 {camera_id}")
@@ -184,27 +252,117 @@ class PushStreamer:
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.video_height)
             self.cap.set(cv2.CAP_PROP_FPS, self.fps)
 
+            if self.latest_frame_only:
+                self.cap = LatestFrameGrabber(self.cap).start()
+                logger.info("已启用后台采集，仅处理最新帧")
+
             logger.success(f"摄像头初始化成功 (ID: {camera_id})")
             return True
         except Exception as e:
             logger.error(f"摄像头初始化失败: {str(e)}")
             return False
 
+    def _apply_encoder_profile(self) -> None:
+        """按编码器基准测试结果重新排列 self.gst_pipelines，未测试的编码器保持原顺序排在最后"""
+        profile = EncoderProfile.load(self.encoder_profile_path) if self.encoder_profile_path else None
+        if profile is None or not profile.matches(self.video_width, self.video_height, self.fps):
+            return
+
+        ranked = profile.rank(GSTREAMER_BACKEND, frame_budget_ms(self.fps))
+        if not ranked:
+            return
+
+        order = {name: index for index, name in enumerate(ranked)}
+        self.gst_pipelines.sort(key=lambda item: order.get(item[1], len(order)))
+        logger.info(f"按基准测试结果排列编码器: {', '.join(name for _, name in self.gst_pipelines)}")
+
+    def _open_writer(self, pipeline: str, method: str) -> Optional[cv2.VideoWriter]:
+        """
+        用指定方式打开 GStreamer 管道
+
+        Args:
+            pipeline: GStreamer 管道字符串
+            method: METHOD_GSTREAMER（CAP_GSTREAMER + fourcc=0）或 METHOD_FOURCC（传统 fourcc）
+
+        Returns:
+            打开成功的 VideoWriter，失败时返回 None
+        """
+        if method == METHOD_GSTREAMER:
+            writer = cv2.VideoWriter(
+                pipeline,
+                cv2.CAP_GSTREAMER,
+                0,  # fourcc 设为 0，让 GStreamer 自动处理
+                float(self.fps),
+                (self.video_width, self.video_height),
+                True
+            )
+        else:
+            fourcc = cv2.VideoWriter_fourcc(*'H264')
+            writer = cv2.VideoWriter(
+                pipeline,
+                fourcc,
+                float(self.fps),
+                (self.video_width, self.video_height),
+                True
+            )
+        return writer if writer.isOpened() else None
+
+    def _open_cached_pipeline(self) -> Optional[bool]:
+        """
+        按缓存的探测结果直接打开管道
+
+        Returns:
+            True: 已打开缓存的管道；False: 缓存记录 OpenCV 不支持 GStreamer；
+            None: 没有缓存或缓存的管道打不开，需要重新探测
+        """
+        cached = self.pipeline_cache.load()
+        if cached is None:
+            return None
+        if not cached["has_gstreamer"]:
+            return False
+
+        for pipeline, encoder_name in self.gst_pipelines:
+            if encoder_name != cached["encoder"]:
+                continue
+            try:
+                self.out = self._open_writer(pipeline, cached["method"])
+            except Exception as e:
+                logger.debug(f"缓存的编码器 {encoder_name} 打开失败: {str(e)}")
+                self.out = None
+            if self.out is not None:
+                logger.success(f"GStreamer 推流初始化成功！使用编码器: {encoder_name}（缓存）")
+                self.gst_pipeline = pipeline
+                return True
+            break
+
+        logger.info(f"缓存的编码器 {cached['encoder']} 不可用，重新探测")
+        self.pipeline_cache.invalidate()
+        return None
+
     def _init_video_writer(self) -> bool:
         """
         初始化视频写入器（用于GStreamer推流）
 
+        优先使用缓存的编码器和打开方式，缓存不可用时才逐个探测，
+        并把第一个成功的管道写入缓存。
+
         Returns:
             bool: 初始化是否成功
         """
         try:
+            cached = self._open_cached_pipeline() if self.pipeline_cache is not None else None
+            if cached is True:
+                return True
+
             # 检查 OpenCV 是否支持 GStreamer
-            opencv_build_info = cv2.getBuildInformation()
-            has_gstreamer = 'GStreamer' in opencv_build_info
+            # 缓存已记录不支持时无需再检查
+            has_gstreamer = cached is None and 'GStreamer' in cv2.getBuildInformation()
 
             if not has_gstreamer:
                 logger.warning("OpenCV 未编译 GStreamer 支持")
                 logger.info("将使用替代方案：直接显示检测结果")
+                if self.pipeline_cache is not None and cached is None:
+                    self.pipeline_cache.save(has_gstreamer=False)
                 self.use_gstreamer = False
                 return True  # 使用替代方案，返回成功
 
@@ -217,42 +375,21 @@ class PushStreamer:
                     f"尝试编码器 {idx}/{len(self.gst_pipelines)}: {encoder_name}")
 
                 # 方法 1: 使用 CAP_GSTREAMER 和 fourcc=0
-                try:
-                    self.out = cv2.VideoWriter(
-                        pipeline,
-                        cv2.CAP_GSTREAMER,
-                        0,  # fourcc 设为 0，让 GStreamer 自动处理
-                        float(self.fps),
-                        (self.video_width, self.video_height),
-                        True
-                    )
-
-                    if self.out.isOpened():
-                        logger.success(
-                            f"GStreamer 推流初始化成功！使用编码器: {encoder_name}")
-                        self.gst_pipeline = pipeline  # 更新为工作的管道
-                        return True
-                except Exception as e:
-                    logger.debug(f"编码器 {encoder_name} (方法1) 失败: {str(e)}")
-
                 # 方法 2: 使用传统的 fourcc 方式
-                try:
-                    fourcc = cv2.VideoWriter_fourcc(*'H264')
-                    self.out = cv2.VideoWriter(
-                        pipeline,
-                        fourcc,
-                        float(self.fps),
-                        (self.video_width, self.video_height),
-                        True
-                    )
-
-                    if self.out.isOpened():
+                for method_idx, method in enumerate((METHOD_GSTREAMER, METHOD_FOURCC), 1):
+                    try:
+                        self.out = self._open_writer(pipeline, method)
+                    except Exception as e:
+                        logger.debug(f"编码器 {encoder_name} (方法{method_idx}) 失败: {str(e)}")
+                        continue
+
+                    if self.out is not None:
                         logger.success(
                             f"GStreamer 推流初始化成功！使用编码器: {encoder_name}")
                         self.gst_pipeline = pipeline  # 更新为工作的管道
+                        if self.pipeline_cache is not None:
+                            self.pipeline_cache.save(has_gstreamer=True, encoder=encoder_name, method=method)
                         return True
-                except Exception as e:
-                    logger.debug(f"编码器 {encoder_name} (方法2) 失败: {str(e)}")
 
             # 所有编码器都失败
             logger.warning("所有 GStreamer 编码器都初始化失败")
@@ -273,6 +410,54 @@ class PushStreamer:
             self.out = None
             return True  # 使用替代方案，返回成功
 
+    def _run_detection(
+        self,
+        frame: np.ndarray,
+        conf: float,
+        iou: float,
+        device: str,
+        enable_tracking: bool,
+        imgsz: Optional[int] = None
+    ):
+        """
+        运行检测或跟踪
+
+        Args:
+            imgsz: 推理分辨率，None 时使用模型默认值
+
+        Returns:
+            检测结果 boxes（无结果时为 None）
+        """
+        if self.tiled_detector is not None:
+            # 切片推理使用固定的切片大小，忽略 imgsz
+            boxes = self.tiled_detector.predict(frame, conf=conf, iou=iou, device=device)
+            return self.tile_tracker.update(boxes, frame) if self.tile_tracker is not None else boxes
+
+        extra_args = {"imgsz": imgsz} if imgsz is not None else {}
+        if enable_tracking:
+            results = self.model.track(
+                frame,
+                conf=conf,
+                iou=iou,
+                device=device,
+                persist=True,
+                verbose=False,
+                **extra_args
+            )
+        else:
+            results = self.model.predict(
+                frame,
+                conf=conf,
+                iou=iou,
+                device=device,
+                verbose=False,
+                **extra_args
+            )
+
+        if results and len(results) > 0:
+            return results[0].boxes
+        return None
+
     def _draw_detections(
         self,
         frame: np.ndarray,
@@ -284,70 +469,21 @@ class PushStreamer:
 
         Args:
             frame: 输入帧
-            boxes: YOLO检测结果boxes
+            boxes: YOLO检测结果boxes、boxes_to_numpy() 的输出或 None
             show_labels: 是否显示标签
 
         Returns:
             绘制后的帧
         """
-        if boxes is None or len(boxes) == 0:
-            return frame
-
-        for box in boxes:
-            # 获取边界框坐标
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-            # 获取置信度和类别
-            conf = float(box.conf[0])
-            cls = int(box.cls[0])
-
-            # 获取跟踪ID（如果有）
-            track_id = int(box.id[0]) if box.id is not None else None
-
-            # 绘制边界框
-            color = (0, 255, 0)  # 绿色
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-
-            # 绘制标签
-            if show_labels:
-                label = f"{self.model.names[cls]}"
-                if track_id is not None:
-                    label += f" ID:{track_id}"
-                label += f" {conf:.2f}"
-
-                # 计算标签背景大小
-                (text_width, text_height), baseline = cv2.getTextSize(
-                    label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
-                )
-
-                # 绘制标签背景
-                cv2.rectangle(
-                    frame,
-                    (x1, y1 - text_height - baseline - 5),
-                    (x1 + text_width, y1),
-                    color,
-                    -1
-                )
-
-                # 绘制标签文本
-                cv2.putText(
-                    frame,
-                    label,
-                    (x1, y1 - baseline - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 0, 0),
-                    1
-                )
-
-        return frame
+        return draw_detections(frame, boxes, self.model.names, show_labels=show_labels)
 
     def _add_info_overlay(
         self,
         frame: np.ndarray,
         frame_count: int,
         detection_count: int,
-        fps_value: float
+        fps_value: float,
+        imgsz: Optional[int] = None
     ) -> np.ndarray:
         """
         添加信息叠加层
@@ -357,21 +493,19 @@ class PushStreamer:
             frame_count: 帧计数
             detection_count: 检测数量
             fps_value: 实际FPS
+            imgsz: 当前推理分辨率（自适应分辨率模式下显示）
 
         Returns:
             添加信息后的帧
         """
-        # 添加半透明背景
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (10, 10), (300, 100), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
-
-        # 添加文本信息
+        # 文本信息
         info_texts = [
             f"Frame: {frame_count}",
             f"Detections: {detection_count}",
             f"FPS: {fps_value:.1f}",
         ]
+        if imgsz is not None:
+            info_texts.append(f"Imgsz: {imgsz}")
 
         # 根据推流状态添加不同的信息
         if self.use_gstreamer:
@@ -379,6 +513,9 @@ class PushStreamer:
         else:
             info_texts.append("Status: Preview Only (No Streaming)")
 
+        # 添加半透明背景（高度随文本行数变化），只在面板 ROI 上原地混合
+        darken_region(frame, (10, 10), (300, 20 + 20 * len(info_texts)), alpha=0.5)
+
         y_offset = 30
         for text in info_texts:
             cv2.putText(
@@ -409,6 +546,10 @@ class PushStreamer:
             cv2.destroyAllWindows()
             logger.info("所有窗口已关闭")
 
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
     def gstreamer_setup(self) -> None:
         """配置GStreamer推流参数（向后兼容的方法）"""
         self._setup_gstreamer()
@@ -420,7 +561,18 @@ class PushStreamer:
         iou: float = 0.45,
         device: str = "mps",
         show_preview: bool = True,
-        enable_tracking: bool = True
+        enable_tracking: bool = True,
+        detect_interval: int = 1,
+        adaptive_interval: bool = False,
+        imgsz: Optional[int] = None,
+        adaptive_imgsz: bool = False,
+        imgsz_levels: Tuple[int, ...] = (640, 480, 320),
+        motion_gate: bool = False,
+        motion_threshold: float = 0.005,
+        motion_recheck_interval: int = 30,
+        tile_size: Optional[int] = None,
+        tile_overlap: float = 0.2,
+        tile_selective: bool = False
     ) -> None:
         """
         开始推流检测
@@ -432,11 +584,31 @@ class PushStreamer:
             device: 推理设备
             show_preview: 是否显示预览窗口
             enable_tracking: 是否启用目标跟踪
+            detect_interval: 每隔多少帧运行一次检测器，中间帧按跟踪ID的运动外推检测框
+            adaptive_interval: 是否根据检测耗时自动调整检测间隔（保持输出帧率）
+            imgsz: 推理分辨率，None 时使用模型默认值
+            adaptive_imgsz: 是否根据实测 FPS 自动调整推理分辨率
+            imgsz_levels: 自适应分辨率可选的档位（从高到低）
+            motion_gate: 是否启用运动门控；画面相对上一次检测没有变化时跳过检测器，沿用上一次的检测结果
+            motion_threshold: 变化像素占比超过该值时认为有运动
+            motion_recheck_interval: 画面静止时强制检测的间隔（帧）
+            tile_size: 启用切片推理时的切片大小（同时作为推理分辨率），None 时整帧推理
+            tile_overlap: 相邻切片的重叠比例
+            tile_selective: 是否只对整帧粗检测发现目标或画面有运动的切片做推理
         """
         # 加载模型
         if not self._load_model(device):
             return
 
+        # 切片推理：高分辨率画面按原始分辨率切片检测小目标
+        if tile_size is not None:
+            self.tiled_detector = TiledDetector(
+                self.model, tile_size=tile_size, overlap=tile_overlap, selective=tile_selective)
+            self.tile_tracker = StreamTracker() if enable_tracking else None
+            logger.info(
+                f"切片推理已启用: {tile_size}px 切片, 重叠 {tile_overlap:.0%}"
+                f"{', 仅推理有目标或运动的切片' if tile_selective else ''}")
+
         # 初始化摄像头
         if not self._init_camera(camera_id):
             return
@@ -453,6 +625,38 @@ class PushStreamer:
             logger.warning("⚠️  GStreamer 不可用，仅显示检测预览")
             logger.info("如需推流功能，请安装支持 GStreamer 的 OpenCV")
         logger.info(f"跟踪模式: {'开启' if enable_tracking else '关闭'}")
+
+        # 隔帧检测：中间帧使用运动模型外推检测框
+        scheduler: Optional[DetectionScheduler] = None
+        propagator: Optional[BoxPropagator] = None
+        if detect_interval > 1 or adaptive_interval:
+            scheduler = DetectionScheduler(
+                interval=detect_interval,
+                adaptive=adaptive_interval,
+                target_fps=self.fps
+            )
+            propagator = BoxPropagator()
+            interval_desc = "自适应" if adaptive_interval else f"每 {detect_interval} 帧"
+            logger.info(f"检测频率: {interval_desc}（中间帧按运动模型外推）")
+            if not enable_tracking:
+                logger.warning("未启用跟踪，中间帧检测框将保持静止")
+
+        # 运动门控：静止画面沿用上一次的检测结果
+        gate: Optional[MotionGate] = None
+        if motion_gate:
+            gate = MotionGate(threshold=motion_threshold, recheck_interval=motion_recheck_interval)
+            logger.info(f"运动门控: 阈值 {motion_threshold:.2%}，静止时每 {motion_recheck_interval} 帧强制检测")
+
+        # 自适应推理分辨率
+        imgsz_controller: Optional[ImgszController] = None
+        if adaptive_imgsz:
+            imgsz_controller = ImgszController(
+                target_fps=self.fps,
+                levels=imgsz_levels,
+                initial_imgsz=imgsz
+            )
+            imgsz = imgsz_controller.imgsz
+            logger.info(f"自适应推理分辨率: 档位 {imgsz_controller.levels}，初始 {imgsz}")
         logger.info(
             f"运行模式: {'无头模式 (Headless)' if self.headless else '图形界面模式'}")
         logger.info(
@@ -460,53 +664,66 @@ class PushStreamer:
         logger.info("按 Ctrl+C 退出")
         logger.info("-" * 50)
 
+        # 缩放和信息叠加复用预分配的缓冲区，避免每帧分配整帧大小的数组
+        resizer = FrameResizer(self.video_width, self.video_height)
+
+        # 各阶段耗时写入延迟直方图，设置端口时通过 /metrics 提供
+        metrics = self.metrics
+        if self.metrics_port is not None:
+            try:
+                self.metrics_server = MetricsServer([metrics], port=self.metrics_port, host=self.metrics_host).start()
+            except OSError as e:
+                logger.warning(f"⚠️  指标端点启动失败: {e}")
+
         frame_count = 0
+        last_boxes = None
         fps_counter = cv2.getTickFrequency()
         fps_value = 0.0
         prev_time = cv2.getTickCount()
 
         try:
             while True:
-                ret, frame = self.cap.read()
+                with metrics.time("capture"):
+                    ret, frame = self.cap.read()
                 if not ret:
                     logger.error("无法读取摄像头帧")
                     break
 
                 frame_count += 1
 
-                # 调整帧大小
-                frame = cv2.resize(
-                    frame, (self.video_width, self.video_height))
-
-                # 进行检测或跟踪
-                if enable_tracking:
-                    results = self.model.track(
-                        frame,
-                        conf=conf,
-                        iou=iou,
-                        device=device,
-                        persist=True,
-                        verbose=False
-                    )
+                # 调整帧大小（写入预分配的缓冲区）
+                with metrics.time("resize"):
+                    frame = resizer.resize(frame)
+
+                # 进行检测或跟踪（隔帧检测模式下中间帧外推检测框，静止画面沿用上一次的检测结果）
+                infer_time = None
+                if scheduler is not None and not scheduler.should_detect(frame_count):
+                    boxes = propagator.predict(frame_count, frame.shape)
+                elif gate is not None and not gate.should_detect(frame, frame_count):
+                    if scheduler is not None:
+                        # 门控取消了调度器要求的检测：继续外推，并让调度器从本帧重新计算间隔
+                        scheduler.skip(frame_count)
+                        boxes = propagator.predict(frame_count, frame.shape)
+                    else:
+                        boxes = last_boxes
                 else:
-                    results = self.model.predict(
-                        frame,
-                        conf=conf,
-                        iou=iou,
-                        device=device,
-                        verbose=False
-                    )
-
-                # 获取检测结果
-                if results and len(results) > 0:
-                    result = results[0]
-                    boxes = result.boxes
-                    detection_count = len(boxes) if boxes is not None else 0
-
-                    # 绘制检测结果
-                    frame = self._draw_detections(frame, boxes)
-                else:
-                    detection_count = 0
+                    detect_start = time.perf_counter()
+                    boxes = self._run_detection(
+                        frame, conf, iou, device, enable_tracking, imgsz)
+                    infer_time = time.perf_counter() - detect_start
+                    metrics.observe("inference", infer_time)
+                    last_boxes = boxes
+
+                # 整帧只做一次 tensor -> NumPy 传输，外推和绘制共用
+                data = boxes_to_numpy(boxes)
+                if infer_time is not None and scheduler is not None:
+                    scheduler.record_detection(frame_count, infer_time)
+                    propagator.update(data, frame_count)
+
+                # 绘制检测结果
+                detection_count = len(data)
+                with metrics.time("draw"):
+                    frame = self._draw_detections(frame, data)
 
                 # 计算FPS
                 curr_time = cv2.getTickCount()
@@ -514,22 +731,32 @@ class PushStreamer:
                 prev_time = curr_time
 
                 # 添加信息叠加
-                frame = self._add_info_overlay(
-                    frame,
-                    frame_count,
-                    detection_count,
-                    fps_value
-                )
+                with metrics.time("overlay"):
+                    frame = self._add_info_overlay(
+                        frame,
+                        frame_count,
+                        detection_count,
+                        fps_value,
+                        imgsz if imgsz_controller is not None else None
+                    )
+
+                # 根据实测 FPS 调整下一帧的推理分辨率
+                if imgsz_controller is not None:
+                    imgsz = imgsz_controller.update(fps_value, infer_time)
 
                 # 推流（如果启用了 GStreamer）
                 if self.use_gstreamer and self.out is not None:
-                    self.out.write(frame)
+                    with metrics.time("encode"):
+                        self.out.write(frame)
+                metrics.frame_done()
 
                 # 显示预览（仅在非无头模式且需要预览时）
                 if not self.headless and show_preview:
                     window_title = '推流预览 - 按q退出' if self.use_gstreamer else '检测预览 - 按q退出 (无推流)'
-                    cv2.imshow(window_title, frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    with metrics.time("preview"):
+                        cv2.imshow(window_title, frame)
+                        key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
                         logger.info("用户退出")
                         break
                 elif not self.headless:
@@ -539,10 +766,21 @@ class PushStreamer:
                 # 显示状态
                 if frame_count % 30 == 0:
                     stream_status = "推流中" if self.use_gstreamer else "仅预览"
-                    logger.info(
+                    status_msg = (
                         f"[{stream_status}] 帧: {frame_count} | 检测: {detection_count} | "
                         f"FPS: {fps_value:.1f}"
                     )
+                    if imgsz_controller is not None:
+                        status_msg += f" | 推理分辨率: {imgsz}"
+                    if scheduler is not None:
+                        status_msg += f" | 检测间隔: {scheduler.interval} | 已检测: {scheduler.detect_count}"
+                    if gate is not None:
+                        gate_stats = gate.stats()
+                        status_msg += f" | 运动门控: 跳过 {gate_stats['gated']} / 检测 {gate_stats['ungated']}"
+                    if isinstance(self.cap, (LatestFrameGrabber, SharedMemoryCapture)):
+                        grab_stats = self.cap.stats()
+                        status_msg += f" | 采集: {grab_stats['grabbed']} | 丢弃旧帧: {grab_stats['dropped']}"
+                    logger.info(status_msg)
 
         except KeyboardInterrupt:
             logger.warning("检测被用户中断")
@@ -552,6 +790,12 @@ class PushStreamer:
             self._cleanup()
             status_msg = "推流完成" if self.use_gstreamer else "检测完成"
             logger.success(f"{status_msg}! 共处理 {frame_count} 帧")
+            if gate is not None:
+                gate_stats = gate.stats()
+                logger.info(
+                    f"运动门控统计: 跳过 {gate_stats['gated']} 帧 | 检测 {gate_stats['ungated']} 帧 | "
+                    f"跳过比例: {gate_stats['gated_ratio']:.0%}")
+            metrics.log_summary()
 
     def webcam_detect_with_tracking(
         self,
@@ -1,12 +1,37 @@
 import subprocess
 import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import cv2
 import numpy as np
 from ultralytics import YOLO
 
+from service.bitrate_controller import BitrateController, FeedbackListener
+from service.box_propagation import BoxPropagator, DetectionScheduler
+from service.detections import boxes_to_numpy
+from service.encoder_profile import (
+    DEFAULT_FFMPEG_ENCODER,
+    DEFAULT_PROFILE_PATH,
+    FFMPEG_BACKEND,
+    FFMPEG_ENCODERS,
+    EncoderProfile,
+    build_encoder_args,
+    frame_budget_ms,
+)
+from service.ffmpeg_writer import FFmpegFrameWriter
+from service.frame_buffers import I420Converter
+from service.frame_grabber import LatestFrameGrabber
+from service.metrics import MetricsServer, StreamMetrics
+from service.model_artifact import load_model_metadata
+from service.motion_gate import MotionGate
+from service.onnx_engine import ENGINES, ONNX_ENGINE, TORCH_ENGINE, OnnxDetector
+from service.pipeline import DROP_OLDEST, FramePipeline, PipelineStopped
+from service.rendering import draw_detections
+from service.shared_frame_ring import SharedMemoryCapture
+from service.tiled_inference import TiledDetector
+from service.tracking import StreamTracker
 from utils.logger import setup_logger
 
 logger = setup_logger(prefix="FFmpeg推流")
@@ -33,6 +58,32 @@ class FFmpegPushStreamer:
         bitrate: int = 400,  # kbps
         camera_device: int = 0,  # 摄像头设备ID
         headless: bool = True,
+        pipelined: bool = False,  # 流水线模式：采集/推理/绘制/写入并行
+        queue_size: int = 2,
+        queue_policy: str = DROP_OLDEST,
+        latest_frame_only: bool = False,  # 后台采集，只处理最新帧
+        capture_process: bool = False,  # 独立进程采集，通过共享内存传递帧
+        pipe_pix_fmt: str = "bgr24",  # FFmpeg 管道像素格式: bgr24 或 yuv420p
+        async_write: bool = False,  # 独立线程零拷贝写入 FFmpeg
+        write_queue_size: int = 2,
+        enable_tracking: bool = False,  # 使用 model.track 为检测框分配跟踪ID
+        detect_interval: int = 1,  # 每隔多少帧运行一次检测器
+        adaptive_interval: bool = False,
+        adaptive_bitrate: bool = False,  # 根据接收端反馈自动调整码率
+        feedback_port: int = 5006,
+        min_bitrate: Optional[int] = None,
+        max_bitrate: Optional[int] = None,
+        engine: str = TORCH_ENGINE,  # 推理后端: torch 或 onnx
+        encoder: Optional[str] = None,  # H.264 编码器，None 时按基准测试结果自动选择
+        encoder_profile_path: Optional[str | Path] = DEFAULT_PROFILE_PATH,
+        motion_gate: bool = False,  # 画面静止时跳过检测器
+        motion_threshold: float = 0.005,
+        motion_recheck_interval: int = 30,
+        tile_size: Optional[int] = None,  # 切片推理的切片大小，None 时整帧推理
+        tile_overlap: float = 0.2,
+        tile_selective: bool = False,
+        metrics_port: Optional[int] = None,  # /metrics 端点端口，None 时不启动
+        metrics_host: str = "0.0.0.0",
     ):
         """
         初始化 FFmpeg 推流器
@@ -47,6 +98,41 @@ class FFmpegPushStreamer:
             bitrate: 比特率(kbps)
             camera_device: 摄像头设备ID或路径（Linux: /dev/video4）
             headless: 无头模式
+            pipelined: 是否启用流水线模式（采集、推理、绘制、FFmpeg 写入各自运行在独立线程）
+            queue_size: 流水线阶段之间的队列容量
+            queue_policy: 队列满时的策略，drop_oldest（丢弃最旧帧）或 block（阻塞上游）
+            latest_frame_only: 是否启用后台采集线程，只处理最新帧（推理慢于摄像头时避免延迟累积）
+            capture_process: 是否在独立进程中采集摄像头，帧通过共享内存环形缓冲区传递，
+                解码不再与推理、绘制、管道写入争抢 GIL（只处理最新帧）
+            pipe_pix_fmt: 写入 FFmpeg 管道的像素格式；yuv420p 在进程内转换为 I420，
+                管道带宽减半（要求宽高为偶数）
+            async_write: 是否在独立线程中以零拷贝方式写入 FFmpeg（编码变慢时丢帧而不阻塞推理）
+            write_queue_size: 异步写入队列容量
+            enable_tracking: 是否启用目标跟踪（model.track），检测框带跟踪ID
+            detect_interval: 每隔多少帧运行一次检测器，中间帧按跟踪ID的运动外推检测框
+                （大于 1 时总是使用 model.track 获取跟踪ID）
+            adaptive_interval: 是否根据检测耗时自动调整检测间隔（保持输出帧率）
+            adaptive_bitrate: 是否根据接收端回传的丢包/抖动报告自动调整码率和分辨率
+                （接收端运行 scripts/receive_stream.py 的反馈模式）
+            feedback_port: 接收反馈报告的 UDP 端口
+            min_bitrate: 自适应码率下限 (kbps)，默认 bitrate 的 1/4
+            max_bitrate: 自适应码率上限 (kbps)，默认等于 bitrate
+            engine: 推理后端；torch 使用 ultralytics YOLO (.pt)，
+                onnx 使用 ONNX Runtime CPU 推理导出的 .onnx 模型
+            encoder: FFmpeg H.264 编码器（libx264、h264_v4l2m2m、h264_nvenc 等）；
+                None 时从编码器基准测试结果中选择满足延迟预算且 CPU 开销最小的编码器，
+                没有测试结果时使用 libx264
+            encoder_profile_path: 编码器基准测试结果（scripts/benchmark_encoders.py 生成）
+            motion_gate: 是否启用运动门控；画面相对上一次检测没有变化时跳过检测器，沿用上一次的检测结果
+            motion_threshold: 变化像素占比超过该值时认为有运动
+            motion_recheck_interval: 画面静止时强制检测的间隔（帧）
+            tile_size: 启用切片推理时的切片大小（同时作为推理分辨率）；高分辨率画面中远处的小目标
+                在整帧缩放到模型输入尺寸后会丢失，切片推理按原始分辨率检测。None 时整帧推理
+            tile_overlap: 相邻切片的重叠比例
+            tile_selective: 是否只对整帧粗检测发现目标或画面有运动的切片做推理
+            metrics_port: 指标端点端口；设置后以 Prometheus 文本格式在 /metrics 提供
+                各阶段延迟直方图（采集、推理、绘制、缩放、编码写入、预览）和进程 CPU/内存
+            metrics_host: 指标端点监听地址
         """
         self.model_path = model_path
         self.host = host
@@ -57,14 +143,90 @@ class FFmpegPushStreamer:
         self.bitrate = bitrate
         self.camera_device = camera_device
         self.headless = headless
-
-        self.model: Optional[YOLO] = None
-        self.cap: Optional[cv2.VideoCapture] = None
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.latest_frame_only = latest_frame_only
+        self.capture_process = capture_process
+        self.pipe_pix_fmt = pipe_pix_fmt
+        self.async_write = async_write
+        self.write_queue_size = write_queue_size
+        self.enable_tracking = enable_tracking
+        self.detect_interval = detect_interval
+        self.adaptive_interval = adaptive_interval
+        self.adaptive_bitrate = adaptive_bitrate
+        self.feedback_port = feedback_port
+        self.min_bitrate = min_bitrate or max(1, bitrate // 4)
+        self.max_bitrate = max_bitrate or bitrate
+        self.engine = engine
+
+        self.model: Optional[YOLO | OnnxDetector] = None
+        self.cap: Optional[cv2.VideoCapture | LatestFrameGrabber | SharedMemoryCapture] = None
         self.ffmpeg_process: Optional[subprocess.Popen] = None
         self.ffmpeg_monitor_thread: Optional[threading.Thread] = None
+        self.pipeline: Optional[FramePipeline] = None
+        self.i420_converter: Optional[I420Converter] = None
+        self.frame_writer: Optional[FFmpegFrameWriter] = None
+        self.bitrate_controller: Optional[BitrateController] = None
+        self.feedback_listener: Optional[FeedbackListener] = None
+
+        # 各阶段延迟直方图（流水线模式下由各阶段线程分别记录）
+        self.metrics = StreamMetrics(stream=f"{host}:{port}")
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.metrics_server: Optional[MetricsServer] = None
+
+        # 隔帧检测：中间帧使用运动模型外推检测框
+        self.scheduler: Optional[DetectionScheduler] = None
+        self.propagator: Optional[BoxPropagator] = None
+        if detect_interval > 1 or adaptive_interval:
+            self.scheduler = DetectionScheduler(
+                interval=detect_interval,
+                adaptive=adaptive_interval,
+                target_fps=fps
+            )
+            self.propagator = BoxPropagator()
+
+        # 切片推理：模型加载后创建
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_selective = tile_selective
+        self.tiled_detector: Optional[TiledDetector] = None
+        self.tile_tracker: Optional[StreamTracker] = None
+
+        # 运动门控：静止画面沿用上一次的检测结果
+        self.motion_gate: Optional[MotionGate] = None
+        self._last_boxes = None
+        if motion_gate:
+            self.motion_gate = MotionGate(threshold=motion_threshold, recheck_interval=motion_recheck_interval)
+
+        self.encoder = encoder or self._select_encoder(encoder_profile_path)
+        if self.encoder not in FFMPEG_ENCODERS:
+            raise ValueError(f"不支持的编码器: {self.encoder}，可选: {', '.join(FFMPEG_ENCODERS)}")
+
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的推理后端: {engine}，可选: {', '.join(ENGINES)}")
+
+        if pipe_pix_fmt not in ("bgr24", "yuv420p"):
+            raise ValueError(f"不支持的管道像素格式: {pipe_pix_fmt}，可选: bgr24, yuv420p")
 
         logger.info(
-            f"📹 推流配置: {host}:{port} | {video_width}x{video_height}@{fps}fps | {bitrate}kbps")
+            f"📹 推流配置: {host}:{port} | {video_width}x{video_height}@{fps}fps | {bitrate}kbps | {self.encoder}")
+
+    def _select_encoder(self, profile_path: Optional[str | Path]) -> str:
+        """按编码器基准测试结果选择满足延迟预算且 CPU 开销最小的编码器"""
+        profile = EncoderProfile.load(profile_path) if profile_path else None
+        if profile is None:
+            return DEFAULT_FFMPEG_ENCODER
+        if not profile.matches(self.video_width, self.video_height, self.fps):
+            logger.info("编码器基准测试结果与当前分辨率/帧率不一致，使用默认编码器")
+            return DEFAULT_FFMPEG_ENCODER
+
+        ranked = [name for name in profile.rank(FFMPEG_BACKEND, frame_budget_ms(self.fps)) if name in FFMPEG_ENCODERS]
+        if not ranked:
+            return DEFAULT_FFMPEG_ENCODER
+        logger.info(f"按基准测试结果选择编码器: {ranked[0]}（候选: {', '.join(ranked)}）")
+        return ranked[0]
 
     def _load_model(self) -> bool:
         """加载 YOLO 模型"""
@@ -75,13 +237,33 @@ class FFmpegPushStreamer:
 
         try:
             logger.info(f"正在加载模型: {self.model_path}")
-            self.model = YOLO(self.model_path)
-
-            # 强制使用 CPU，避免 CUDA 错误
-            self.model.to('cpu')
-
-            logger.success(f"模型加载成功! (使用 CPU)")
+            if self.engine == ONNX_ENGINE:
+                self.model = OnnxDetector(self.model_path)
+                logger.success(f"模型加载成功! (ONNX Runtime CPU, 输入尺寸: {self.model.imgsz})")
+            else:
+                # 推理模型（package_model.py --inference-model）自带元数据，无需加载权重即可读取
+                metadata = load_model_metadata(self.model_path)
+                if metadata is not None:
+                    logger.info(
+                        f"推理模型: {metadata['nc']} 类 | imgsz={metadata['imgsz']} | "
+                        f"{metadata['precision']} | 已预融合")
+                self.model = YOLO(self.model_path)
+
+                # 强制使用 CPU，避免 CUDA 错误
+                self.model.to('cpu')
+
+                logger.success(f"模型加载成功! (使用 CPU)")
             logger.info(f"模型类别: {self.model.names}")
+
+            if self.tile_size is not None:
+                self.tiled_detector = TiledDetector(
+                    self.model, tile_size=self.tile_size, overlap=self.tile_overlap, selective=self.tile_selective)
+                if self.scheduler is not None or self.enable_tracking:
+                    # 切片结果不经过 model.track，跟踪ID由独立的跟踪器提供
+                    self.tile_tracker = StreamTracker()
+                logger.info(
+                    f"切片推理已启用: {self.tile_size}px 切片, 重叠 {self.tile_overlap:.0%}"
+                    f"{', 仅推理有目标或运动的切片' if self.tile_selective else ''}")
             return True
         except Exception as e:
             logger.error(f"模型加载失败: {str(e)}")
@@ -90,6 +272,20 @@ class FFmpegPushStreamer:
     def _init_camera(self) -> bool:
         """初始化摄像头"""
         try:
+            if self.capture_process:
+                # 帧复制到读取方的缓冲区后在其中绘制和写入，缓冲区轮转使用，数量必须不少于同时存活的帧数：
+                # - 顺序模式：正在处理的帧 + 正在读取的帧 = 2
+                # - 流水线模式：3 个阶段队列各 queue_size 帧，加上采集、推理、绘制、写入线程各持有 1 帧
+                # - 异步写入：写入队列中的 write_queue_size 帧，加上写入线程正在写入管道的 1 帧
+                num_buffers = 3 * self.queue_size + 4 if self.pipelined else 2
+                if self.async_write:
+                    num_buffers += self.write_queue_size + 1
+                self.cap = SharedMemoryCapture(
+                    self.camera_device, self.video_width, self.video_height, self.fps, num_buffers=num_buffers
+                ).start()
+                logger.success(f"摄像头初始化成功: {self.video_width}x{self.video_height}（独立采集进程）")
+                return True
+
             # 支持设备ID或设备路径
             if isinstance(self.camera_device, str):
                 logger.info(f"打开摄像头设备: {self.camera_device}")
@@ -117,11 +313,69 @@ class FFmpegPushStreamer:
             actual_height = frame.shape[0]
             logger.success(f"摄像头初始化成功: {actual_width}x{actual_height}")
 
+            if self.latest_frame_only:
+                self.cap = LatestFrameGrabber(self.cap).start()
+                logger.info("已启用后台采集，仅处理最新帧")
+
             return True
         except Exception as e:
             logger.error(f"摄像头初始化失败: {str(e)}")
             return False
 
+    def _build_ffmpeg_cmd(self, bitrate: int, output_size: Optional[Tuple[int, int]] = None) -> List[str]:
+        """构建 FFmpeg 命令
+
+        Args:
+            bitrate: 编码码率 (kbps)
+            output_size: 编码输出尺寸 (宽, 高)；与输入尺寸不同时在 FFmpeg 内缩放，
+                管道输入尺寸保持不变
+        """
+        # 对应 GStreamer 的参数设置
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-f', 'rawvideo',           # 输入格式：原始视频
+            '-pix_fmt', self.pipe_pix_fmt,  # bgr24: OpenCV 原始格式; yuv420p: 进程内已转换为 I420
+            '-s', f'{self.video_width}x{self.video_height}',  # 视频尺寸
+            '-r', str(self.fps),        # 帧率
+            '-i', '-',                  # 从 stdin 读取
+        ]
+
+        if output_size is not None and output_size != (self.video_width, self.video_height):
+            ffmpeg_cmd += ['-vf', f'scale={output_size[0]}:{output_size[1]}']
+
+        # H.264 编码参数（libx264 对应 GStreamer 的 x264enc 参数）
+        ffmpeg_cmd += build_encoder_args(self.encoder, bitrate)
+
+        ffmpeg_cmd += [
+            # RTP 输出参数（对应 rtph264pay）
+            '-f', 'rtp',
+            '-payload_type', '96',      # pt=96
+            '-pkt_size', '1200',        # mtu=1200
+            f'rtp://{self.host}:{self.port}'
+        ]
+        return ffmpeg_cmd
+
+    def _spawn_ffmpeg(self, ffmpeg_cmd: List[str]) -> subprocess.Popen:
+        """启动 FFmpeg 进程及其错误输出监控线程"""
+        logger.debug(f"FFmpeg 命令: {' '.join(ffmpeg_cmd)}")
+        process = subprocess.Popen(
+            ffmpeg_cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # 异步写入使用无缓冲管道，memoryview 直接写入，避免 Python 层再拷贝一次
+            bufsize=0 if self.async_write else 10**8
+        )
+
+        # 启动 FFmpeg 错误监控线程
+        self.ffmpeg_monitor_thread = threading.Thread(
+            target=self._monitor_ffmpeg_output,
+            args=(process,),
+            daemon=True
+        )
+        self.ffmpeg_monitor_thread.start()
+        return process
+
     def _init_ffmpeg(self) -> bool:
         """初始化 FFmpeg 推流进程
 
@@ -131,50 +385,21 @@ class FFmpegPushStreamer:
         """
         try:
             # 构建 FFmpeg 命令
-            # 对应 GStreamer 的参数设置
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-f', 'rawvideo',           # 输入格式：原始视频
-                '-pix_fmt', 'bgr24',        # OpenCV 使用 BGR24
-                '-s', f'{self.video_width}x{self.video_height}',  # 视频尺寸
-                '-r', str(self.fps),        # 帧率
-                '-i', '-',                  # 从 stdin 读取
-
-                # H.264 编码参数（对应 GStreamer 的 x264enc 参数）
-                '-c:v', 'libx264',
-                '-preset', 'ultrafast',     # speed-preset=ultrafast
-                '-tune', 'zerolatency',     # tune=zerolatency
-                '-profile:v', 'baseline',   # profile=baseline
-                '-pix_fmt', 'yuv420p',      # 强制使用 YUV420P（baseline 兼容）
-                '-b:v', f'{self.bitrate}k',  # bitrate
-                '-maxrate', f'{self.bitrate}k',
-                '-bufsize', f'{self.bitrate * 2}k',
-                '-g', '15',                 # key-int-max=15 (GOP size)
-                '-refs', '1',               # ref=1
-                '-bf', '0',                 # bframes=0
-                '-threads', '2',            # threads=2
-
-                # RTP 输出参数（对应 rtph264pay）
-                '-f', 'rtp',
-                '-payload_type', '96',      # pt=96
-                '-pkt_size', '1200',        # mtu=1200
-                f'rtp://{self.host}:{self.port}'
-            ]
+            ffmpeg_cmd = self._build_ffmpeg_cmd(self.bitrate)
+
+            if self.pipe_pix_fmt == "yuv420p":
+                # 异步写入时，转换缓冲区在写入完成前不能被复用：
+                # 队列中的帧 + 正在写入的帧 + 正在转换的帧
+                num_buffers = self.write_queue_size + 2 if self.async_write else 1
+                self.i420_converter = I420Converter(self.video_width, self.video_height, num_buffers)
+                logger.info("管道像素格式: yuv420p (进程内 BGR -> I420 转换)")
 
             logger.info("启动 FFmpeg 推流进程...")
-            logger.debug(f"FFmpeg 命令: {' '.join(ffmpeg_cmd)}")
 
             # 启动 FFmpeg 进程
-            self.ffmpeg_process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=10**8
-            )
+            self.ffmpeg_process = self._spawn_ffmpeg(ffmpeg_cmd)
 
             # 等待一小段时间，检查 FFmpeg 是否正常启动
-            import time
             time.sleep(0.5)
 
             if self.ffmpeg_process.poll() is not None:
@@ -186,12 +411,20 @@ class FFmpegPushStreamer:
 
             logger.success(f"FFmpeg 推流初始化成功: rtp://{self.host}:{self.port}")
 
-            # 启动 FFmpeg 错误监控线程
-            self.ffmpeg_monitor_thread = threading.Thread(
-                target=self._monitor_ffmpeg_output,
-                daemon=True
-            )
-            self.ffmpeg_monitor_thread.start()
+            if self.async_write:
+                self.frame_writer = FFmpegFrameWriter(self.ffmpeg_process, self.write_queue_size).start()
+                logger.info(f"已启用异步零拷贝写入 (队列容量: {self.write_queue_size})")
+
+            if self.adaptive_bitrate:
+                self.bitrate_controller = BitrateController(
+                    initial_bitrate=self.bitrate,
+                    min_bitrate=self.min_bitrate,
+                    max_bitrate=self.max_bitrate,
+                    width=self.video_width,
+                    height=self.video_height
+                )
+                self.feedback_listener = FeedbackListener(self.feedback_port).start()
+                logger.info(f"自适应码率已启用: {self.min_bitrate}-{self.max_bitrate}kbps")
 
             return True
 
@@ -202,13 +435,66 @@ class FFmpegPushStreamer:
             logger.error(f"FFmpeg 初始化失败: {str(e)}")
             return False
 
-    def _monitor_ffmpeg_output(self):
+    def _apply_bitrate_feedback(self) -> None:
+        """根据接收端反馈调整码率和分辨率（需要时重启编码器）"""
+        report = self.feedback_listener.pop_report()
+        if report is None:
+            return
+
+        change = self.bitrate_controller.on_report(report)
+        if change is None:
+            return
+
+        bitrate, output_width, output_height = change
+        self._restart_ffmpeg(bitrate, (output_width, output_height))
+
+    def _restart_ffmpeg(self, bitrate: int, output_size: Tuple[int, int]) -> None:
+        """先启动新的 FFmpeg 进程再关闭旧进程，切换期间不中断推流
+
+        libx264 不支持运行时修改码率和分辨率，因此通过重启编码器生效；
+        新进程从关键帧开始编码，接收端可以立即解码。
+        """
+        try:
+            new_process = self._spawn_ffmpeg(self._build_ffmpeg_cmd(bitrate, output_size))
+        except Exception as e:
+            logger.error(f"启动新的 FFmpeg 进程失败，保持当前配置: {e}")
+            return
+
+        old_process, old_writer = self.ffmpeg_process, self.frame_writer
+        self.ffmpeg_process = new_process
+        if old_writer is not None:
+            self.frame_writer = FFmpegFrameWriter(new_process, self.write_queue_size).start()
+
+        # 在后台关闭旧进程，避免阻塞推流
+        threading.Thread(
+            target=self._retire_ffmpeg,
+            args=(old_process, old_writer),
+            daemon=True
+        ).start()
+        logger.success(f"编码器已切换: {bitrate}kbps, {output_size[0]}x{output_size[1]}")
+
+    @staticmethod
+    def _retire_ffmpeg(process: subprocess.Popen, writer: Optional[FFmpegFrameWriter]) -> None:
+        """停止旧的写入线程并结束旧的 FFmpeg 进程"""
+        if writer is not None:
+            writer.stop()
+        try:
+            if process.stdin and not process.stdin.closed:
+                process.stdin.close()
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        except Exception as e:
+            logger.debug(f"关闭旧 FFmpeg 进程时出错: {e}")
+
+    def _monitor_ffmpeg_output(self, process: subprocess.Popen):
         """监控 FFmpeg 的错误输出"""
-        if not self.ffmpeg_process or not self.ffmpeg_process.stderr:
+        if not process or not process.stderr:
             return
 
         try:
-            for line in iter(self.ffmpeg_process.stderr.readline, b''):
+            for line in iter(process.stderr.readline, b''):
                 if line:
                     line_str = line.decode('utf-8', errors='ignore').strip()
                     # 只记录重要的错误信息
@@ -219,52 +505,146 @@ class FFmpegPushStreamer:
 
     def _draw_detections(self, frame: np.ndarray, boxes) -> np.ndarray:
         """在帧上绘制检测结果"""
-        if boxes is None or len(boxes) == 0:
-            return frame
-
-        for box in boxes:
-            # 获取边界框坐标
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            confidence = float(box.conf[0])
-            class_id = int(box.cls[0])
-            class_name = self.model.names[class_id]
-
-            # 绘制边界框
-            color = (0, 255, 0)  # 绿色
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-
-            # 绘制标签
-            label = f"{class_name} {confidence:.2f}"
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 0.5
-            thickness = 1
-
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, font, font_scale, thickness
-            )
+        return draw_detections(frame, boxes, self.model.names, show_track_ids=False)
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        """读取一帧，失败时返回 None"""
+        with self.metrics.time("capture"):
+            ret, frame = self.cap.read()
+        if not ret:
+            logger.warning("无法读取摄像头帧")
+            return None
+        return frame
 
-            # 标签背景
-            cv2.rectangle(
+    def _detect(self, frame: np.ndarray):
+        """YOLO 检测（使用 CPU），返回 boxes"""
+        if self.tiled_detector is not None:
+            boxes = self.tiled_detector.predict(frame, conf=0.5, device='cpu')
+            return self.tile_tracker.update(boxes, frame) if self.tile_tracker is not None else boxes
+
+        if self.scheduler is not None or self.enable_tracking:
+            # 隔帧检测需要跟踪ID来估计目标运动
+            results = self.model.track(
                 frame,
-                (x1, y1 - text_height - baseline - 5),
-                (x1 + text_width, y1),
-                color,
-                -1
+                conf=0.5,
+                device='cpu',
+                persist=True,
+                verbose=False
             )
-
-            # 标签文字
-            cv2.putText(
+        else:
+            results = self.model.predict(
                 frame,
-                label,
-                (x1, y1 - baseline - 5),
-                font,
-                font_scale,
-                (0, 0, 0),
-                thickness
+                conf=0.5,
+                device='cpu',  # 强制使用 CPU
+                verbose=False
             )
+        if results and len(results) > 0:
+            return results[0].boxes
+        return None
+
+    def _detect_frame(self, frame: np.ndarray, frame_index: int):
+        """按调度运行检测：检测帧调用模型，中间帧外推上一次的检测框，静止画面沿用上一次的检测结果"""
+        if self.scheduler is not None and not self.scheduler.should_detect(frame_index):
+            return self.propagator.predict(frame_index, frame.shape)
+
+        if self.motion_gate is not None and not self.motion_gate.should_detect(frame, frame_index):
+            if self.scheduler is None:
+                return self._last_boxes
+            # 门控取消了调度器要求的检测：继续外推，并让调度器从本帧重新计算间隔
+            self.scheduler.skip(frame_index)
+            return self.propagator.predict(frame_index, frame.shape)
+
+        detect_start = time.perf_counter()
+        boxes = self._detect(frame)
+        infer_time = time.perf_counter() - detect_start
+        self.metrics.observe("inference", infer_time)
+
+        if self.scheduler is None:
+            self._last_boxes = boxes
+            return boxes
+
+        # 整帧只做一次 tensor -> NumPy 传输，外推和绘制共用同一个数组
+        data = boxes_to_numpy(boxes)
+        self.scheduler.record_detection(frame_index, infer_time)
+        self.propagator.update(data, frame_index)
+        self._last_boxes = data
+
+        if frame_index % 30 == 0:
+            logger.info(f"检测间隔: {self.scheduler.interval} | 已检测: {self.scheduler.detect_count} 帧")
+        return data
+
+    def _annotate(self, frame: np.ndarray, boxes, frame_count: int) -> np.ndarray:
+        """绘制检测结果、输出检测统计并确保帧尺寸正确（boxes 可以是 Boxes 或 boxes_to_numpy() 的输出）"""
+        if boxes is not None:
+            # 整帧只做一次 tensor -> NumPy 传输，绘制和统计共用；_detect_frame 已转换时直接使用
+            with self.metrics.time("draw"):
+                data = boxes if isinstance(boxes, np.ndarray) else boxes_to_numpy(boxes)
+                frame = self._draw_detections(frame, data)
+
+            # 显示检测统计（每30帧显示一次）
+            if len(data) > 0 and frame_count % 30 == 0:
+                class_ids, counts = np.unique(data[:, -1].astype(np.int64), return_counts=True)
+                detection_str = ", ".join(
+                    [f"{self.model.names[k]}:{v}" for k, v in zip(class_ids.tolist(), counts.tolist())])
+                logger.info(f"检测到: {detection_str}")
+
+        # 运动门控统计（每30帧显示一次，长时间无头运行时也能观察跳过比例）
+        if self.motion_gate is not None and frame_count % 30 == 0:
+            gate_stats = self.motion_gate.stats()
+            logger.info(
+                f"运动门控: 跳过 {gate_stats['gated']} 帧 | 检测 {gate_stats['ungated']} 帧 | "
+                f"跳过比例: {gate_stats['gated_ratio']:.0%}")
+
+        # 确保帧尺寸正确
+        if frame.shape[1] != self.video_width or frame.shape[0] != self.video_height:
+            with self.metrics.time("resize"):
+                frame = cv2.resize(
+                    frame, (self.video_width, self.video_height))
 
         return frame
 
+    def _write_frame(self, frame: np.ndarray) -> bool:
+        """将一帧写入 FFmpeg（计入 encode 阶段耗时），失败时返回 False"""
+        with self.metrics.time("encode"):
+            written = self._write_to_ffmpeg(frame)
+        if written:
+            self.metrics.frame_done()
+        return written
+
+    def _write_to_ffmpeg(self, frame: np.ndarray) -> bool:
+        """检查 FFmpeg 进程状态，转换像素格式后写入管道或异步写入线程"""
+        if self.bitrate_controller is not None:
+            self._apply_bitrate_feedback()
+
+        try:
+            # 检查 FFmpeg 进程是否还在运行
+            if self.ffmpeg_process.poll() is not None:
+                logger.error(f"FFmpeg 进程已退出，返回码: {self.ffmpeg_process.returncode}")
+                # 读取错误输出
+                stderr_output = self.ffmpeg_process.stderr.read().decode('utf-8', errors='ignore')
+                if stderr_output:
+                    logger.error(f"FFmpeg 错误输出:\n{stderr_output[-1000:]}")  # 显示最后1000字符
+                return False
+
+            if self.i420_converter is not None:
+                frame = self.i420_converter.convert(frame)
+
+            if self.frame_writer is not None:
+                if not self.frame_writer.write(frame):
+                    logger.error(f"FFmpeg 写入线程已停止: {self.frame_writer.error}")
+                    return False
+                return True
+
+            self.ffmpeg_process.stdin.write(frame.tobytes())
+            self.ffmpeg_process.stdin.flush()  # 确保数据被发送
+            return True
+        except BrokenPipeError:
+            logger.error("FFmpeg 管道已断开")
+            return False
+        except Exception as e:
+            logger.error(f"写入 FFmpeg 失败: {e}")
+            return False
+
     def start_streaming(self):
         """开始推流"""
         logger.info("=" * 50)
@@ -287,72 +667,48 @@ class FFmpegPushStreamer:
         logger.info(f"📡 开始推流到 {self.host}:{self.port}")
         logger.info("=" * 50)
         logger.info("按 Ctrl+C 停止推流")
+        if self.scheduler is not None:
+            interval_desc = "自适应" if self.adaptive_interval else f"每 {self.detect_interval} 帧"
+            logger.info(f"检测频率: {interval_desc}（中间帧按运动模型外推）")
+        if self.motion_gate is not None:
+            logger.info(
+                f"运动门控已启用: 阈值 {self.motion_gate.threshold:.2%} | "
+                f"静止时每 {self.motion_gate.recheck_interval} 帧强制检测")
         logger.info("")
 
+        if self.metrics_port is not None:
+            try:
+                self.metrics_server = MetricsServer(
+                    [self.metrics], port=self.metrics_port, host=self.metrics_host).start()
+            except OSError as e:
+                logger.warning(f"⚠️  指标端点启动失败: {e}")
+
+        if self.pipelined:
+            self._run_pipelined()
+            return
+
         frame_count = 0
         try:
             while True:
                 # 读取帧
-                ret, frame = self.cap.read()
-                if not ret:
-                    logger.warning("无法读取摄像头帧")
+                frame = self._read_frame()
+                if frame is None:
                     break
 
-                # YOLO 检测（使用 CPU）
-                results = self.model.predict(
-                    frame,
-                    conf=0.5,
-                    device='cpu',  # 强制使用 CPU
-                    verbose=False
-                )
-
-                # 绘制检测结果
-                if results and len(results) > 0:
-                    boxes = results[0].boxes
-                    frame = self._draw_detections(frame, boxes)
-
-                    # 显示检测统计
-                    if len(boxes) > 0:
-                        detected_classes = {}
-                        for box in boxes:
-                            class_name = self.model.names[int(box.cls[0])]
-                            detected_classes[class_name] = detected_classes.get(
-                                class_name, 0) + 1
-
-                        if frame_count % 30 == 0:  # 每30帧显示一次
-                            detection_str = ", ".join(
-                                [f"{k}:{v}" for k, v in detected_classes.items()])
-                            logger.info(f"检测到: {detection_str}")
-
-                # 确保帧尺寸正确
-                if frame.shape[1] != self.video_width or frame.shape[0] != self.video_height:
-                    frame = cv2.resize(
-                        frame, (self.video_width, self.video_height))
+                # YOLO 检测并绘制结果
+                boxes = self._detect_frame(frame, frame_count)
+                frame = self._annotate(frame, boxes, frame_count)
 
                 # 推流到 FFmpeg
-                try:
-                    # 检查 FFmpeg 进程是否还在运行
-                    if self.ffmpeg_process.poll() is not None:
-                        logger.error(f"FFmpeg 进程已退出，返回码: {self.ffmpeg_process.returncode}")
-                        # 读取错误输出
-                        stderr_output = self.ffmpeg_process.stderr.read().decode('utf-8', errors='ignore')
-                        if stderr_output:
-                            logger.error(f"FFmpeg 错误输出:\n{stderr_output[-1000:]}")  # 显示最后1000字符
-                        break
-
-                    self.ffmpeg_process.stdin.write(frame.tobytes())
-                    self.ffmpeg_process.stdin.flush()  # 确保数据被发送
-                except BrokenPipeError:
-                    logger.error("FFmpeg 管道已断开")
-                    break
-                except Exception as e:
-                    logger.error(f"写入 FFmpeg 失败: {e}")
+                if not self._write_frame(frame):
                     break
 
                 # 本地预览（可选）
                 if not self.headless:
-                    cv2.imshow('YOLO Detection Stream', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    with self.metrics.time("preview"):
+                        cv2.imshow('YOLO Detection Stream', frame)
+                        key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
                         break
 
                 frame_count += 1
@@ -364,10 +720,75 @@ class FFmpegPushStreamer:
         finally:
             self.cleanup()
 
+    def _run_pipelined(self):
+        """流水线模式：采集、推理、绘制、写入各自运行在独立线程中"""
+        if not self.headless:
+            logger.warning("流水线模式下不支持本地预览窗口，已忽略")
+
+        frame_index = 0
+
+        def capture():
+            nonlocal frame_index
+            frame = self._read_frame()
+            if frame is None:
+                return None
+            frame_index += 1
+            return frame_index, frame
+
+        def infer(item):
+            index, frame = item
+            return index, frame, self._detect_frame(frame, index)
+
+        def annotate(item):
+            index, frame, boxes = item
+            return self._annotate(frame, boxes, index)
+
+        def write(frame):
+            if not self._write_frame(frame):
+                raise PipelineStopped()
+
+        self.pipeline = FramePipeline(
+            source=("capture", capture),
+            stages=[("infer", infer), ("annotate", annotate), ("write", write)],
+            queue_size=self.queue_size,
+            policy=self.queue_policy,
+        )
+        logger.info(f"🧵 流水线模式已启用 (队列容量: {self.queue_size}, 策略: {self.queue_policy})")
+
+        start_time = time.monotonic()
+        try:
+            self.pipeline.start()
+            self.pipeline.wait()
+        except KeyboardInterrupt:
+            logger.info("\n⏹  用户停止推流")
+        finally:
+            self.pipeline.stop()
+            self.pipeline.join(timeout=5)
+
+            stats = self.pipeline.stats()
+            elapsed = max(time.monotonic() - start_time, 1e-6)
+            written = stats["write"]["processed"]
+            logger.info(f"流水线统计: 共推流 {written} 帧, 平均 {written / elapsed:.1f} FPS")
+            for name, stage_stats in stats.items():
+                logger.info(f"  [{name}] 处理: {stage_stats['processed']} | 丢帧: {stage_stats['dropped']}")
+
+            self.cleanup()
+
     def cleanup(self):
         """清理资源"""
         logger.info("正在清理资源...")
 
+        if self.motion_gate is not None:
+            gate_stats = self.motion_gate.stats()
+            logger.info(
+                f"运动门控统计: 跳过 {gate_stats['gated']} 帧 | 检测 {gate_stats['ungated']} 帧 | "
+                f"跳过比例: {gate_stats['gated_ratio']:.0%}")
+        self.metrics.log_summary()
+
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
         # 释放摄像头
         if self.cap:
             try:
@@ -376,6 +797,14 @@ class FFmpegPushStreamer:
             except Exception as e:
                 logger.warning(f"释放摄像头时出错: {e}")
 
+        # 停止反馈监听
+        if self.feedback_listener is not None:
+            self.feedback_listener.stop()
+
+        # 停止异步写入线程
+        if self.frame_writer is not None:
+            self.frame_writer.stop()
+
         # 关闭 FFmpeg 进程
         if self.ffmpeg_process:
             try:
@@ -0,0 +1,97 @@
+from typing import Dict, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from service.detections import boxes_to_numpy
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.5
+FONT_THICKNESS = 1
+
+
+def build_labels(
+    data: np.ndarray,
+    names: Union[Dict[int, str], Sequence[str]],
+    show_track_ids: bool = True
+) -> list:
+    """
+    批量生成标签文本，例如 "person ID:3 0.87"
+
+    Args:
+        data: boxes_to_numpy() 的输出
+        names: 类别名称
+        show_track_ids: 是否在标签中显示跟踪ID
+    """
+    class_names = [names[int(cls)] for cls in data[:, -1].tolist()]
+    confs = data[:, -2].tolist()
+
+    if show_track_ids and data.shape[1] == 7:
+        track_ids = data[:, 4].astype(np.int64).tolist()
+        return [f"{name} ID:{track_id} {conf:.2f}" for name, track_id, conf in zip(class_names, track_ids, confs)]
+    return [f"{name} {conf:.2f}" for name, conf in zip(class_names, confs)]
+
+
+def draw_detections(
+    frame: np.ndarray,
+    boxes,
+    names: Union[Dict[int, str], Sequence[str]],
+    show_labels: bool = True,
+    show_track_ids: bool = True,
+    color: Tuple[int, int, int] = (0, 255, 0)
+) -> np.ndarray:
+    """
+    在帧上绘制检测结果（向量化版本）
+
+    整帧的检测框只做一次 tensor -> NumPy 传输，坐标和标签背景在 NumPy 中批量计算，
+    所有边框用一次 cv2.polylines 绘制，标签背景和文字逐个 cv2.rectangle / cv2.putText
+    （cv2.fillPoly 按奇偶规则填充，多个背景重叠的区域会留空，不能合并为一次调用）。
+
+    Args:
+        frame: 输入帧（原地绘制）
+        boxes: ultralytics Boxes、boxes_to_numpy() 的输出或 None
+        names: 类别名称
+        show_labels: 是否显示标签
+        show_track_ids: 是否在标签中显示跟踪ID
+        color: 边框和标签背景颜色 (BGR)
+
+    Returns:
+        绘制后的帧
+    """
+    if boxes is None or len(boxes) == 0:
+        return frame
+
+    data = boxes if isinstance(boxes, np.ndarray) else boxes_to_numpy(boxes)
+    xyxy = data[:, :4].astype(np.int32)
+    x1, y1, x2, y2 = xyxy[:, 0], xyxy[:, 1], xyxy[:, 2], xyxy[:, 3]
+
+    # 所有边框：(N, 4, 2) 的闭合多边形
+    corners = np.stack([
+        np.stack([x1, y1], axis=1),
+        np.stack([x2, y1], axis=1),
+        np.stack([x2, y2], axis=1),
+        np.stack([x1, y2], axis=1),
+    ], axis=1)
+    cv2.polylines(frame, list(corners), True, color, 2)
+
+    if not show_labels:
+        return frame
+
+    labels = build_labels(data, names, show_track_ids)
+    sizes = [cv2.getTextSize(label, FONT, FONT_SCALE, FONT_THICKNESS) for label in labels]
+    text_width = np.array([size[0][0] for size in sizes], dtype=np.int32)
+    text_height = np.array([size[0][1] for size in sizes], dtype=np.int32)
+    baseline = np.array([size[1] for size in sizes], dtype=np.int32)
+
+    # 所有标签背景：位于边框左上角上方
+    bg_top = (y1 - text_height - baseline - 5).tolist()
+    bg_right = (x1 + text_width).tolist()
+    left, bottom = x1.tolist(), y1.tolist()
+    for x, top, right, y in zip(left, bg_top, bg_right, bottom):
+        cv2.rectangle(frame, (x, top), (right, y), color, -1)
+
+    text_y = (y1 - baseline - 5).tolist()
+    for label, x, y in zip(labels, left, text_y):
+        cv2.putText(frame, label, (x, y), FONT, FONT_SCALE, (0, 0, 0), FONT_THICKNESS)
+
+    return frame
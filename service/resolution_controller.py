@@ -0,0 +1,128 @@
+from typing import Optional, Sequence
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="分辨率控制")
+
+
+class ImgszController:
+    """推理分辨率闭环控制器
+
+    根据实测 FPS 和推理耗时调整传给 model.predict/track 的 imgsz：
+    - 降档：平滑后的 FPS 连续 patience 帧低于 target_fps × downscale_ratio
+    - 升档：按面积估算更高一档的推理耗时，连续 patience 帧都不超过
+      帧时间预算 × upscale_margin
+    - 每次切换后进入冷却期，冷却期内不再切换
+
+    降档与升档使用不同的阈值（滞回），避免在两档之间来回抖动。
+    """
+
+    def __init__(
+        self,
+        target_fps: float,
+        levels: Sequence[int] = (640, 480, 320),
+        initial_imgsz: Optional[int] = None,
+        downscale_ratio: float = 0.9,
+        upscale_margin: float = 0.6,
+        patience: int = 15,
+        cooldown: int = 60,
+        smoothing: float = 0.1,
+    ):
+        """
+        Args:
+            target_fps: 目标帧率
+            levels: 可选的推理分辨率（必须是 32 的倍数）
+            initial_imgsz: 初始分辨率，默认使用最高档
+            downscale_ratio: FPS 低于 target_fps × 该比例时降档
+            upscale_margin: 预计推理耗时低于帧时间预算 × 该比例时升档
+            patience: 触发切换需要连续满足条件的帧数
+            cooldown: 切换后的冷却帧数
+            smoothing: FPS 和推理耗时的指数滑动平均系数
+        """
+        levels = sorted(set(levels), reverse=True)
+        if not levels:
+            raise ValueError("至少需要一个推理分辨率")
+        invalid = [size for size in levels if size % 32 != 0]
+        if invalid:
+            raise ValueError(f"推理分辨率必须是 32 的倍数: {invalid}")
+
+        self.target_fps = target_fps
+        self.levels = levels
+        self.downscale_ratio = downscale_ratio
+        self.upscale_margin = upscale_margin
+        self.patience = patience
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+
+        self.index = levels.index(initial_imgsz) if initial_imgsz in levels else 0
+        self.fps_ema: Optional[float] = None
+        self.infer_ema: Optional[float] = None
+
+        self._low_count = 0
+        self._headroom_count = 0
+        self._cooldown_left = cooldown
+
+    @property
+    def imgsz(self) -> int:
+        """当前推理分辨率"""
+        return self.levels[self.index]
+
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return self.smoothing * value + (1 - self.smoothing) * previous
+
+    def update(self, fps_value: float, infer_time: Optional[float] = None) -> int:
+        """
+        输入一帧的测量值，返回下一帧应使用的 imgsz
+
+        Args:
+            fps_value: 当前帧的实测 FPS
+            infer_time: 本帧推理耗时（秒），未运行推理的帧传 None
+        """
+        self.fps_ema = self._smooth(self.fps_ema, fps_value)
+        if infer_time is not None:
+            self.infer_ema = self._smooth(self.infer_ema, infer_time)
+
+        if self._cooldown_left > 0:
+            self._cooldown_left -= 1
+            return self.imgsz
+
+        # 降档：FPS 持续低于目标
+        if self.fps_ema < self.target_fps * self.downscale_ratio and self.index < len(self.levels) - 1:
+            self._low_count += 1
+        else:
+            self._low_count = 0
+
+        # 升档：按面积比例估算更高一档的推理耗时，仍有足够余量
+        if self.index > 0 and self.infer_ema is not None:
+            scale = (self.levels[self.index - 1] / self.imgsz) ** 2
+            budget = 1.0 / self.target_fps
+            if self.infer_ema * scale <= budget * self.upscale_margin:
+                self._headroom_count += 1
+            else:
+                self._headroom_count = 0
+        else:
+            self._headroom_count = 0
+
+        if self._low_count >= self.patience:
+            self._switch(self.index + 1, "FPS 不足")
+        elif self._headroom_count >= self.patience:
+            self._switch(self.index - 1, "性能有余量")
+
+        return self.imgsz
+
+    def _switch(self, index: int, reason: str) -> None:
+        previous = self.imgsz
+        self.index = index
+        logger.info(
+            f"推理分辨率调整: {previous} -> {self.imgsz} ({reason}, "
+            f"FPS: {self.fps_ema:.1f}/{self.target_fps}, "
+            f"推理: {(self.infer_ema or 0) * 1000:.1f}ms)"
+        )
+
+        # 切换后重新测量
+        self.infer_ema = None
+        self._low_count = 0
+        self._headroom_count = 0
+        self._cooldown_left = self.cooldown
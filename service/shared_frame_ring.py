@@ -0,0 +1,393 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger(prefix="共享内存采集")
+
+# 头部字段（int64）
+_WRITE_SEQ = 0  # 最近一次写完的帧序号（从 1 开始）
+_STATUS = 1  # 采集进程状态
+_WIDTH = 2
+_HEIGHT = 3
+_CHANNELS = 4
+_NUM_SLOTS = 5
+_HEADER_FIELDS = 8
+_ALIGN = 64
+
+# 采集进程状态
+STATUS_STARTING = 0
+STATUS_RUNNING = 1
+STATUS_CLOSED = 2  # 正常结束（摄像头读取结束或收到停止信号）
+STATUS_FAILED = -1  # 无法打开摄像头
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """连接已存在的共享内存；由创建者负责 unlink，连接方不注册到 resource_tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 不支持 track 参数
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """基于 multiprocessing.shared_memory 的帧环形缓冲区
+
+    共享内存布局：头部 | 每个槽位的帧序号 | 固定大小的帧槽位
+    - 写入方（采集进程）按序号轮转写入槽位：写入前把槽位序号置为 -seq，写完再置为 seq，
+      最后更新头部的最新序号（seqlock）
+    - 读取方拿到槽位的 NumPy 视图，进程之间不做序列化；写入方不等待读取方，
+      槽位在之后再写入 num_slots 帧时被覆盖，读取方用完视图后通过 is_current() 判断是否被套圈
+
+    只支持一个写入方。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """请使用 SharedFrameRing.create() 或 SharedFrameRing.attach() 创建"""
+        self.shm = shm
+        self.owner = owner
+
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.width = int(self._header[_WIDTH])
+        self.height = int(self._header[_HEIGHT])
+        self.channels = int(self._header[_CHANNELS])
+        self.num_slots = int(self._header[_NUM_SLOTS])
+
+        seq_offset = self._header.nbytes
+        self._slot_seqs = np.ndarray((self.num_slots,), dtype=np.int64, buffer=shm.buf, offset=seq_offset)
+        self._slots = np.ndarray(
+            (self.num_slots, self.height, self.width, self.channels),
+            dtype=np.uint8,
+            buffer=shm.buf,
+            offset=self._data_offset(self.num_slots),
+        )
+
+    @staticmethod
+    def _data_offset(num_slots: int) -> int:
+        offset = (_HEADER_FIELDS + num_slots) * 8
+        return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    @classmethod
+    def create(cls, width: int, height: int, num_slots: int = 4, channels: int = 3) -> "SharedFrameRing":
+        """
+        创建环形缓冲区（创建者负责最终 unlink）
+
+        Args:
+            width: 帧宽度
+            height: 帧高度
+            num_slots: 槽位数量，决定读取方最多可以落后写入方多少帧而不被套圈
+            channels: 通道数
+        """
+        if num_slots < 2:
+            raise ValueError(f"槽位数量至少为 2: {num_slots}")
+
+        size = cls._data_offset(num_slots) + num_slots * height * width * channels
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_WIDTH], header[_HEIGHT], header[_CHANNELS], header[_NUM_SLOTS] = width, height, channels, num_slots
+        del header
+
+        ring = cls(shm, owner=True)
+        ring._slot_seqs[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFrameRing":
+        """按名称连接其它进程创建的环形缓冲区"""
+        return cls(_attach_shm(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def latest_seq(self) -> int:
+        """最近一次写完的帧序号，0 表示还没有帧"""
+        return int(self._header[_WRITE_SEQ])
+
+    @property
+    def status(self) -> int:
+        return int(self._header[_STATUS])
+
+    @status.setter
+    def status(self, value: int) -> None:
+        self._header[_STATUS] = value
+
+    def begin_write(self) -> Tuple[int, np.ndarray]:
+        """
+        开始写入下一帧
+
+        Returns:
+            (帧序号, 槽位视图)；直接向视图中写入数据（例如 cap.read(view)），完成后调用 commit_write(seq)
+        """
+        seq = self.latest_seq + 1
+        slot = (seq - 1) % self.num_slots
+        self._slot_seqs[slot] = -seq  # 写入中
+        return seq, self._slots[slot]
+
+    def commit_write(self, seq: int) -> None:
+        """完成写入，使该帧对读取方可见"""
+        self._slot_seqs[(seq - 1) % self.num_slots] = seq
+        self._header[_WRITE_SEQ] = seq
+
+    def write(self, frame: np.ndarray) -> int:
+        """写入一帧（尺寸不一致时缩放到槽位尺寸），返回帧序号"""
+        seq, view = self.begin_write()
+        if frame.shape == view.shape:
+            np.copyto(view, frame)
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=view)
+        self.commit_write(seq)
+        return seq
+
+    def read(self, last_seq: int = 0, latest: bool = True) -> Tuple[int, Optional[np.ndarray], int]:
+        """
+        非阻塞读取一帧
+
+        Args:
+            last_seq: 上一次读取到的帧序号
+            latest: True 直接跳到最新帧；False 按顺序读取下一帧
+
+        Returns:
+            (帧序号, 槽位视图, 跳过的帧数)；没有新帧时视图为 None。
+            顺序读取时跳过的帧数大于 0 表示读取方已被写入方套圈，这些帧已被覆盖
+        """
+        while True:
+            write_seq = self.latest_seq
+            if write_seq <= last_seq:
+                return last_seq, None, 0
+
+            if latest:
+                seq = write_seq
+            else:
+                # 写入方可能正在写 write_seq + 1 所在的槽位，它覆盖的是 write_seq + 1 - num_slots
+                oldest = max(1, write_seq - self.num_slots + 2)
+                seq = max(last_seq + 1, oldest)
+
+            slot = (seq - 1) % self.num_slots
+            if self._slot_seqs[slot] == seq:
+                return seq, self._slots[slot], seq - last_seq - 1
+            # 读取期间槽位被覆盖，重新定位
+
+    def is_current(self, seq: int) -> bool:
+        """序号为 seq 的帧是否仍在槽位中（读取方用完视图后调用，判断期间是否被覆盖）"""
+        return seq > 0 and self._slot_seqs[(seq - 1) % self.num_slots] == seq
+
+    def close(self) -> None:
+        """断开共享内存；创建者同时 unlink"""
+        del self._header, self._slot_seqs, self._slots
+        try:
+            self.shm.close()
+        except BufferError:
+            # 调用方仍持有槽位视图，映射在视图释放后由解释器回收
+            logger.debug("共享内存仍有视图引用，跳过 close")
+        if self.owner:
+            self.shm.unlink()
+
+
+def capture_process_main(
+    ring_name: str,
+    camera_device: Union[int, str],
+    fps: int,
+    stop_event,
+) -> None:
+    """
+    采集进程入口：打开摄像头，把解码后的帧直接写入共享内存槽位
+
+    Args:
+        ring_name: SharedFrameRing 的共享内存名称
+        camera_device: 摄像头设备ID或路径
+        fps: 请求的摄像头帧率
+        stop_event: multiprocessing.Event，设置后退出
+    """
+    ring = SharedFrameRing.attach(ring_name)
+    cap = cv2.VideoCapture(camera_device)
+    try:
+        if not cap.isOpened():
+            ring.status = STATUS_FAILED
+            return
+
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, ring.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ring.height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        ring.status = STATUS_RUNNING
+
+        while not stop_event.is_set():
+            seq, view = ring.begin_write()
+            # 尺寸一致时 OpenCV 直接解码到槽位中，否则返回新数组再缩放到槽位
+            ret, frame = cap.read(view)
+            if not ret:
+                break
+            if frame is not view and not np.may_share_memory(frame, view):
+                cv2.resize(frame, (ring.width, ring.height), dst=view)
+            ring.commit_write(seq)
+    finally:
+        if ring.status != STATUS_FAILED:
+            ring.status = STATUS_CLOSED
+        cap.release()
+        ring.close()
+
+
+class SharedMemoryCapture:
+    """在独立进程中采集摄像头的读取器
+
+    摄像头解码运行在独立的采集进程中，不与推理、绘制、管道写入争抢 GIL；
+    帧通过 SharedFrameRing 传递，进程之间不做序列化。
+
+    采集进程按摄像头帧率持续写入，不等待读取方，槽位在几个摄像头帧之后就会被覆盖，
+    短于一次推理的耗时。因此 read() 把槽位复制到读取方预分配的缓冲区（轮转使用）再返回，
+    复制后检查槽位序号，复制期间被覆盖的帧丢弃并重新读取；下游推理、原地绘制和编码
+    只接触读取方的缓冲区，不会读到撕裂的帧，也不会修改共享内存。
+
+    对外提供与 cv2.VideoCapture 相同的 read/isOpened/set/get/release 接口，
+    可以直接替换 self.cap 使用。返回的帧在之后再读取 num_buffers - 1 帧之前有效，
+    下游同时持有帧的数量（队列容量之和）应小于缓冲区数量。
+    """
+
+    def __init__(
+        self,
+        camera_device: Union[int, str],
+        width: int,
+        height: int,
+        fps: int = 30,
+        num_slots: int = 4,
+        latest: bool = True,
+        read_timeout: float = 2.0,
+        num_buffers: int = 2,
+    ):
+        """
+        Args:
+            camera_device: 摄像头设备ID或路径
+            width: 帧宽度（采集进程负责缩放到该尺寸）
+            height: 帧高度
+            fps: 请求的摄像头帧率
+            num_slots: 共享内存槽位数量
+            latest: True 只读取最新帧（旧帧直接丢弃）；False 按顺序读取
+            read_timeout: read() 等待新帧的超时时间（秒）
+            num_buffers: 读取方轮转使用的帧缓冲区数量
+        """
+        if num_buffers < 1:
+            raise ValueError(f"缓冲区数量必须大于 0: {num_buffers}")
+
+        self.camera_device = camera_device
+        self.fps = fps
+        self.latest = latest
+        self.read_timeout = read_timeout
+
+        self.read_count = 0  # read() 返回的帧数
+        self.dropped_count = 0  # 未被读取就被跳过的帧数
+        self.lapped_count = 0  # 复制期间被写入方覆盖而丢弃的帧数
+
+        self.ring = SharedFrameRing.create(width, height, num_slots)
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(num_buffers)]
+        self._buffer_index = 0
+        self._last_seq = 0
+        self._released = False
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+
+    def start(self, startup_timeout: float = 10.0) -> "SharedMemoryCapture":
+        """启动采集进程并等待摄像头打开"""
+        self._process = self._context.Process(
+            target=capture_process_main,
+            args=(self.ring.name, self.camera_device, self.fps, self._stop_event),
+            name="shared-memory-capture",
+            daemon=True,
+        )
+        self._process.start()
+
+        deadline = time.monotonic() + startup_timeout
+        while self.ring.status == STATUS_STARTING and self._process.is_alive():
+            if time.monotonic() > deadline:
+                self.release()
+                raise RuntimeError(f"采集进程启动超时 ({startup_timeout}s)")
+            time.sleep(0.01)
+
+        if self.ring.status != STATUS_RUNNING:
+            self.release()
+            raise RuntimeError(f"采集进程无法打开摄像头: {self.camera_device}")
+
+        logger.info(
+            f"采集进程已启动 (PID: {self._process.pid}) | "
+            f"共享内存: {self.ring.num_slots} 槽位 × {self.ring.width}x{self.ring.height}"
+        )
+        return self
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """返回下一帧（阻塞等待比上一次更新的帧），帧位于读取方的缓冲区中"""
+        deadline = time.monotonic() + self.read_timeout
+        while True:
+            seq, view, skipped = self.ring.read(self._last_seq, self.latest)
+            if view is not None:
+                buffer = self._buffers[self._buffer_index]
+                np.copyto(buffer, view)
+                if not self.ring.is_current(seq):
+                    # 复制期间槽位被写入方覆盖，缓冲区中的帧已撕裂
+                    self.lapped_count += 1
+                    self._last_seq = seq
+                    self.dropped_count += skipped + 1
+                    continue
+
+                self._buffer_index = (self._buffer_index + 1) % len(self._buffers)
+                self._last_seq = seq
+                self.dropped_count += skipped
+                self.read_count += 1
+                return True, buffer
+
+            if self.ring.status != STATUS_RUNNING:
+                return False, None
+            if time.monotonic() > deadline:
+                logger.warning(f"等待新帧超时 ({self.read_timeout}s)")
+                return False, None
+            time.sleep(0.001)
+
+    def stats(self) -> Dict[str, int]:
+        """采集计数：解码帧数、丢弃的旧帧数、复制期间被覆盖的帧数"""
+        return {
+            "grabbed": self.ring.latest_seq,
+            "dropped": self.dropped_count,
+            "lapped": self.lapped_count,
+        }
+
+    def isOpened(self) -> bool:  # noqa: N802 - 与 cv2.VideoCapture 保持一致
+        return self._process is not None and self._process.is_alive() and self.ring.status == STATUS_RUNNING
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """摄像头参数在采集进程启动时确定，不支持运行中修改"""
+        return False
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ring.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.ring.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def release(self) -> None:
+        """停止采集进程并释放共享内存"""
+        if self._released:
+            return
+        self._released = True
+
+        self._stop_event.set()
+        if self._process is not None:
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+
+        stats = self.stats()
+        self.ring.close()
+        logger.info(
+            f"采集统计: 解码 {stats['grabbed']} 帧 | 丢弃旧帧 {stats['dropped']} 帧 | "
+            f"复制时被覆盖 {stats['lapped']} 帧"
+        )
@@ -0,0 +1,211 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from ultralytics.engine.results import Boxes
+
+from service.detections import boxes_to_numpy, nms, numpy_to_boxes
+
+Tile = Tuple[int, int, int, int]  # (x1, y1, x2, y2)
+
+
+def tile_positions(length: int, tile_size: int, overlap: float) -> List[int]:
+    """
+    一个方向上的切片起点：相邻切片重叠 overlap 比例，最后一个切片与边缘对齐
+
+    Args:
+        length: 帧在该方向上的长度
+        tile_size: 切片大小
+        overlap: 重叠比例 [0, 1)
+    """
+    if length <= tile_size:
+        return [0]
+    step = tile_size * (1 - overlap)
+    count = math.ceil((length - tile_size) / step) + 1
+    return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+
+def tile_grid(height: int, width: int, tile_size: int, overlap: float) -> List[Tile]:
+    """覆盖整帧的重叠切片"""
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in tile_positions(height, tile_size, overlap)
+        for x in tile_positions(width, tile_size, overlap)
+    ]
+
+
+class TiledDetector:
+    """切片推理：高分辨率画面中的小目标检测
+
+    把整帧切成带重叠的 tile_size × tile_size 切片（NumPy 视图，不复制像素），
+    所有切片合并为一次 model.predict(list) 批量推理，检测框平移回整帧坐标后
+    与整帧粗检测的结果一起做分类别 NMS。
+
+    - 整帧粗检测（full_frame）负责跨越多个切片的大目标；启用时切片内部边缘上
+      被截断的检测框会被丢弃，避免与完整的检测框重复
+    - 选择性切片（selective）：先做整帧粗检测，只对粗检测发现目标或画面有运动的
+      切片做切片推理，空旷场景下大部分切片不需要推理
+    """
+
+    def __init__(
+        self,
+        model,
+        tile_size: int = 640,
+        overlap: float = 0.2,
+        full_frame: bool = True,
+        selective: bool = False,
+        motion_threshold: float = 0.002,
+        edge_margin: int = 2,
+    ):
+        """
+        Args:
+            model: ultralytics YOLO 或 OnnxDetector（需要支持 predict(list)）
+            tile_size: 切片大小（同时作为推理分辨率，切片不需要缩放）
+            overlap: 相邻切片的重叠比例
+            full_frame: 是否同时做整帧粗检测（推理分辨率为 tile_size）
+            selective: 是否只对粗检测发现目标或有运动的切片做推理（需要 full_frame）
+            motion_threshold: 选择性切片时，切片内变化像素占比超过该值视为有运动
+            edge_margin: 距切片内部边缘小于该像素数的检测框视为被截断
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError(f"切片重叠比例必须在 [0, 1) 之间: {overlap}")
+        if selective and not full_frame:
+            raise ValueError("选择性切片需要整帧粗检测 (full_frame=True)")
+
+        self.model = model
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.selective = selective
+        self.motion_threshold = motion_threshold
+        self.edge_margin = edge_margin
+
+        self.frames = 0
+        self.tiles_inferred = 0  # 累计推理的切片数（选择性切片时少于 frames × 切片总数）
+
+        self._tiles: List[Tile] = []
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._motion_scale = 8  # 运动检测在 1/8 分辨率的灰度图上进行
+        self._gray: Optional[np.ndarray] = None
+        self._prev_gray: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+
+    def tiles(self, frame_shape: Sequence[int]) -> List[Tile]:
+        """当前帧尺寸对应的切片（尺寸不变时复用）"""
+        shape = (frame_shape[0], frame_shape[1])
+        if shape != self._frame_shape:
+            self._frame_shape = shape
+            self._tiles = tile_grid(shape[0], shape[1], self.tile_size, self.overlap)
+            small = (max(1, shape[0] // self._motion_scale), max(1, shape[1] // self._motion_scale))
+            self._gray = np.empty(small, dtype=np.uint8)
+            self._prev_gray = None
+            self._diff = np.empty(small, dtype=np.uint8)
+        return self._tiles
+
+    def _motion_tiles(self, frame: np.ndarray, tiles: List[Tile]) -> np.ndarray:
+        """每个切片是否有运动（与上一帧的低分辨率灰度差分）"""
+        small = cv2.resize(frame, (self._gray.shape[1], self._gray.shape[0]), interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        if self._prev_gray is None:
+            self._prev_gray = self._gray.copy()
+            return np.ones(len(tiles), dtype=bool)
+
+        cv2.absdiff(self._gray, self._prev_gray, dst=self._diff)
+        cv2.threshold(self._diff, 25, 1, cv2.THRESH_BINARY, dst=self._diff)
+        self._gray, self._prev_gray = self._prev_gray, self._gray
+
+        scale = self._motion_scale
+        active = np.zeros(len(tiles), dtype=bool)
+        for index, (x1, y1, x2, y2) in enumerate(tiles):
+            top, left = y1 // scale, x1 // scale
+            region = self._diff[top:max(y2 // scale, top + 1), left:max(x2 // scale, left + 1)]
+            active[index] = region.mean() > self.motion_threshold
+        return active
+
+    @staticmethod
+    def _detection_tiles(data: np.ndarray, tiles: List[Tile]) -> np.ndarray:
+        """每个切片是否与粗检测的检测框相交"""
+        if len(data) == 0:
+            return np.zeros(len(tiles), dtype=bool)
+        bounds = np.asarray(tiles, dtype=np.float32)
+        overlap_x = np.minimum(bounds[:, None, 2], data[None, :, 2]) > np.maximum(bounds[:, None, 0], data[None, :, 0])
+        overlap_y = np.minimum(bounds[:, None, 3], data[None, :, 3]) > np.maximum(bounds[:, None, 1], data[None, :, 1])
+        return (overlap_x & overlap_y).any(axis=1)
+
+    def _to_frame_coords(self, data: np.ndarray, tile: Tile, frame_shape: Tuple[int, int]) -> np.ndarray:
+        """切片检测框平移到整帧坐标，并丢弃在切片内部边缘被截断的框"""
+        x1, y1, x2, y2 = tile
+        data = data[:, [0, 1, 2, 3, -2, -1]]  # 去掉跟踪ID列（如有），同时得到副本
+        data[:, [0, 2]] += x1
+        data[:, [1, 3]] += y1
+
+        if self.full_frame and len(data) > 0:
+            height, width = frame_shape
+            margin = self.edge_margin
+            truncated = np.zeros(len(data), dtype=bool)
+            if x1 > 0:
+                truncated |= data[:, 0] <= x1 + margin
+            if y1 > 0:
+                truncated |= data[:, 1] <= y1 + margin
+            if x2 < width:
+                truncated |= data[:, 2] >= x2 - margin
+            if y2 < height:
+                truncated |= data[:, 3] >= y2 - margin
+            data = data[~truncated]
+        return data
+
+    def predict(
+        self,
+        frame: np.ndarray,
+        conf: float = 0.25,
+        iou: float = 0.45,
+        max_det: int = 300,
+        **kwargs,
+    ) -> Boxes:
+        """
+        切片推理一帧
+
+        Args:
+            frame: BGR 帧
+            conf: 置信度阈值
+            iou: 合并切片结果时的 NMS IoU 阈值（同时传给模型）
+            max_det: 整帧最多保留的检测框数量
+            **kwargs: 传给 model.predict 的其它参数（device、classes 等）
+
+        Returns:
+            整帧坐标的 Boxes，列为 [x1, y1, x2, y2, conf, cls]
+        """
+        frame_shape = frame.shape[:2]
+        tiles = self.tiles(frame_shape)
+        predict_args = dict(conf=conf, iou=iou, imgsz=self.tile_size, verbose=False, **kwargs)
+
+        parts = []
+        if self.selective:
+            coarse = boxes_to_numpy(self.model.predict([frame], **predict_args)[0].boxes)
+            parts.append(coarse[:, [0, 1, 2, 3, -2, -1]])
+            active = self._detection_tiles(coarse, tiles) | self._motion_tiles(frame, tiles)
+            tiles = [tile for tile, is_active in zip(tiles, active) if is_active]
+            sources = []
+        else:
+            sources = [frame] if self.full_frame else []
+
+        # 切片为整帧的视图，不复制像素；所有切片一次批量推理
+        views = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        results = self.model.predict(sources + views, **predict_args) if sources or views else []
+
+        if sources:
+            coarse = boxes_to_numpy(results[0].boxes)
+            parts.append(coarse[:, [0, 1, 2, 3, -2, -1]])
+        for tile, result in zip(tiles, results[len(sources):]):
+            parts.append(self._to_frame_coords(boxes_to_numpy(result.boxes), tile, frame_shape))
+
+        self.frames += 1
+        self.tiles_inferred += len(tiles)
+
+        data = np.concatenate(parts, axis=0) if parts else np.zeros((0, 6), dtype=np.float32)
+        if len(data) > 0:
+            keep = nms(data[:, :4], data[:, 4], iou, max_det, data[:, 5])
+            data = data[keep]
+        return numpy_to_boxes(data, frame_shape)
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import numpy as np
+from ultralytics.engine.results import Boxes
+from ultralytics.trackers.track import TRACKER_MAP
+from ultralytics.utils import YAML
+from ultralytics.utils.checks import check_yaml
+
+from service.detections import numpy_to_boxes
+
+
+class StreamTracker:
+    """单路视频流的独立跟踪器
+
+    model.track() 把跟踪器挂在模型的 predictor 上，多路视频共用一个模型批量推理时
+    所有流会共享同一个跟踪器、互相干扰。这里为每路视频单独创建 ultralytics 跟踪器，
+    对 model.predict() 的检测结果做关联，输出格式与 model.track() 一致（带跟踪ID的 Boxes）。
+    """
+
+    def __init__(self, tracker_config: str = "bytetrack.yaml"):
+        """
+        Args:
+            tracker_config: ultralytics 跟踪器配置（bytetrack.yaml / botsort.yaml 或自定义路径）
+        """
+        cfg = SimpleNamespace(**YAML.load(check_yaml(tracker_config)))
+        if cfg.tracker_type not in TRACKER_MAP:
+            raise ValueError(f"不支持的跟踪器: {cfg.tracker_type}，可选: {', '.join(TRACKER_MAP)}")
+
+        self.tracker_config = tracker_config
+        self._tracker = TRACKER_MAP[cfg.tracker_type](args=cfg)
+
+    def update(self, boxes, frame: np.ndarray) -> Boxes:
+        """
+        用一帧的检测结果更新跟踪器
+
+        Args:
+            boxes: model.predict() 输出的 Boxes
+            frame: 对应的 BGR 帧
+
+        Returns:
+            带跟踪ID的 Boxes，列为 [x1, y1, x2, y2, track_id, conf, cls]
+        """
+        orig_shape = frame.shape[:2]
+        if boxes is None:
+            boxes = numpy_to_boxes(np.zeros((0, 6), dtype=np.float32), orig_shape)
+
+        tracks = self._tracker.update(boxes.cpu().numpy(), frame)
+        if len(tracks) == 0:
+            return numpy_to_boxes(np.zeros((0, 7), dtype=np.float32), orig_shape)
+
+        # 最后一列是检测框索引，不属于 Boxes 数据
+        return numpy_to_boxes(tracks[:, :-1], orig_shape)
+
+    def reset(self) -> None:
+        self._tracker.reset()
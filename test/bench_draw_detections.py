@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+检测结果绘制性能对比
+
+对比逐框绘制（每个框多次 tensor 索引 + cv2.rectangle）与
+service.rendering.draw_detections（一次 tensor -> NumPy 传输 + 批量绘制）
+在 1/10/100 个检测框下的耗时，并检查两者输出的像素一致性。
+
+向量化版本先画全部边框再画全部标签，检测框重叠时标签不会被其它边框遮挡，
+因此与逐框实现的像素一致性只在互不重叠的网格布局上检查；重叠布局（随机检测框）
+与按相同绘制顺序逐个 cv2.rectangle 的参考实现比较，确保重叠的标签背景被完整填充。
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+from ultralytics.engine.results import Boxes  # noqa: E402
+
+from service.rendering import draw_detections  # noqa: E402
+
+NAMES = {0: "person", 1: "car", 2: "dog"}
+WIDTH, HEIGHT = 640, 480
+ITERATIONS = 200
+
+
+def legacy_draw_detections(frame, boxes, names):
+    """重构前 PushStreamer._draw_detections 的逐框实现"""
+    for box in boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        conf = float(box.conf[0])
+        cls = int(box.cls[0])
+        track_id = int(box.id[0]) if box.id is not None else None
+
+        color = (0, 255, 0)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+        label = f"{names[cls]}"
+        if track_id is not None:
+            label += f" ID:{track_id}"
+        label += f" {conf:.2f}"
+
+        (text_width, text_height), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+        )
+        cv2.rectangle(
+            frame,
+            (x1, y1 - text_height - baseline - 5),
+            (x1 + text_width, y1),
+            color,
+            -1
+        )
+        cv2.putText(frame, label, (x1, y1 - baseline - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return frame
+
+
+def ordered_draw_detections(frame, boxes, names):
+    """参考实现：与向量化版本的绘制顺序相同（全部边框 -> 全部标签背景 -> 全部文字），逐个 cv2.rectangle"""
+    rows = []
+    for box in boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        label = f"{names[int(box.cls[0])]} ID:{int(box.id[0])} {float(box.conf[0]):.2f}"
+        rows.append((x1, y1, x2, y2, label))
+
+    color = (0, 255, 0)
+    for x1, y1, x2, y2, _ in rows:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    sizes = [cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1) for *_, label in rows]
+    for (x1, y1, _, _, _), ((text_width, text_height), baseline) in zip(rows, sizes):
+        cv2.rectangle(frame, (x1, y1 - text_height - baseline - 5), (x1 + text_width, y1), color, -1)
+    for (x1, y1, _, _, label), (_, baseline) in zip(rows, sizes):
+        cv2.putText(frame, label, (x1, y1 - baseline - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return frame
+
+
+def pixel_mismatch(expected, actual):
+    return np.count_nonzero(np.any(expected != actual, axis=2)) / (WIDTH * HEIGHT)
+
+
+def make_boxes(count, seed=0):
+    """生成带跟踪ID的随机检测框 (x1, y1, x2, y2, id, conf, cls)"""
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, WIDTH - 100, count)
+    y1 = rng.uniform(30, HEIGHT - 100, count)
+    data = np.stack([
+        x1,
+        y1,
+        x1 + rng.uniform(20, 100, count),
+        y1 + rng.uniform(20, 100, count),
+        np.arange(1, count + 1),
+        rng.uniform(0.3, 1.0, count),
+        rng.integers(0, len(NAMES), count),
+    ], axis=1)
+    return Boxes(torch.tensor(data, dtype=torch.float32), (HEIGHT, WIDTH))
+
+
+def make_grid_boxes(count):
+    """生成互不重叠（含标签）的网格检测框，用于像素一致性检查，最多 44 个"""
+    cols = 4
+    count = min(count, cols * 11)
+    rows = np.arange(count) // cols
+    x1 = (np.arange(count) % cols) * (WIDTH // cols) + 2
+    y1 = rows * 42 + 20
+    data = np.stack([
+        x1,
+        y1,
+        x1 + 40,
+        y1 + 20,
+        np.arange(1, count + 1),
+        np.full(count, 0.5),
+        np.arange(count) % len(NAMES),
+    ], axis=1)
+    return Boxes(torch.tensor(data, dtype=torch.float32), (HEIGHT, WIDTH))
+
+
+def bench(draw_fn, boxes, base):
+    frame = base.copy()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        np.copyto(frame, base)
+        draw_fn(frame, boxes, NAMES)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    print("=" * 60)
+    print("检测结果绘制性能对比")
+    print("=" * 60)
+
+    base = np.full((HEIGHT, WIDTH, 3), 128, dtype=np.uint8)
+    all_ok = True
+
+    for count in (1, 10, 100):
+        boxes = make_boxes(count)
+
+        legacy_ms = bench(legacy_draw_detections, boxes, base)
+        vectorized_ms = bench(draw_detections, boxes, base)
+
+        grid = make_grid_boxes(count)
+        mismatch = pixel_mismatch(
+            legacy_draw_detections(base.copy(), grid, NAMES), draw_detections(base.copy(), grid, NAMES))
+        # 随机检测框互相重叠，标签背景的重叠区域必须被填充
+        overlap_mismatch = pixel_mismatch(
+            ordered_draw_detections(base.copy(), boxes, NAMES), draw_detections(base.copy(), boxes, NAMES))
+        ok = mismatch == 0 and overlap_mismatch == 0
+        all_ok = all_ok and ok
+
+        print(f"\n{count} 个检测框:")
+        print(f"  逐框绘制:   {legacy_ms:.3f} ms/帧")
+        print(f"  向量化绘制: {vectorized_ms:.3f} ms/帧 ({legacy_ms / vectorized_ms:.1f}x)")
+        print(f"  {'✅' if mismatch == 0 else '❌'} 像素差异（互不重叠）: {mismatch * 100:.3f}%")
+        print(f"  {'✅' if overlap_mismatch == 0 else '❌'} 像素差异（重叠）: {overlap_mismatch * 100:.3f}%")
+
+    print("\n" + "=" * 60)
+    print("✅ 绘制结果一致" if all_ok else "❌ 绘制结果不一致")
+    print("=" * 60)
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
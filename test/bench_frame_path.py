@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+帧处理路径内存分配与耗时对比
+
+对比 PushStreamer 原来的“缩放 + 信息叠加”路径：
+  cv2.resize（新数组）+ frame.copy() + cv2.addWeighted（新数组）
+与预分配缓冲区路径：
+  FrameResizer（dst= 预分配缓冲区）+ darken_region（只在面板 ROI 上原地混合）
+
+在 640x480 和 1920x1080 输出分辨率下，用 tracemalloc 统计每帧新分配的内存，
+并检查两条路径的输出像素一致。
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from service.frame_buffers import FrameResizer, darken_region  # noqa: E402
+
+ITERATIONS = 100
+PANEL = ((10, 10), (300, 100))
+INFO_TEXTS = ["Frame: 1", "Detections: 3", "FPS: 30.0", "Imgsz: 640"]
+
+
+def draw_texts(frame):
+    y_offset = 30
+    for text in INFO_TEXTS:
+        cv2.putText(frame, text, (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        y_offset += 20
+    return frame
+
+
+def legacy_path(source, width, height):
+    """原实现：每帧三次整帧大小的分配"""
+    frame = cv2.resize(source, (width, height))
+    overlay = frame.copy()
+    cv2.rectangle(overlay, PANEL[0], PANEL[1], (0, 0, 0), -1)
+    frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
+    return draw_texts(frame)
+
+
+def make_preallocated_path(width, height):
+    resizer = FrameResizer(width, height)
+
+    def preallocated_path(source, width, height):
+        frame = resizer.resize(source)
+        darken_region(frame, PANEL[0], PANEL[1], alpha=0.5)
+        return draw_texts(frame)
+
+    return preallocated_path
+
+
+def measure(path_fn, source, width, height):
+    """返回 (每帧耗时 ms, 每帧峰值新分配字节数)"""
+    path_fn(source, width, height)  # 预热
+
+    # tracemalloc 会拖慢执行，分配统计和计时分开进行
+    tracemalloc.start()
+    peaks = []
+    for _ in range(ITERATIONS):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        path_fn(source, width, height)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        path_fn(source, width, height)
+    elapsed_ms = (time.perf_counter() - start) / ITERATIONS * 1000
+    return elapsed_ms, float(np.mean(peaks))
+
+
+def main():
+    print("=" * 60)
+    print("帧处理路径内存分配与耗时对比")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    # 摄像头帧尺寸与输出尺寸不同，确保每帧都需要缩放
+    source = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    all_ok = True
+
+    for width, height in ((640, 480), (1920, 1080)):
+        frame_bytes = width * height * 3
+        preallocated_path = make_preallocated_path(width, height)
+
+        legacy_ms, legacy_peak = measure(legacy_path, source, width, height)
+        prealloc_ms, prealloc_peak = measure(preallocated_path, source, width, height)
+
+        expected = legacy_path(source, width, height)
+        actual = preallocated_path(source, width, height)
+        ok = np.array_equal(expected, actual)
+        all_ok = all_ok and ok
+
+        print(f"\n输出分辨率 {width}x{height}（整帧 {frame_bytes / 1024 / 1024:.2f} MB）:")
+        print(f"  原实现:       {legacy_ms:.3f} ms/帧 | 峰值新分配 {legacy_peak / 1024 / 1024:.2f} MB")
+        print(f"  预分配缓冲区: {prealloc_ms:.3f} ms/帧 | 峰值新分配 {prealloc_peak / 1024:.1f} KB")
+        print(f"  {'✅' if ok else '❌'} 输出像素{'一致' if ok else '不一致'}")
+
+    print("\n" + "=" * 60)
+    print("✅ 测试通过" if all_ok else "❌ 测试失败")
+    print("=" * 60)
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径（必须在导入 service 之前）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from service.multi_streamer import MultiCameraStreamer  # noqa: E402
+
+
+def main():
+    """主函数 - 多路摄像头共享模型推流"""
+    print("""
+    ╔═══════════════════════════════════════════════════════╗
+    ║      YOLO 多路摄像头推流检测系统                      ║
+    ║                                                       ║
+    ║  多路摄像头共享一个模型，批量推理，独立跟踪和推流     ║
+    ╚═══════════════════════════════════════════════════════╝
+    """)
+
+    # 每路摄像头推流到不同的 UDP RTP 端口
+    streamer = MultiCameraStreamer(
+        streams=[
+            {"camera_device": 0, "port": 5004},
+            {"camera_device": 1, "port": 5008},
+        ],
+        model_path="runs/train/person_detection/weights/best.pt",
+        video_width=640,            # 视频分辨率
+        video_height=480,
+        fps=15,                     # 帧率
+        bitrate=800,                # 每路比特率 (kbps)
+        enable_tracking=True        # 每路独立跟踪
+    )
+
+    # 开始推流
+    streamer.start_streaming()
+
+
+if __name__ == "__main__":
+    main()